@@ -1,17 +1,31 @@
+import asyncio
 from pathlib import Path
 
+from vein_wiki_tools.services.wiki_pages import ParsedPage, serialize_page
 from vein_wiki_tools.utils.file_helper import get_import_path
 from vein_wiki_tools.utils.logging import getLogger
 
 logger = getLogger(__name__)
 
 
-async def create_page(path: Path, text: str, summary: str):
+def write_page_file(path: Path, text: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         f.write(text)
 
 
+async def create_page(path: Path, text: str, summary: str):
+    # in a thread, so that pages can be rendered and merged while they are written
+    await asyncio.to_thread(write_page_file, path, text)
+
+
+async def create_parsed_page(path: Path, parsed_page: ParsedPage, summary: str):
+    """Like create_page, but streams a parsed page to the file instead of rendering it to a string first"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        serialize_page(parsed_page, f)
+
+
 async def edit_page(path: Path, text: str, summary: str):
     await create_page(path, text, summary)
 
@@ -28,18 +28,20 @@ class UEBuildObjectProperties(UEBaseModel):
     resulting_actor: UEReference | None = Field(default=None, alias="ResultingActor")
 
 
+BUILD_OBJECT_CATEGORY_PATTERN = re.compile(r"BuildObjectCategory'BOC_(\w+)'")
+
+
 class UEBuildObject(UEModel):
     properties: UEBuildObjectProperties = Field(..., alias="Properties")
-    _model_info: UEModelInfo = UEModelInfo()
 
-    @property
-    def model_info(self) -> UEModelInfo:
+    def classify(self, console_name: str | None = None) -> UEModelInfo:
+        model_info = self.new_model_info(console_name=console_name)
         if boc := self.get_prop("build_object_category"):
-            if match := re.match(r"BuildObjectCategory'BOC_(\w+)'", boc.object_name):
-                self._model_info.super_type = "buildable object"
-                self._model_info.sub_type = match.group(1).lower()
-                self._model_info.template = "item"
-        return self._model_info
+            if match := BUILD_OBJECT_CATEGORY_PATTERN.match(boc.object_name):
+                model_info.super_type = "buildable object"
+                model_info.sub_type = match.group(1).lower()
+                model_info.template = "item"
+        return model_info
 
 
 class UEBuildObjectCategoryProperties(UEBaseModel):
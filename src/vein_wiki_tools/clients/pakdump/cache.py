@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import zlib
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+from vein_wiki_tools.clients.pakdump.models import UEModel
+from vein_wiki_tools.settings import settings
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+# Bump when models are produced differently without any change to the pydantic schemas
+MODEL_CACHE_VERSION = 2
+
+
+@dataclass
+class ModelCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    writes: int = 0
+
+    def add(self, other: "ModelCacheStats") -> None:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.invalidations += other.invalidations
+        self.writes += other.writes
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"hits={self.hits}, misses={self.misses}, invalidations={self.invalidations}, "
+            f"writes={self.writes}, hit_ratio={self.hit_ratio():.1%}"
+        )
+
+
+@cache
+def get_schema_fingerprint() -> str:
+    """Hash the JSON schema of every UEModel class, so cached models die with schema changes."""
+    ue_models = sorted({UEModel, *UEModel.get_subclasses()}, key=lambda c: (c.__module__, c.__qualname__))
+    digest = hashlib.blake2b(str(MODEL_CACHE_VERSION).encode(), digest_size=16)
+    for ue_model in ue_models:
+        digest.update(f"{ue_model.__module__}.{ue_model.__qualname__}".encode())
+        digest.update(json.dumps(ue_model.model_json_schema(by_alias=True), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def get_source_signature(path: Path) -> tuple[str, int, int]:
+    stat = path.stat()
+    return str(path), stat.st_size, stat.st_mtime_ns
+
+
+class ModelCache:
+    """
+    Persistent cache of validated UEModels, backed by a single sqlite file.
+
+    An entry is keyed by the path of the pakdump file it was read from, and stays valid
+    as long as the size and mtime of that file, and of any file it was built from
+    (e.g. a blueprint template), are unchanged and the schema fingerprint matches.
+    Models are stored as compressed pickles.
+    """
+
+    def __init__(self, path: Path, fingerprint: str | None = None) -> None:
+        self.path = path
+        self.stats = ModelCacheStats()
+        self._fingerprint = fingerprint
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = get_schema_fingerprint()
+        return self._fingerprint
+
+    def connection(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared with forked worker processes
+        if self._connection is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS models (path TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, sources TEXT NOT NULL, payload BLOB NOT NULL)"
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, path: Path) -> tuple[UEModel, tuple[Path, ...]] | None:
+        """
+        Look up a cached model.
+
+        Return:
+            ``(ue_model, sources)`` where sources are all files the model was built from,
+            or None when there is no valid entry.
+        """
+        conn = self.connection()
+        row = conn.execute("SELECT fingerprint, sources, payload FROM models WHERE path = ?", (str(path),)).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        fingerprint, sources, payload = row
+        signatures = [tuple(s) for s in json.loads(sources)]
+        if fingerprint != self.fingerprint or not self._is_fresh(signatures):
+            logger.debug("Invalidating cached model [path=%s]", path)
+            conn.execute("DELETE FROM models WHERE path = ?", (str(path),))
+            conn.commit()
+            self.stats.invalidations += 1
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return pickle.loads(zlib.decompress(payload)), tuple(Path(s[0]) for s in signatures)
+
+    def put(self, path: Path, ue_model: UEModel, sources: tuple[Path, ...]) -> None:
+        signatures = [get_source_signature(source) for source in sources]
+        payload = zlib.compress(pickle.dumps(ue_model, protocol=pickle.HIGHEST_PROTOCOL))
+        conn = self.connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO models (path, fingerprint, sources, payload) VALUES (?, ?, ?, ?)",
+            (str(path), self.fingerprint, json.dumps(signatures), payload),
+        )
+        conn.commit()
+        self.stats.writes += 1
+
+    def clear(self) -> None:
+        conn = self.connection()
+        conn.execute("DELETE FROM models")
+        conn.commit()
+
+    def close(self) -> None:
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+    @staticmethod
+    def _is_fresh(signatures: list[tuple]) -> bool:
+        for path, size, mtime_ns in signatures:
+            try:
+                if get_source_signature(Path(path)) != (path, size, mtime_ns):
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pid"] = None
+        return state
+
+
+_model_cache: ModelCache | None = ModelCache(settings.vein_model_cache_path) if settings.vein_model_cache_path else None
+
+
+def get_model_cache() -> ModelCache | None:
+    return _model_cache
+
+
+def set_model_cache(model_cache: ModelCache | None) -> None:
+    global _model_cache
+    _model_cache = model_cache
@@ -1,3 +1,5 @@
+from typing import ClassVar
+
 from pydantic import Field
 
 from vein_wiki_tools.clients.pakdump.models import (
@@ -5,7 +7,6 @@ from vein_wiki_tools.clients.pakdump.models import (
     UECultureInvariantString,
     UELocalizedString,
     UEModel,
-    UEModelInfo,
     UEReference,
     UEStrKeyFloatValuePair,
 )
@@ -32,7 +33,7 @@ class UEFluidDefinitionProperties(UEBaseModel):
 
 class UEFluidDefinition(UEModel):
     properties: UEFluidDefinitionProperties = Field(..., alias="Properties")
-    _model_info: UEModelInfo = UEModelInfo(super_type="fluid", template="item")
+    model_info_defaults: ClassVar[dict[str, str]] = {"super_type": "fluid", "template": "item"}
 
 
 class UEFoodConditionSetProperties(UEBaseModel):
@@ -45,4 +46,4 @@ class UEFoodConditionSetProperties(UEBaseModel):
 
 class UEFoodConditionSet(UEModel):
     properties: UEFoodConditionSetProperties = Field(..., alias="Properties")
-    _model_info: UEModelInfo = UEModelInfo(super_type="food_condition_set")
+    model_info_defaults: ClassVar[dict[str, str]] = {"super_type": "food_condition_set"}
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+
+from vein_wiki_tools.clients.pakdump.models import UEReference
+from vein_wiki_tools.utils.file_helper import get_output_path
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+PAKDUMP_INDEX_FILENAME = ".pakdump_index.json"
+PAKDUMP_INDEX_VERSION = 2
+OBJECT_PATH_PREFIXES = ("/Game/", "Vein/Content/Vein/", "Vein/")
+
+
+def strip_object_path(object_path: str) -> str:
+    """
+    Strip an ObjectPath down to the path of the file relative to the pakdump root.
+
+    ``Vein/Content/Vein/Items/Ammo/BP_Ammo_9mm.0`` -> ``Items/Ammo/BP_Ammo_9mm``
+    """
+    stem, _, index = object_path.rpartition(".")
+    if stem and index.isdigit():
+        object_path = stem
+    for prefix in OBJECT_PATH_PREFIXES:
+        if object_path.startswith(prefix):
+            object_path = object_path[len(prefix) :]
+    return object_path.strip("/")
+
+
+def get_root_fingerprint(root: Path) -> str:
+    """
+    Hash the mtimes of the pakdump root and of the folders right under it.
+
+    Extracting a pakdump again recreates those folders, so the fingerprint changes without walking every file.
+    """
+    digest = hashlib.blake2b(str(root).encode(), digest_size=16)
+    for path in (root, *sorted(p for p in root.iterdir() if p.is_dir())):
+        digest.update(f"{path.name}:{path.stat().st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def normalize_object_path(object_path: str) -> str:
+    return strip_object_path(object_path).lower()
+
+
+def normalize_object_name(object_name: str) -> str:
+    """
+    Normalize an ObjectName so it matches the stem of the file in the pakdump.
+
+    ``BlueprintGeneratedClass'BP_Ammo_9mm_C'`` -> ``bp_ammo_9mm``
+    """
+    _, quote, name = object_name.partition("'")
+    if quote:
+        object_name = name.rstrip("'")
+    if object_name.endswith("_C"):
+        object_name = object_name[:-2]
+    return object_name.lower()
+
+
+@dataclass
+class PakdumpIndex:
+    """
+    Maps normalized object paths and object names to the files of a pakdump.
+
+    Built once by walking the pakdump root, after which references are resolved
+    with dict lookups. References that can't be resolved are collected in
+    ``unresolved`` so they can be reported in bulk.
+    """
+
+    root: Path
+    fingerprint: str = ""
+    paths: dict[str, Path] = field(default_factory=dict)
+    names: dict[str, Path] = field(default_factory=dict)
+    ambiguous_names: set[str] = field(default_factory=set)
+    unresolved: set[UEReference] = field(default_factory=set)
+
+    @classmethod
+    def build(cls, root: Path) -> PakdumpIndex:
+        fingerprint = get_root_fingerprint(root)
+        files: list[str] = []
+        for dirpath, _, filenames in os.walk(root):
+            relative_dir = Path(dirpath).relative_to(root)
+            for filename in filenames:
+                if filename.endswith(".json") and filename != PAKDUMP_INDEX_FILENAME:
+                    files.append((relative_dir / filename).as_posix())
+        logger.debug("Built pakdump index [root=%s, files=%s]", root, len(files))
+        return cls.from_files(root=root, files=files, fingerprint=fingerprint)
+
+    @classmethod
+    def from_files(cls, root: Path, files: list[str], fingerprint: str = "") -> PakdumpIndex:
+        index = cls(root=root, fingerprint=fingerprint)
+        for relative in sorted(files):
+            path = root / relative
+            index.paths[relative[: -len(".json")].lower()] = path
+            name = path.stem.lower()
+            if name in index.names:
+                index.ambiguous_names.add(name)
+            else:
+                index.names[name] = path
+        for name in index.ambiguous_names:
+            del index.names[name]
+        return index
+
+    @classmethod
+    def load(cls, root: Path, path: Path) -> PakdumpIndex | None:
+        """Load a persisted index, or None when there is none or the pakdump changed since it was built"""
+        try:
+            content = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if content.get("version") != PAKDUMP_INDEX_VERSION:
+            return None
+        if content.get("fingerprint") != (fingerprint := get_root_fingerprint(root)):
+            logger.info("Pakdump changed since its index was built [root=%s]", root)
+            return None
+        return cls.from_files(root=root, files=content["files"], fingerprint=fingerprint)
+
+    def save(self, path: Path) -> None:
+        files = sorted(p.relative_to(self.root).as_posix() for p in self.paths.values())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"version": PAKDUMP_INDEX_VERSION, "fingerprint": self.fingerprint, "files": files}))
+
+    def resolve(self, model_reference: UEReference) -> Path | None:
+        if path := self.paths.get(normalize_object_path(model_reference.object_path)):
+            return path
+        if path := self.names.get(normalize_object_name(model_reference.object_name)):
+            return path
+        self.unresolved.add(model_reference)
+        return None
+
+    def report_unresolved(self) -> list[str]:
+        """Log and return every reference that could not be resolved so far."""
+        unresolved = sorted(f"{ref.object_name} ({ref.object_path})" for ref in self.unresolved)
+        if unresolved:
+            logger.warning("Unresolved pakdump references [count=%s]:\n%s", len(unresolved), "\n".join(unresolved))
+        return unresolved
+
+
+def get_index_path(root: Path) -> Path:
+    """Where the index of a pakdump is persisted, in the cache of the output folder rather than in the pakdump"""
+    name = hashlib.blake2b(str(root.resolve()).encode(), digest_size=8).hexdigest()
+    return get_output_path("cache") / f"pakdump_index_{name}.json"
+
+
+@cache
+def get_pakdump_index(root: Path) -> PakdumpIndex:
+    """Load the persisted index of a pakdump, building and persisting it the first time."""
+    index_path = get_index_path(root)
+    if (index := PakdumpIndex.load(root=root, path=index_path)) is not None:
+        return index
+    index = PakdumpIndex.build(root)
+    try:
+        index.save(index_path)
+    except OSError as e:
+        logger.warning("Unable to persist pakdump index [path=%s, error=%s]", index_path, e)
+    return index
+
+
+def rebuild_pakdump_index(root: Path) -> PakdumpIndex:
+    """Rebuild the index, e.g. after the pakdump has been refreshed."""
+    get_pakdump_index.cache_clear()
+    get_index_path(root).unlink(missing_ok=True)
+    return get_pakdump_index(root)
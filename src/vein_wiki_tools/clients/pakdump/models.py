@@ -5,7 +5,7 @@ import re
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any, Iterable, Type, TypeVar
+from typing import Any, ClassVar, Iterable, Type, TypeVar
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -14,6 +14,29 @@ logger = logging.getLogger(__name__)
 VEIN_PAK_DUMP_ROOT = Path("/mnt/c/Users/havard/Downloads/Vein")
 N = TypeVar("N", bound="UEModel")
 
+# Lowercased UE type name (with "ue" prefix) -> model class, filled as UEModel subclasses are defined
+UE_TYPE_REGISTRY: dict[str, Type[UEModel]] = {}
+
+
+def get_ue_type_key(type_name: str) -> str:
+    type_name = type_name.lower()
+    if not type_name.startswith("ue"):
+        type_name = "ue" + type_name
+    return type_name
+
+
+def register_ue_type(type_name: str, ue_model_type: Type[UEModel]) -> None:
+    """
+    Register the model class used for pakdump files of ``type_name``.
+
+    UEModel subclasses register themselves under their class name, this is also how
+    extra UE types can be added without subclassing in this package.
+    """
+    key = get_ue_type_key(type_name)
+    if (existing := UE_TYPE_REGISTRY.get(key)) is not None and existing is not ue_model_type:
+        logger.debug("Replacing registered UE type [type_name=%s, existing=%s, new=%s]", type_name, existing, ue_model_type)
+    UE_TYPE_REGISTRY[key] = ue_model_type
+
 
 @dataclass
 class UEModelInfo:
@@ -60,33 +83,54 @@ class UEBasePropertyModel(UEBaseModel):
         return self.item_type.get("ObjectName", "Error")
 
 
+ITEM_TYPE_PATTERN = re.compile(r"(Item)Type'IT_(\w+)'")
+ITEM_CLASS_PATTERN = re.compile(r"Class'(.*)(Item)'")
+
+
 class UEModel(UEBaseModel):
     # UE fields
     type: str = Field(..., alias="Type")
     name: str = Field(..., alias="Name")
     super_struct: UEReference | None = Field(default=None, alias="SuperStruct")
     # custom fields
-    _model_info: UEModelInfo = UEModelInfo()
+    model_info_defaults: ClassVar[dict[str, str]] = {}
+    _model_info: UEModelInfo | None = None
 
     @property
     def model_info(self) -> UEModelInfo:
+        """Classification of the model, computed on first access and kept on the instance."""
+        if self._model_info is None:
+            self._model_info = self.classify()
+        return self._model_info
+
+    def set_console_name(self, console_name: str) -> None:
+        """Set the console name, which can change the classification of the model."""
+        categories = self.model_info.categories
+        self._model_info = self.classify(console_name=console_name)
+        self._model_info.categories = categories
+
+    def new_model_info(self, console_name: str | None = None) -> UEModelInfo:
+        return UEModelInfo(console_name=console_name, **self.model_info_defaults)
+
+    def classify(self, console_name: str | None = None) -> UEModelInfo:
+        model_info = self.new_model_info(console_name=console_name)
         if ton := self.get_type_object_name():
-            if match := re.match(r"(Item)Type'IT_(\w+)'", ton):
-                self._model_info.super_type = match.group(1).lower()
-                self._model_info.sub_type = match.group(2).lower()
-                self._model_info.template = self._model_info.super_type
+            if match := ITEM_TYPE_PATTERN.match(ton):
+                model_info.super_type = match.group(1).lower()
+                model_info.sub_type = match.group(2).lower()
+                model_info.template = model_info.super_type
         elif self.super_struct is not None:
-            if match := re.match(r"Class'(.*)(Item)'", self.super_struct.object_name):
+            if match := ITEM_CLASS_PATTERN.match(self.super_struct.object_name):
                 if item_type := match.group(1):
-                    self._model_info.sub_type = item_type.lower()
-                elif cn := self._model_info.console_name:
-                    if "melee" in cn.lower():
-                        self._model_info.sub_type = "melee"
+                    model_info.sub_type = item_type.lower()
+                elif console_name:
+                    if "melee" in console_name.lower():
+                        model_info.sub_type = "melee"
                 elif self.get_prop("melee_time") is not None:
-                    self._model_info.sub_type = "melee"
-                self._model_info.super_type = match.group(2).lower()
-                self._model_info.template = match.group(2).lower()
-        return self._model_info
+                    model_info.sub_type = "melee"
+                model_info.super_type = match.group(2).lower()
+                model_info.template = match.group(2).lower()
+        return model_info
 
     def get_object_name(self) -> str:
         return f"{self.type}'{self.name}'"
@@ -126,6 +170,11 @@ class UEModel(UEBaseModel):
             yield from subclass.get_subclasses()
             yield subclass
 
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        register_ue_type(cls.__name__, cls)
+
 
 class UEColor(UEBaseModel):
     r: float = Field(..., serialization_alias="R", validation_alias="R")
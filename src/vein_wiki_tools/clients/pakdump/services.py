@@ -5,8 +5,10 @@ from pathlib import Path
 from typing import Any, Type
 
 from vein_wiki_tools.clients.pakdump import get_subclass_type
+from vein_wiki_tools.clients.pakdump.cache import get_model_cache
 from vein_wiki_tools.clients.pakdump.consumables import UEFluidDefinition
 from vein_wiki_tools.clients.pakdump.firearms import UEBulletType
+from vein_wiki_tools.clients.pakdump.index import get_pakdump_index, rebuild_pakdump_index, strip_object_path
 from vein_wiki_tools.clients.pakdump.models import (
     UEBlueprintGeneratedClass,
     UEItemType,
@@ -52,19 +54,35 @@ VEIN_PAK_DUMP_ROOT = get_vein_root()
 
 @cache
 def get_ue_model_by_path(path: Path) -> UEModel:
-    """Read the contents of a file asynchronously."""
-    if not path.exists():
-        raise FileNotFoundError(f"File not found: {path}")
-    if not path.is_file():
-        raise ValueError(f"Path is not a file: {path}")
+    """Read a UEModel from a pakdump file, going through the persistent model cache if enabled."""
+    ue_model, _ = get_ue_model_and_sources_by_path(path)
+    return ue_model
+
+
+@cache
+def get_ue_model_and_sources_by_path(path: Path) -> tuple[UEModel, tuple[Path, ...]]:
+    """
+    Read a UEModel from a pakdump file.
+
+    Return:
+        ``(ue_model, sources)`` where sources are the paths of all files the model was built from.
+    """
     if not path.suffix.lower() == ".json":
         raise ValueError(f"File is not a JSON file: {path}")
 
-    content = json.loads(path.read_text())
+    model_cache = get_model_cache()
+    if model_cache is not None and (cached := model_cache.get(path)) is not None:
+        return cached
+
+    try:
+        content = json.loads(path.read_text())
+    except IsADirectoryError:
+        raise ValueError(f"Path is not a file: {path}")
     if not isinstance(content, list):
         raise ValueError(f"Unexpected content format in file: {path}")
 
     _type = get_type(content)
+    sources: tuple[Path, ...] = (path,)
 
     if _type is UEBlueprintGeneratedClass:
         model = content[0]
@@ -74,7 +92,7 @@ def get_ue_model_by_path(path: Path) -> UEModel:
                 template = UEReference.model_validate(obj["Template"])
                 if template is None:
                     raise ValueError(f"Template reference can't be handled in file: {path}")
-                template_model = get_ue_model_by_reference(template)
+                template_model, template_sources = get_ue_model_and_sources_by_path(get_path_by_reference(template))
                 if not isinstance(template_model, UEBlueprintGeneratedClass):
                     raise ValueError(f"Template model is not a UEModel in file: {path}")
                 if template_model.object is None:
@@ -83,10 +101,15 @@ def get_ue_model_by_path(path: Path) -> UEModel:
                 temp_props.update(obj.get("Properties", {}))
                 obj["Properties"] = temp_props
                 model["SuperStruct"] = template_model.super_struct
+                sources += template_sources
             model["object"] = obj
-        return _type.model_validate(model)
+        ue_model = _type.model_validate(model)
     else:
-        return _type.model_validate(content[0])
+        ue_model = _type.model_validate(content[0])
+
+    if model_cache is not None:
+        model_cache.put(path, ue_model, sources)
+    return ue_model, sources
 
 
 @cache
@@ -95,20 +118,25 @@ def get_ue_model_by_reference(
     _root: Path | None = None,
 ) -> UEModel:
     """Get a UEModel from a UEReference."""
-    model_path = model_reference.object_path[:-2]  # Remove the .0 or .1 at the end
-    if model_path.startswith("/Game/"):
-        model_path = model_path[len("/Game/") :]
-    if model_path.startswith("Vein/Content/Vein/"):
-        model_path = model_path[len("Vein/Content/Vein") :]
-    if model_path.startswith("Vein/"):
-        model_path = model_path[len("Vein/") :]
-
-    if _root is None:
-        path = VEIN_PAK_DUMP_ROOT / model_path.lstrip("/")
-    else:
-        path = _root / model_path.lstrip("/")
-    path = path.with_suffix(".json")
-    return get_ue_model_by_path(path)
+    return get_ue_model_by_path(get_path_by_reference(model_reference, _root=_root))
+
+
+def get_path_by_reference(
+    model_reference: UEReference,
+    _root: Path | None = None,
+) -> Path:
+    """Get the pakdump file path a UEReference points to."""
+    root = VEIN_PAK_DUMP_ROOT if _root is None else _root
+    if (path := get_pakdump_index(root).resolve(model_reference)) is not None:
+        if path.exists():
+            return path
+        # Files moved since the index was built, which the fingerprint of the root didn't catch
+        logger.info("Pakdump index is stale, rebuilding [root=%s, path=%s]", root, path)
+        if (path := rebuild_pakdump_index(root).resolve(model_reference)) is not None:
+            return path
+
+    # Not in the index, fall back to the path the reference spells out
+    return (root / strip_object_path(model_reference.object_path)).with_suffix(".json")
 
 
 def get_type(ue_raw_model: list[dict]) -> Type[UEModel]:
@@ -254,10 +282,9 @@ def get_damage_type(node: Node, graph: Graph) -> str | None:
 
 async def get_categories(node: Node, graph: Graph) -> set[str]:
     categories = node.ue_model.model_info.categories
-    for linktype, n in node.edges:
-        if linktype == LinkType.HAS_ITEM_TYPE:
-            if isinstance(n.ue_model, UEItemType):
-                categories.add(n.ue_model.display_name())
+    for n in node.get_edges(LinkType.HAS_ITEM_TYPE):
+        if isinstance(n.ue_model, UEItemType):
+            categories.add(n.ue_model.display_name())
     if scent_strength := node.ue_model.get_prop("scent_strength"):
         if scent_strength != 0.0:
             categories.add("Scented")
@@ -305,15 +332,7 @@ def get_magazine_capacity_string(node: Node) -> str | None:
 
 
 def get_related_models(node: Node, linktype: LinkType) -> dict[str, list[Node]]:
-    relations: dict[str, list[Node]] = {"edges": [], "neighbours": []}
-    for linktype, n in node.edges:
-        if linktype == linktype:
-            relations["edges"].append(n)
-    for linktype, n in node.neighbours:
-        if linktype == linktype:
-            relations["neighbours"].append(n)
-
-    return relations
+    return {"edges": node.get_edges(linktype), "neighbours": node.get_neighbours(linktype)}
 
 
 async def get_obtaining(node: Node, graph: Graph) -> dict[str, Any]:
@@ -0,0 +1,240 @@
+import itertools
+import os
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import NamedTuple
+
+import pywikibot
+from pywikibot import family
+from pywikibot.exceptions import NoPageError
+from pywikibot.pagegenerators import PreloadingGenerator
+
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+# Titles per query when preloading, the most MediaWiki allows without the apihighlimits right
+PRELOAD_BATCH_SIZE = 50
+# Entries per query when reading the recent changes and the log
+CHANGES_BATCH_SIZE = 500
+# Log entries that change pages without an edit listed in the recent changes
+CHANGE_LOG_TYPES = ("delete", "move")
+# Seconds the wiki keeps its recent changes, $wgRCMaxAge, 90 days unless the wiki sets otherwise
+RC_MAX_AGE = 90 * 24 * 60 * 60
+
+
+@dataclass
+class LatencyStats:
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def mean(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+    def __str__(self) -> str:
+        return f"calls={self.calls}, total={self.seconds:.2f}s, mean={self.mean() * 1000:.1f}ms, max={self.max_seconds * 1000:.1f}ms"
+
+
+class WikiPage(NamedTuple):
+    title: str
+    text: str | None  # None when the page doesn't exist
+    revid: int | None
+
+
+class WikiChange(NamedTuple):
+    timestamp: str
+    kind: str  # "new" or "edit" from the recent changes, "delete" or "move" from the log
+    title: str
+    new_title: str | None = None  # where the page was moved to
+
+
+class WikiSession:
+    """
+    One pywikibot Site per process, created and logged in on first use.
+
+    Pages are read and written through the same Site, and so through the same pywikibot
+    HTTP session and its connection pool, instead of setting up a new Site for every page.
+    The latency of every site setup, login, fetch, preload, revision check, change listing and save
+    is recorded in ``stats``. ``rc_max_age`` is how long the wiki keeps its recent changes, in seconds.
+    """
+
+    def __init__(self, code: str = "en", fam: str | family.Family = "vein", rc_max_age: int = RC_MAX_AGE) -> None:
+        self.code = code
+        self.fam = fam
+        self.rc_max_age = rc_max_age
+        self.stats: defaultdict[str, LatencyStats] = defaultdict(LatencyStats)
+        self._site: pywikibot.site.BaseSite | None = None
+        self._logged_in = False
+        self._pid: int | None = None
+
+    @property
+    def site(self) -> pywikibot.site.BaseSite:
+        # a site and its connections can't be shared with forked worker processes
+        if self._site is None or self._pid != os.getpid():
+            with self.timed("site"):
+                self._site = pywikibot.Site(self.code, self.fam)
+            self._logged_in = False
+            self._pid = os.getpid()
+        return self._site
+
+    def login(self) -> pywikibot.site.BaseSite:
+        site = self.site
+        if not self._logged_in:
+            with self.timed("login"):
+                site.login()
+            self._logged_in = True
+            logger.debug(f"Logged in as: {site.user()}")
+        return site
+
+    @contextmanager
+    def timed(self, operation: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats[operation].record(time.perf_counter() - start)
+
+    def page(self, title: str) -> pywikibot.Page:
+        return pywikibot.Page(self.site, title)
+
+    def fetch(self, title: str) -> str | None:
+        """The current text of a page, or None when it doesn't exist"""
+        page = self.page(title)
+        with self.timed("fetch"):
+            try:
+                return page.get()
+            except NoPageError:
+                return None
+
+    def preload(self, titles: Iterable[str], batch_size: int = PRELOAD_BATCH_SIZE) -> Iterator[WikiPage]:
+        """
+        Fetch the current text of many pages, ``batch_size`` titles per request.
+
+        ``titles`` is consumed lazily, so pages stream through without all being held at once.
+
+        Return:
+            the pages in the order of ``titles``
+        """
+        site = self.site
+        requested: dict[int, str] = {}
+
+        def pages() -> Iterator[pywikibot.Page]:
+            for title in titles:
+                page = pywikibot.Page(site, title)
+                requested[id(page)] = title
+                yield page
+
+        preloaded = iter(PreloadingGenerator(pages(), groupsize=batch_size, quiet=True))
+        while True:
+            # the request for a whole batch is timed with its first page
+            start = time.perf_counter()
+            if (page := next(preloaded, None)) is None:
+                return
+            self.stats["preload"].record(time.perf_counter() - start)
+            title = requested.pop(id(page))
+            if page.exists():
+                yield WikiPage(title, page.text, page.latest_revision_id)
+            else:
+                yield WikiPage(title, None, None)
+
+    def get_revids(self, titles: Iterable[str], batch_size: int = PRELOAD_BATCH_SIZE) -> dict[str, int | None]:
+        """The latest revision id of many pages, None for pages that don't exist, with one request per ``batch_size`` titles"""
+        site = self.site
+        revids: dict[str, int | None] = {}
+        for batch in itertools.batched(titles, batch_size):
+            pages = [pywikibot.Page(site, title) for title in batch]
+            with self.timed("revids"):
+                for _ in site.preloadpages(pages, groupsize=batch_size, content=False, quiet=True):
+                    pass
+            revids |= {title: page.latest_revision_id if page.exists() else None for title, page in zip(batch, pages)}
+        return revids
+
+    def server_time(self) -> str:
+        """The current time of the wiki, as an ISO 8601 timestamp"""
+        with self.timed("time"):
+            return str(self.site.server_time())
+
+    def has_changes_since(self, since: str, now: str) -> bool:
+        """Whether the recent changes at ``now`` still reach back to ``since``, both ISO 8601 timestamps of the wiki"""
+        start = pywikibot.Timestamp.fromISOformat(since)
+        return pywikibot.Timestamp.fromISOformat(now) - start <= timedelta(seconds=self.rc_max_age)
+
+    def get_changes(self, since: str, batch_size: int = CHANGES_BATCH_SIZE) -> list[WikiChange]:
+        """
+        Pages created, edited, deleted or moved on the wiki since ``since``, an ISO 8601 timestamp, oldest first.
+
+        Edits come from the recent changes, deletes and moves from the log, which outlasts
+        the recent changes. Both are read ``batch_size`` entries per request.
+        Edits older than ``rc_max_age`` are gone, see ``has_changes_since``.
+        """
+        site = self.site
+        start = pywikibot.Timestamp.fromISOformat(since)
+        changes: list[WikiChange] = []
+        with self.timed("changes"):
+            recentchanges = site.recentchanges(start=start, reverse=True, changetype="new|edit")
+            recentchanges.set_query_increment(batch_size)
+            changes += [WikiChange(change["timestamp"], change["type"], change["title"]) for change in recentchanges]
+            for logtype in CHANGE_LOG_TYPES:
+                logevents = site.logevents(logtype=logtype, start=start, reverse=True)
+                logevents.set_query_increment(batch_size)
+                for entry in logevents:
+                    new_title = entry.target_title if logtype == "move" else None
+                    changes.append(WikiChange(entry["timestamp"], logtype, entry["title"], new_title))
+        # sorting is stable, so changes made in the same second stay in the order of the feeds
+        return sorted(changes, key=lambda change: change.timestamp)
+
+    def save(self, title: str, text: str, summary: str = "") -> pywikibot.Page:
+        site = self.login()
+        page = pywikibot.Page(site, title)
+        page.text = text
+        with self.timed("save"):
+            page.save(summary=summary)
+        return page
+
+    def log_stats(self) -> None:
+        for operation, latency in sorted(self.stats.items()):
+            logger.info(f"Wiki {operation}: {latency}")
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_site"] = None
+        state["_logged_in"] = False
+        state["_pid"] = None
+        return state
+
+
+_session: WikiSession | None = None
+
+
+def get_session() -> WikiSession:
+    global _session
+    if _session is None:
+        _session = WikiSession()
+    return _session
+
+
+def set_session(session: WikiSession | None) -> None:
+    global _session
+    _session = session
+
+
+async def create_page(name: str, text: str, summary: str, session: WikiSession | None = None):
+    (session or get_session()).save(name, text, summary=summary)
+
+
+async def edit_page(name: str, text: str, summary: str, session: WikiSession | None = None):
+    await create_page(name, text, summary, session=session)
+
+
+async def read_page(name: str, session: WikiSession | None = None) -> str | None:
+    return (session or get_session()).fetch(name)
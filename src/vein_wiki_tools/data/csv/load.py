@@ -1,8 +1,93 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+from itertools import batched
+
 import aiofiles
-from aiocsv import AsyncDictReader
+from aiocsv import AsyncReader
+from pydantic import TypeAdapter
 
-from vein_wiki_tools.data.csv.models import CsvItem
+from vein_wiki_tools.data.csv.models import NONE_STRINGS, PARAGRAPH_BREAK, CsvItem
 from vein_wiki_tools.models.items import DismantleResult, Item, RepairIngredient
+from vein_wiki_tools.utils.metrology import imperial_to_metric
+
+# Indexed column groups of the sheet, RepairIngredient1_Name to RepairIngredient4_Qty and so on
+REPAIR_INGREDIENT_GROUPS = 4
+DISMANTLE_RESULT_GROUPS = 36
+# Rows validated at once
+CSV_BATCH_SIZE = 256
+
+_items = TypeAdapter(list[Item])
+
+
+@dataclass(frozen=True)
+class CsvLayout:
+    """
+    The columns of a sheet export, resolved once from its header.
+
+    Rows are turned into the data of an ``Item`` by column index, with empty cells looked up
+    in ``NONE_STRINGS``, and only for the columns an item is made of.
+    """
+
+    fields: tuple[tuple[str, int], ...]  # CsvItem field, column
+    repair_ingredients: tuple[tuple[int, int], ...]  # name, quantity columns
+    dismantle_results: tuple[tuple[int, int, int], ...]  # name, min quantity, max quantity columns
+    width: int
+
+    @classmethod
+    def from_header(cls, header: list[str]) -> "CsvLayout":
+        columns = {name: i for i, name in enumerate(header)}
+        fields = tuple((name, columns[field.alias]) for name, field in CsvItem.model_fields.items() if field.alias in columns)
+        repair_ingredients = tuple(
+            (columns[name], columns[qty])
+            for i in range(1, REPAIR_INGREDIENT_GROUPS + 1)
+            if (name := f"RepairIngredient{i}_Name") in columns and (qty := f"RepairIngredient{i}_Qty") in columns
+        )
+        dismantle_results = tuple(
+            (columns[name], columns[min_qty], columns[max_qty])
+            for i in range(1, DISMANTLE_RESULT_GROUPS + 1)
+            if (name := f"DismantleResult{i}_Name") in columns
+            and (min_qty := f"DismantleResult{i}_MinQty") in columns
+            and (max_qty := f"DismantleResult{i}_MaxQty") in columns
+        )
+        return cls(fields, repair_ingredients, dismantle_results, len(header))
+
+    def to_item_data(self, row: list[str]) -> dict:
+        """The data of an ``Item`` in a row, as ``to_item`` makes it from the row as a dict"""
+        if len(row) < self.width:
+            row = row + [""] * (self.width - len(row))
+        data = {name: None if (value := row[column]) in NONE_STRINGS else value for name, column in self.fields}
+        weight = data.pop("weight", None)
+        if (description := data.get("description")) is not None:
+            data["description"] = PARAGRAPH_BREAK.sub("<br><br>", description).strip()
+        data["weight_lbs"] = weight
+        data["weight_kg"] = imperial_to_metric(pounds=float(weight)) if weight is not None else None
+        data["stackable"] = data.get("stackable") or False
+        data["repair_ingredients"] = [
+            {"name": name, "quantity": int(qty)}
+            for name_column, qty_column in self.repair_ingredients
+            if (name := row[name_column]) and (qty := row[qty_column])
+        ]
+        data["dismantle_results"] = [
+            {"name": name, "min_quantity": min_qty, "max_quantity": max_qty}
+            for name_column, min_column, max_column in self.dismantle_results
+            if (name := row[name_column]) and (min_qty := row[min_column]) and (max_qty := row[max_column])
+        ]
+        return data
+
+
+def iter_items(rows: Iterable[list[str]], batch_size: int = CSV_BATCH_SIZE) -> Iterator[Item]:
+    """
+    Items of the rows of a sheet export, header first, validated ``batch_size`` rows at a time.
+
+    Validating in batches keeps the row data short-lived, the garbage collector would otherwise
+    walk all of it again and again while the items are built.
+    """
+    rows = iter(rows)
+    layout = CsvLayout.from_header(next(rows, []))
+    for batch in batched((layout.to_item_data(row) for row in rows if row), batch_size):
+        yield from _items.validate_python(batch)
 
 
 async def csv_read(
@@ -10,12 +95,35 @@ async def csv_read(
     delimiter: str = ",",
     quotechar: str = '"',
 ) -> list[Item]:
-    item_list: list[Item] = []
     async with aiofiles.open(filepath, mode="r", encoding="utf-8", newline="") as afp:
-        async for row in AsyncDictReader(afp, delimiter=delimiter, quotechar=quotechar):
-            item = to_item(row)  # type: ignore
-            item_list.append(item)
-    return item_list
+        content = await afp.read()
+    return list(iter_items(csv.reader(io.StringIO(content, newline=""), delimiter=delimiter, quotechar=quotechar)))
+
+
+async def csv_iter(
+    filepath: str,
+    delimiter: str = ",",
+    quotechar: str = '"',
+    batch_size: int = CSV_BATCH_SIZE,
+) -> AsyncIterator[Item]:
+    """
+    Items of a sheet export as they are read, ``batch_size`` rows at a time,
+    without holding all the rows or items of the sheet
+    """
+    async with aiofiles.open(filepath, mode="r", encoding="utf-8", newline="") as afp:
+        layout: CsvLayout | None = None
+        batch: list[dict] = []
+        async for row in AsyncReader(afp, delimiter=delimiter, quotechar=quotechar):
+            if layout is None:
+                layout = CsvLayout.from_header(row)
+            elif row:
+                batch.append(layout.to_item_data(row))
+            if len(batch) >= batch_size:
+                for item in _items.validate_python(batch):
+                    yield item
+                batch = []
+        for item in _items.validate_python(batch):
+            yield item
 
 
 def to_item(csv_item: dict) -> Item:
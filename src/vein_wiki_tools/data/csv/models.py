@@ -7,6 +7,9 @@ from vein_wiki_tools.base import RootSchema
 from vein_wiki_tools.models.items import Item
 from vein_wiki_tools.utils.metrology import imperial_to_metric
 
+# Runs of whitespace in a description of the sheet are paragraph breaks
+PARAGRAPH_BREAK = re.compile(r"\s{2,}")
+
 
 class CsvItem(RootSchema):
     filename: str = Field(..., alias="FileName")
@@ -40,7 +43,7 @@ class CsvItem(RootSchema):
         return Item(
             filename=self.filename,
             name=self.name,
-            description=re.sub(r"\s{2,}", "<br><br>", self.description).strip(),
+            description=PARAGRAPH_BREAK.sub("<br><br>", self.description).strip(),
             category=self.category,
             weight_lbs=self.weight,
             weight_kg=imperial_to_metric(pounds=self.weight),
@@ -57,7 +60,11 @@ class CsvItem(RootSchema):
         )
 
 
+# Cells of the sheet that mean there is no value
+NONE_STRINGS = frozenset({"", "0", "null", "undefined", "None", "NaN", "[]", "{}", "()", "''", '""', "N/A", r"N\/A"})
+
+
 def strings_equal_to_none(v: Any) -> Any:
-    if v == "" or v == "0" or v == "null" or v == "undefined" or v == "None" or v == "NaN" or v == "[]" or v == "{}" or v == "()" or v == "''" or v == '""' or v == "N/A" or v == r"N\/A":
+    if isinstance(v, str) and v in NONE_STRINGS:
         return None
     return v
@@ -1,16 +1,35 @@
 from __future__ import annotations
 
 import logging
+import pickle
+import struct
+import zlib
+from collections import deque
 from collections.abc import Iterator
 from dataclasses import dataclass, field
-from typing import Generic, TypeVar, cast
+from enum import Enum, auto
+from pathlib import Path
+from typing import Any, Generic, TypeVar, cast
 
+from vein_wiki_tools.clients.pakdump.cache import get_schema_fingerprint
 from vein_wiki_tools.clients.pakdump.models import N, UEModel
 from vein_wiki_tools.errors import VeinError
 from vein_wiki_tools.models.common import Link, LinkType
 
 logger = logging.getLogger(__name__)
 
+# Bump when the layout of the snapshot changes
+GRAPH_SNAPSHOT_VERSION = 2
+GRAPH_SNAPSHOT_MAGIC = b"VEINGRPH"
+# magic, version, schema fingerprint of the pickled models
+GRAPH_SNAPSHOT_HEADER = struct.Struct("<8sH32s")
+
+
+class TraversalOrder(Enum):
+    BFS = auto()
+    DFS = auto()
+    TOPOLOGICAL = auto()
+
 
 @dataclass(slots=True)
 class Graph:
@@ -23,10 +42,12 @@ class Graph:
 
     aliases: dict[str, str] = field(default_factory=dict)
 
+    index: GraphIndex = field(default_factory=lambda: GraphIndex(), init=False, repr=False)
+
     def walk(
         self,
         start_node: Node[N] | None = None,
-        allowed_link_types: set[LinkType] = set(),
+        allowed_link_types: set[LinkType] | None = None,
     ) -> Iterator[Node]:
         """
         Walk the graph in a Breadth First Search (BFS).
@@ -40,22 +61,47 @@ class Graph:
         Yield:
             ``Node[N]`` is a Node object with unknown N type
         """
+        for _, _, node in self.traverse(start_node=start_node, allowed_link_types=allowed_link_types):
+            yield node
+
+    def traverse(
+        self,
+        start_node: Node[N] | None = None,
+        allowed_link_types: set[LinkType] | None = None,
+        order: TraversalOrder = TraversalOrder.BFS,
+        reverse: bool = False,
+        max_depth: int | None = None,
+    ) -> Iterator[tuple[int, LinkType | None, Node]]:
+        """
+        Traverse the graph from start_node, visiting every reachable node once.
+
+        Args:
+            start_node (Node[N]): a Node object. ``Default = root node``
+            allowed_link_types (set[LinkType]): link types to follow. ``Default = all``
+            order (TraversalOrder): BFS, DFS (pre-order) or TOPOLOGICAL, where a node
+                always comes before the nodes it links to. ``Default = BFS``
+            reverse (bool): follow incoming links (neighbours) instead of edges
+            max_depth (int | None): don't follow links further than this from start_node
+
+        Yield:
+            ``(depth, link_type, node)`` where link_type is the link the node was first
+            reached through, None for start_node
+        """
         if start_node is None:
             if self.root_node is None:
                 raise ValueError("Graph has no root node and no start node was supplied")
             start_node = self.root_node
-        if len(allowed_link_types) == 0:
+        if not allowed_link_types:
             allowed_link_types = set(LinkType)
-        node_stack: list[Node] = [start_node]
-        visited: list[str] = []
-        current: Node[UEModel]
-        while len(node_stack):
-            current = node_stack.pop(0)
-            yield current
-            visited.append(current.id)
-            for link_type, node in current.edges:
-                if link_type in allowed_link_types and node.id not in visited:
-                    node_stack.append(node)
+
+        if order == TraversalOrder.BFS:
+            yield from _bfs(start_node, allowed_link_types, reverse, max_depth)
+        elif order == TraversalOrder.DFS:
+            yield from _dfs(start_node, allowed_link_types, reverse, max_depth)
+        elif order == TraversalOrder.TOPOLOGICAL:
+            yield from _topological(start_node, allowed_link_types, reverse, max_depth)
+        else:
+            raise ValueError(f"Unknown traversal order: {order}")
 
     def upsert(self, ue_model: N, update: bool = False) -> Node[N]:
         if not ue_model.get_object_name():
@@ -65,6 +111,7 @@ class Graph:
         if ue_model.get_object_name() not in self.nodes:
             node = Node(ue_model=ue_model)
             self.nodes[ue_model.get_object_name()] = node
+            self.index.add(node)
             return node
 
         # Update UEModel in existing Node
@@ -81,7 +128,9 @@ class Graph:
                 node.ue_model,
                 ue_model,
             )
+        self.index.remove(node)
         node.ue_model = ue_model
+        self.index.add(node)
         return node
 
     def update(self, ue_models: list[UEModel]):
@@ -95,7 +144,10 @@ class Graph:
                 node.ue_model.get_object_name(),
             )
 
+        if (existing := self.nodes.get(node.ue_model.get_object_name())) is not None:
+            self.index.remove(existing)
         self.nodes[node.ue_model.get_object_name()] = node
+        self.index.add(node)
         for _, neighbour in node.edges:
             self.add_node(neighbour)
 
@@ -138,12 +190,18 @@ class Graph:
         self.deleted_nodes[node.ue_model.get_object_name()] = node
         # Delete links up from this node (neighbours)
         for link_type, edge_node in node.edges:
-            edge_node.neighbours.remove((link_type, node))
+            node.remove_edge(link_type, edge_node)
         # Delete links down from this node (edges)
         for link_type, neighbour_node in node.neighbours:
-            neighbour_node.edges.remove((link_type, node))
+            neighbour_node.remove_edge(link_type, node)
+        self.index.discard(node)
         del self.nodes[node.ue_model.get_object_name()]
 
+    def get_templated_nodes(self) -> list[Node]:
+        """All nodes with a ``model_info.template``, i.e. the nodes that get a wiki page, in the order they were added"""
+        nodes = [node for bucket in self.index.by_template.values() for node in bucket.values()]
+        return sorted(nodes, key=lambda node: self.index.sequence[node.id])
+
     def save(self) -> list:
         ue_models = list()
         for n in self.nodes.values():
@@ -159,11 +217,204 @@ class Graph:
             links.append(link)
         return links
 
+    def dump(self, path: Path) -> None:
+        """
+        Write the graph to a snapshot at ``path``, which ``Graph.load`` turns back into the same graph.
+
+        Nodes are numbered in insertion order and links are stored as those numbers, in the order
+        they were added on both ends. The secondary indexes are derived from the models, and are
+        rebuilt on load rather than stored.
+        """
+        ids = {node_id: i for i, node_id in enumerate(self.nodes)}
+        nodes = list(self.nodes.values())
+        snapshot = {
+            "models": [node.ue_model for node in nodes],
+            "modified": [node.modified for node in nodes],
+            "topological_order": [node.topological_order for node in nodes],
+            "edges": [[(link_type.value, ids[n.id]) for link_type, n in node.links()] for node in nodes],
+            "neighbours": [[(link_type.value, ids[n.id]) for link_type, n in node.links(reverse=True)] for node in nodes],
+            "root_node": ids[self.root_node.id] if self.root_node is not None else None,
+            "aliases": self.aliases,
+            "links": self.links,
+        }
+        payload = zlib.compress(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = GRAPH_SNAPSHOT_HEADER.pack(GRAPH_SNAPSHOT_MAGIC, GRAPH_SNAPSHOT_VERSION, get_schema_fingerprint().encode())
+        path.write_bytes(header + payload)
+        logger.info("Dumped graph snapshot [path=%s, nodes=%s, bytes=%s]", path, len(nodes), GRAPH_SNAPSHOT_HEADER.size + len(payload))
+
+    @classmethod
+    def load(cls, path: Path) -> Graph:
+        """
+        Read a graph snapshot written by ``Graph.dump``.
+
+        Snapshots taken before a change to the UEModel schemas are rejected, as they would unpickle stale models.
+        """
+        content = path.read_bytes()
+        try:
+            magic, version, fingerprint = GRAPH_SNAPSHOT_HEADER.unpack_from(content)
+        except struct.error:
+            raise VeinError("Not a graph snapshot [path=%s]", path) from None
+        if magic != GRAPH_SNAPSHOT_MAGIC:
+            raise VeinError("Not a graph snapshot [path=%s]", path)
+        if version != GRAPH_SNAPSHOT_VERSION:
+            raise VeinError("Unsupported graph snapshot version [path=%s, version=%s, expected=%s]", path, version, GRAPH_SNAPSHOT_VERSION)
+        if fingerprint.decode() != get_schema_fingerprint():
+            raise VeinError("Graph snapshot was taken with other model schemas [path=%s]", path)
+        snapshot = pickle.loads(zlib.decompress(content[GRAPH_SNAPSHOT_HEADER.size :]))
+
+        graph = cls(aliases=snapshot["aliases"], links=snapshot["links"])
+        nodes: list[Node] = []
+        for ue_model, modified, topological_order in zip(
+            snapshot["models"], snapshot["modified"], snapshot["topological_order"], strict=True
+        ):
+            node = Node(ue_model=ue_model, topological_order=topological_order)
+            node.modified = modified
+            graph.nodes[node.id] = node
+            graph.index.add(node)
+            nodes.append(node)
+        for node, edges, neighbours in zip(nodes, snapshot["edges"], snapshot["neighbours"], strict=True):
+            for link_type, i in edges:
+                node._restore_link(node._edges, node._edges_by_type, LinkType(link_type), nodes[i])
+            for link_type, i in neighbours:
+                node._restore_link(node._neighbours, node._neighbours_by_type, LinkType(link_type), nodes[i])
+        if snapshot["root_node"] is not None:
+            graph.root_node = nodes[snapshot["root_node"]]
+        logger.info("Loaded graph snapshot [path=%s, nodes=%s]", path, len(nodes))
+        return graph
+
     # We declare our own repr because in sufficiently large graphs, the default repr is way too slow
     def __repr__(self) -> str:
         return f"Graph(nodes={len(self.nodes)}, links={len(self.links)})"
 
 
+def _links(node: Node, allowed_link_types: set[LinkType], reverse: bool) -> Iterator[tuple[LinkType, Node]]:
+    for link_type, linked in node.links(reverse=reverse):
+        if link_type in allowed_link_types:
+            yield link_type, linked
+
+
+def _bfs(
+    start_node: Node,
+    allowed_link_types: set[LinkType],
+    reverse: bool,
+    max_depth: int | None,
+) -> Iterator[tuple[int, LinkType | None, Node]]:
+    queue: deque[tuple[int, LinkType | None, Node]] = deque([(0, None, start_node)])
+    visited: set[str] = {start_node.id}
+    while queue:
+        depth, via, current = queue.popleft()
+        yield depth, via, current
+        if max_depth is not None and depth >= max_depth:
+            continue
+        for link_type, node in _links(current, allowed_link_types, reverse):
+            if node.id not in visited:
+                visited.add(node.id)
+                queue.append((depth + 1, link_type, node))
+
+
+def _dfs(
+    start_node: Node,
+    allowed_link_types: set[LinkType],
+    reverse: bool,
+    max_depth: int | None,
+) -> Iterator[tuple[int, LinkType | None, Node]]:
+    stack: list[tuple[int, LinkType | None, Node]] = [(0, None, start_node)]
+    visited: set[str] = set()
+    while stack:
+        depth, via, current = stack.pop()
+        if current.id in visited:
+            continue
+        visited.add(current.id)
+        yield depth, via, current
+        if max_depth is not None and depth >= max_depth:
+            continue
+        # Reversed, so links are visited in the order they were added
+        children = [
+            (depth + 1, link_type, node) for link_type, node in _links(current, allowed_link_types, reverse) if node.id not in visited
+        ]
+        stack.extend(reversed(children))
+
+
+def _topological(
+    start_node: Node,
+    allowed_link_types: set[LinkType],
+    reverse: bool,
+    max_depth: int | None,
+) -> Iterator[tuple[int, LinkType | None, Node]]:
+    # Kahn's algorithm over the part of the graph reachable from start_node
+    reached = {node.id: (depth, via, node) for depth, via, node in _bfs(start_node, allowed_link_types, reverse, max_depth)}
+    in_degree: dict[str, int] = dict.fromkeys(reached, 0)
+    for _, _, node in reached.values():
+        for _, linked in _links(node, allowed_link_types, reverse):
+            if linked.id in in_degree:
+                in_degree[linked.id] += 1
+
+    queue: deque[str] = deque(node_id for node_id, degree in in_degree.items() if degree == 0)
+    yielded = 0
+    while queue:
+        node_id = queue.popleft()
+        depth, via, node = reached[node_id]
+        yield depth, via, node
+        yielded += 1
+        for _, linked in _links(node, allowed_link_types, reverse):
+            if linked.id in in_degree:
+                in_degree[linked.id] -= 1
+                if in_degree[linked.id] == 0:
+                    queue.append(linked.id)
+    if yielded != len(reached):
+        raise VeinError("Graph has a cycle, no topological order [start_node=%s]", start_node.id)
+
+
+@dataclass(slots=True)
+class GraphIndex:
+    """
+    Secondary indexes on the nodes of a Graph, maintained by ``Graph.upsert``,
+    ``Graph.update`` and ``Graph.delete_node``. Buckets are keyed by node id,
+    so filtered iteration only touches the nodes of the matching bucket.
+
+    Nodes by item type are not kept here, those are the ``HAS_ITEM_TYPE``
+    neighbours of the item type node.
+    """
+
+    by_class: dict[type, dict[str, Node]] = field(default_factory=dict)
+    by_super_type: dict[str, dict[str, Node]] = field(default_factory=dict)
+    by_sub_type: dict[str, dict[str, Node]] = field(default_factory=dict)
+    by_template: dict[str, dict[str, Node]] = field(default_factory=dict)
+    # The keys each node was indexed under, so it can be removed after its model changed
+    keys: dict[str, tuple[type, str | None, str | None, str | None]] = field(default_factory=dict)
+    # When each node was first added, to give the nodes of several buckets in graph order
+    sequence: dict[str, int] = field(default_factory=dict)
+    next_sequence: int = 0
+
+    def add(self, node: Node) -> None:
+        model_info = node.ue_model.model_info
+        keys = (type(node.ue_model), model_info.super_type, model_info.sub_type, model_info.template)
+        self.keys[node.id] = keys
+        if node.id not in self.sequence:
+            self.sequence[node.id] = self.next_sequence
+            self.next_sequence += 1
+        for index, key in zip(self._indexes(), keys):
+            if key is not None:
+                index.setdefault(key, {})[node.id] = node
+
+    def remove(self, node: Node) -> None:
+        keys = self.keys.pop(node.id, None)
+        if keys is None:
+            return
+        for index, key in zip(self._indexes(), keys):
+            if key is not None:
+                _discard(index, key, node.id)
+
+    def discard(self, node: Node) -> None:
+        """Remove a node deleted from the graph, which is a new node if it is ever added again"""
+        self.remove(node)
+        self.sequence.pop(node.id, None)
+
+    def _indexes(self) -> tuple[dict, ...]:
+        return self.by_class, self.by_super_type, self.by_sub_type, self.by_template
+
+
 T = TypeVar("T", bound=UEModel)
 
 
@@ -172,9 +423,12 @@ class Node(Generic[T]):
     id: str
     _ue_model: T
     # Neighbours is just for backwards references
-    neighbours: list[tuple[LinkType, Node]]
+    _neighbours: dict[tuple[LinkType, str], Node]
     # Edges are actual links (relationships) we want to add to the db
-    edges: list[tuple[LinkType, Node]]
+    _edges: dict[tuple[LinkType, str], Node]
+    # The same links, indexed by link type for constant time relation lookups
+    _neighbours_by_type: dict[LinkType, dict[str, Node]]
+    _edges_by_type: dict[LinkType, dict[str, Node]]
     modified: bool
     topological_order: int
 
@@ -183,8 +437,10 @@ class Node(Generic[T]):
             raise TypeError("UEModel must be of type UEModel")
         self.id = ue_model.get_object_name()
         self._ue_model = ue_model
-        self.neighbours = list()
-        self.edges = list()
+        self._neighbours = dict()
+        self._edges = dict()
+        self._neighbours_by_type = dict()
+        self._edges_by_type = dict()
         self.modified = True
         self.topological_order = topological_order
 
@@ -197,16 +453,60 @@ class Node(Generic[T]):
         self._ue_model = ue_model
         self.modified = True
 
+    @property
+    def edges(self) -> list[tuple[LinkType, Node]]:
+        """Outgoing links, in the order they were added"""
+        return [(link_type, node) for (link_type, _), node in self._edges.items()]
+
+    @property
+    def neighbours(self) -> list[tuple[LinkType, Node]]:
+        """Incoming links, in the order they were added"""
+        return [(link_type, node) for (link_type, _), node in self._neighbours.items()]
+
+    def get_edges(self, link_type: LinkType) -> list[Node]:
+        """All nodes linked ``self``-[:``link_type``]->``node``"""
+        return list(self._edges_by_type.get(link_type, {}).values())
+
+    def get_neighbours(self, link_type: LinkType) -> list[Node]:
+        """All nodes linked ``node``-[:``link_type``]->``self``"""
+        return list(self._neighbours_by_type.get(link_type, {}).values())
+
+    def has_edge(self, link_type: LinkType, node: Node[N]) -> bool:
+        return (link_type, node.id) in self._edges
+
+    def links(self, reverse: bool = False) -> Iterator[tuple[LinkType, Node]]:
+        """Iterate outgoing links (or incoming links when ``reverse``) without building the list view"""
+        for (link_type, _), node in (self._neighbours if reverse else self._edges).items():
+            yield link_type, node
+
     def add_edge(self, link_type: LinkType, node: Node[N]) -> None:
         """
-        Add link ``self``-[:``link_type``]->``node``
+        Add link ``self``-[:``link_type``]->``node``. Adding the same link twice is a no-op.
         """
-        self.edges.append((link_type, node))
-        node.neighbours.append((link_type, self))
+        self._edges[(link_type, node.id)] = node
+        self._edges_by_type.setdefault(link_type, {})[node.id] = node
+        node._neighbours[(link_type, self.id)] = self
+        node._neighbours_by_type.setdefault(link_type, {})[self.id] = self
 
     def remove_edge(self, link_type: LinkType, node: Node[N]) -> None:
-        self.edges.remove((link_type, node))
-        node.neighbours.remove((link_type, self))
+        try:
+            del self._edges[(link_type, node.id)]
+            del node._neighbours[(link_type, self.id)]
+        except KeyError:
+            raise ValueError(f"Node {self.id} has no {link_type} edge to {node.id}") from None
+        _discard(self._edges_by_type, link_type, node.id)
+        _discard(node._neighbours_by_type, link_type, self.id)
+
+    @staticmethod
+    def _restore_link(
+        links: dict[tuple[LinkType, str], Node],
+        links_by_type: dict[LinkType, dict[str, Node]],
+        link_type: LinkType,
+        node: Node,
+    ) -> None:
+        # One side of a link, used when loading a snapshot to keep the original order on both ends
+        links[(link_type, node.id)] = node
+        links_by_type.setdefault(link_type, {})[node.id] = node
 
     def save(self) -> T | None:
         if self.modified:
@@ -221,4 +521,11 @@ class Node(Generic[T]):
 
     # We declare our own repr because in sufficiently large graphs, the default repr is way too slow
     def __repr__(self) -> str:
-        return f"Node(ue_model.type={type(self.ue_model)}, edges={len(self.edges)})"
+        return f"Node(ue_model.type={type(self.ue_model)}, edges={len(self._edges)})"
+
+
+def _discard(index: dict[Any, dict[str, Node]], key: Any, node_id: str) -> None:
+    bucket = index[key]
+    del bucket[node_id]
+    if not bucket:
+        del index[key]
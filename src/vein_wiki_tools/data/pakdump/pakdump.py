@@ -1,11 +1,13 @@
 import logging
 import re
-from dataclasses import dataclass
+from collections.abc import Iterator
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Generator
 
 import tqdm
 
+from vein_wiki_tools.clients.pakdump.cache import ModelCacheStats, get_model_cache, set_model_cache
 from vein_wiki_tools.clients.pakdump.consumables import UEFluidDefinition
 from vein_wiki_tools.clients.pakdump.firearms import UEBulletType
 from vein_wiki_tools.clients.pakdump.models import (
@@ -15,9 +17,10 @@ from vein_wiki_tools.clients.pakdump.models import (
 )
 from vein_wiki_tools.clients.pakdump.services import get_ue_model_by_path
 from vein_wiki_tools.clients.pakdump.tools import UETool
-from vein_wiki_tools.data.models import Graph
+from vein_wiki_tools.data.models import Graph, Node
 from vein_wiki_tools.models.common import LinkType
 from vein_wiki_tools.utils.file_helper import get_vein_root
+from vein_wiki_tools.utils.processes import get_process_pool
 
 logger = logging.getLogger(__name__)
 
@@ -40,9 +43,26 @@ DRINKS_PANTRY_ROOT = DRINKS_ROOT / "Pantry"
 MEDICAL_ROOT = ITEMS_ROOT / "Medical"
 
 
+@dataclass
+class PendingLink:
+    """A link ``node``-[:``link_type``]->``key`` waiting for all nodes to be loaded"""
+
+    node: Node
+    link_type: LinkType
+    key: str
+    ue_model_type: type[UEModel]
+
+
 @dataclass
 class PakdumpData:
     graph: Graph
+    # Number of processes used to read and validate pakdump files, 1 imports serially
+    workers: int = 1
+    # Number of files handed to a worker at a time
+    chunk_size: int = 32
+    # Links queued while loading nodes, resolved in one pass by resolve_links
+    pending_links: list[PendingLink] = field(default_factory=list)
+    unresolved_links: list[PendingLink] = field(default_factory=list)
 
 
 async def pakdump_graph(data: PakdumpData | None = None) -> Graph:
@@ -107,7 +127,7 @@ async def import_fluids(data: PakdumpData) -> None:
     for fluid_file in FLUIDS_ROOT.glob("FL_*.json"):
         logger.debug("Importing fluid from %s", fluid_file)
         ue_model = get_ue_model_by_path(path=fluid_file)
-        ue_model.model_info.console_name = fluid_file.stem
+        ue_model.set_console_name(fluid_file.stem)
         data.graph.upsert(ue_model, update=True)
 
 
@@ -118,7 +138,7 @@ async def import_ammo(data: PakdumpData) -> None:
         if not isinstance(ue_model, UEBlueprintGeneratedClass):
             logger.warning(f"Expected BGC, found {type(ue_model)} when scanning ammo: {ammo_file}")
             continue
-        ue_model.model_info.console_name = ammo_file.stem
+        ue_model.set_console_name(ammo_file.stem)
         ammo_node = data.graph.upsert(ue_model)
         if itemtype_node := data.graph.get_node(
             key=ue_model.get_type_object_name(),
@@ -140,7 +160,7 @@ async def import_magazines(data: PakdumpData) -> None:
         if not isinstance(ue_model, UEBlueprintGeneratedClass):
             logger.warning(f"Expected BGC, found {type(ue_model)} when scanning magazine: {magazine_file}")
             continue
-        ue_model.model_info.console_name = magazine_file.stem
+        ue_model.set_console_name(magazine_file.stem)
         magazine_node = data.graph.upsert(ue_model)
         if itemtype_node := data.graph.get_node(
             key=ue_model.get_type_object_name(),
@@ -162,7 +182,7 @@ async def import_firearms(data: PakdumpData) -> None:
         if not isinstance(ue_model, UEBlueprintGeneratedClass):
             logger.warning(f"Expected BGC, found {type(ue_model)} when scanning weapon: {weapon_file}")
             continue
-        ue_model.model_info.console_name = weapon_file.stem
+        ue_model.set_console_name(weapon_file.stem)
         weapon_node = data.graph.upsert(ue_model)
         if itemtype_node := data.graph.get_node(
             key=ue_model.get_type_object_name(),
@@ -203,7 +223,7 @@ async def import_fluid_container_category(
         if not isinstance(ue_model, UEBlueprintGeneratedClass):
             logger.warning(f"Expected BGC, found {type(ue_model)} when scanning fluid containers: {file}")
             continue
-        ue_model.model_info.console_name = file.stem
+        ue_model.set_console_name(file.stem)
         fluid_container_node = data.graph.upsert(ue_model)
         if itemtype_node := data.graph.get_node(
             key=ue_model.get_type_object_name(),
@@ -298,77 +318,140 @@ def get_folder(path: Path, subfolders: tuple) -> Generator[Path]:
 async def import_all(data: PakdumpData) -> None:
     logger.info("Starting import all")
     all_folders = list(get_folder(VEIN_PAK_DUMP_ROOT, folders))
-    for folder in tqdm.tqdm(all_folders, desc="Importing folders.."):
-        await import_folder(data=data, path=folder)
-
-
-async def import_folder(data: PakdumpData, path: Path) -> None:
+    if data.workers > 1:
+        files = [file for folder in all_folders for file in get_folder_files(folder)]
+        await import_files(data=data, files=files, resolve=False)
+        logger.info(f"Imported {len(files)} files from {len(all_folders)} folders using {data.workers} workers")
+    else:
+        for folder in tqdm.tqdm(all_folders, desc="Importing folders.."):
+            await import_folder(data=data, path=folder, resolve=False)
+    resolve_links(data)
+
+
+async def import_folder(data: PakdumpData, path: Path, resolve: bool = True) -> None:
+    files = get_folder_files(path)
+    await import_files(data=data, files=files, resolve=resolve)
+    logger.info(f"Imported {len(files)} files from {path}")
+
+
+def get_folder_files(path: Path) -> list[Path]:
+    return [file for file in sorted(path.glob("*.json")) if is_importable(file)]
+
+
+def is_importable(file: Path) -> bool:
+    # skip these conditions
+    if re.match(r"Meshes|OLD", file.parent.name):
+        return False
+    if re.match(r"(NS|HDP|SM)_.*", file.stem):
+        return False
+    if re.match(r".*/BuildObjects/.*BP_.*", str(file)):
+        return False
+    if file.stem.startswith("T_Thumb"):
+        return False
+    return True
+
+
+def load_ue_models(files: list[Path], workers: int = 1, chunk_size: int = 32) -> Iterator[UEModel]:
+    """
+    Read and validate pakdump files, yielding the models in the same order as ``files``.
+
+    With more than one worker, JSON decoding and validation are spread over a process pool.
+    The workers use the model cache of this process, and their cache stats are added to it.
+    """
+    if workers <= 1 or len(files) <= chunk_size:
+        yield from map(get_ue_model_by_path, files)
+        return
+    model_cache = get_model_cache()
+    with get_process_pool(workers, initializer=set_model_cache, initargs=(model_cache,)) as executor:
+        results = executor.map(_load_ue_model, files, chunksize=chunk_size)
+        for ue_model, stats in tqdm.tqdm(results, total=len(files), desc="Importing files.."):
+            if model_cache is not None and stats is not None:
+                model_cache.stats.add(stats)
+            yield ue_model
+
+
+def _load_ue_model(file: Path) -> tuple[UEModel, ModelCacheStats | None]:
+    """Load a file in a worker, along with what it cost the model cache of the worker"""
+    model_cache = get_model_cache()
+    if model_cache is None:
+        return get_ue_model_by_path(file), None
+    model_cache.stats = ModelCacheStats()
+    return get_ue_model_by_path(file), model_cache.stats
+
+
+async def import_files(data: PakdumpData, files: list[Path], resolve: bool = True) -> None:
+    """
+    Load ``files`` and add them to the graph. Upserting always happens in file order.
+
+    Links between nodes are queued on ``data`` and, unless ``resolve`` is False, resolved
+    once all files are loaded, so they don't depend on the order the files are imported in.
+    When importing several batches, pass ``resolve=False`` and call ``resolve_links`` once at the end.
+    """
     if not (root_node := data.graph.root_node):
         raise ValueError("Graph has no root node")
 
-    num_files_in_folder = 0
-    for file in path.glob("*.json"):
-        # skip these conditions
-        if re.match(r"Meshes|OLD", file.parent.name):
-            continue
-        if re.match(r"(NS|HDP|SM)_.*", file.stem):
-            continue
-        if re.match(r".*/BuildObjects/.*BP_.*", str(file)):
-            continue
-        if file.stem.startswith("T_Thumb"):
-            continue
-
-        # logger.debug(f"Processing {file}")
-        ue_model = get_ue_model_by_path(file)
-        ue_model.model_info.console_name = file.stem
+    ue_models = load_ue_models(files, workers=data.workers, chunk_size=data.chunk_size)
+    for file, ue_model in zip(files, ue_models, strict=True):
+        ue_model.set_console_name(file.stem)
         node = data.graph.upsert(ue_model)
 
-        num_files_in_folder += 1
-
         # Item types
         if ue_model.type == "ItemType":
             root_node.add_edge(LinkType.HAS_ITEM_TYPE, node)
 
-        if itemtype_node := data.graph.get_node(
-            key=ue_model.get_type_object_name(),
-            ue_model_type=UEItemType,
-        ):
-            node.add_edge(LinkType.HAS_ITEM_TYPE, itemtype_node)
+        queue_links(data, node)
 
-        # Other connections
+    if resolve:
+        resolve_links(data)
 
-        # Link fluid containers spawning contents to the fluid
-        if fluid_type := ue_model.get_prop("fluid_type"):
-            if fluid_node := data.graph.get_node(
-                key=fluid_type.object_name,
-                ue_model_type=UEFluidDefinition,
-            ):
-                node.add_edge(LinkType.HAS_FLUID, fluid_node)
-        # The type of magazine for a firearm
-        if magazine_items := ue_model.get_prop("magazine_items"):
-            for magazine in magazine_items:
-                if fluid_node := data.graph.get_node(
-                    key=magazine.object_name,
-                    ue_model_type=UEBlueprintGeneratedClass,
-                ):
-                    node.add_edge(LinkType.HAS_MAGAZINE, fluid_node)
-        # The type of ammo for a magazine
-        if ue_model.model_info.sub_type == "magazine":
-            if bullet_type := ue_model.get_prop("bullet_type"):
-                if bullet_node := data.graph.get_node(
-                    key=bullet_type.object_name,
-                    ue_model_type=UEBlueprintGeneratedClass,
-                ):
-                    if isinstance(bullet_node.ue_model, UEBlueprintGeneratedClass):
-                        node.add_edge(LinkType.HAS_AMMO, bullet_node)
-        # The bullet type for ammo
-        if ue_model.model_info.sub_type == "bullet":
-            if bullet_type := ue_model.get_prop("bullet_type"):
-                if bullet_node := data.graph.get_node(
-                    key=bullet_type.object_name,
-                    ue_model_type=UEBulletType,
-                ):
-                    if isinstance(bullet_node.ue_model, UEBulletType):
-                        node.add_edge(LinkType.HAS_BULLET_TYPE, bullet_node)
 
-    logger.info(f"Imported {num_files_in_folder} files from {path}")
+def queue_links(data: PakdumpData, node: Node) -> None:
+    """Queue every link of ``node`` to another model, to be resolved by ``resolve_links``"""
+    ue_model = node.ue_model
+
+    def queue(link_type: LinkType, key: str | None, ue_model_type: type[UEModel]) -> None:
+        if key:
+            data.pending_links.append(PendingLink(node=node, link_type=link_type, key=key, ue_model_type=ue_model_type))
+
+    queue(LinkType.HAS_ITEM_TYPE, ue_model.get_type_object_name(), UEItemType)
+
+    # Link fluid containers spawning contents to the fluid
+    if fluid_type := ue_model.get_prop("fluid_type"):
+        queue(LinkType.HAS_FLUID, fluid_type.object_name, UEFluidDefinition)
+    # The type of magazine for a firearm
+    if magazine_items := ue_model.get_prop("magazine_items"):
+        for magazine in magazine_items:
+            queue(LinkType.HAS_MAGAZINE, magazine.object_name, UEBlueprintGeneratedClass)
+    # The type of ammo for a magazine
+    if ue_model.model_info.sub_type == "magazine":
+        if bullet_type := ue_model.get_prop("bullet_type"):
+            queue(LinkType.HAS_AMMO, bullet_type.object_name, UEBlueprintGeneratedClass)
+    # The bullet type for ammo
+    if ue_model.model_info.sub_type == "bullet":
+        if bullet_type := ue_model.get_prop("bullet_type"):
+            queue(LinkType.HAS_BULLET_TYPE, bullet_type.object_name, UEBulletType)
+
+
+def resolve_links(data: PakdumpData) -> list[PendingLink]:
+    """
+    Resolve all pending links in a single pass over the node names of the graph.
+
+    Return:
+        the links that could not be resolved, which are also kept in ``data.unresolved_links``
+    """
+    pending, data.pending_links = data.pending_links, []
+    unresolved: list[PendingLink] = []
+    for link in pending:
+        if target := data.graph.get_node(key=link.key, ue_model_type=link.ue_model_type):
+            link.node.add_edge(link.link_type, target)
+        else:
+            unresolved.append(link)
+    data.unresolved_links.extend(unresolved)
+    logger.info("Resolved %s of %s links", len(pending) - len(unresolved), len(pending))
+    if unresolved:
+        logger.warning(
+            "Unresolved links [count=%s]:\n%s",
+            len(unresolved),
+            "\n".join(sorted(f"{link.node.id} -[{link.link_type}]-> {link.key}" for link in unresolved)),
+        )
+    return unresolved
@@ -2,3 +2,6 @@ family = "vein"
 mylang = "en"
 usernames["vein"]["en"] = "your-username-here"
 password_file = "user-password.cfg"
+
+# Uploads are paced by the upload scheduler of write_ue_models.py, instead of by pywikibot
+put_throttle = 0
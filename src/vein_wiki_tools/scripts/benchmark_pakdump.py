@@ -0,0 +1,50 @@
+"""
+Time the hot paths of reading a pakdump, one line per stage.
+
+Point VEIN_PAK_DUMP_ROOT at the pakdump and run from src/vein_wiki_tools.
+"""
+
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from vein_wiki_tools.clients.pakdump import get_subclass_type
+from vein_wiki_tools.clients.pakdump.index import PakdumpIndex
+from vein_wiki_tools.clients.pakdump.services import get_type
+from vein_wiki_tools.utils.file_helper import get_vein_root
+
+ROUNDS = 100
+
+
+def timed(name: str, calls: int, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / calls * 1_000_000 if calls else 0.0
+    print(f"{name:<24} {calls:>10} calls {elapsed * 1000:>10.1f} ms {per_call:>10.3f} µs/call")
+    return elapsed
+
+
+def read_raw_models(files: list[Path]) -> list[list[dict]]:
+    raw_models = []
+    for file in files:
+        content = json.loads(file.read_text())
+        if isinstance(content, list) and content and "Type" in content[0]:
+            raw_models.append(content)
+    return raw_models
+
+
+def main() -> None:
+    root = get_vein_root()
+    timed("index build", 1, lambda: PakdumpIndex.build(root))
+    files = sorted(root.rglob("*.json"))
+    raw_models = read_raw_models(files)
+    known_models = [raw for raw in raw_models if get_subclass_type(raw[0]["Type"]) is not None] * ROUNDS
+    print(f"{len(files)} files, {len(raw_models)} UE models, {len(known_models) // ROUNDS} with a model class")
+
+    timed("type dispatch", len(known_models), lambda: [get_type(raw) for raw in known_models])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Download the current wiki text of the pages the sync pipeline touches into the local mirror, import_files/wiki.
+
+By default the pages of all items in the item sheet are mirrored, stored under the name of their blueprint.
+With --refresh, only the pages of the mirror changed on the wiki since the last sync are downloaded again.
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from vein_wiki_tools.clients.wiki import PRELOAD_BATCH_SIZE, get_session
+from vein_wiki_tools.services.items import get_items
+from vein_wiki_tools.services.mirror import get_mirror_path, mirror_pages, refresh_mirror
+from vein_wiki_tools.services.sync_state import SYNC_STATE_PATH, SyncState
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mirror wiki pages to import_files/wiki")
+    parser.add_argument(
+        "--titles",
+        type=Path,
+        default=None,
+        help="mirror the titles in this file, one per line, instead of the item pages",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="only update the pages changed on the wiki since the last sync, following deletes and moves",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=PRELOAD_BATCH_SIZE,
+        help="titles fetched per API request",
+    )
+    parser.add_argument(
+        "--mirror",
+        type=Path,
+        default=None,
+        help="mirror directory. Default = import_files/wiki",
+    )
+    return parser.parse_args(argv)
+
+
+async def get_item_pages() -> dict[str, str]:
+    items = await get_items()
+    return {item.name: item.filename.removesuffix(".json") for item in items if item.name}
+
+
+def read_titles(path: Path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if title := line.strip():
+                yield title
+
+
+async def main(args: argparse.Namespace):
+    session = get_session()
+    state = SyncState(SYNC_STATE_PATH)
+    root = args.mirror or get_mirror_path()
+    if args.refresh:
+        refresh_mirror(state, root=root, session=session, batch_size=args.batch_size)
+    else:
+        titles = read_titles(args.titles) if args.titles is not None else await get_item_pages()
+        mirror_pages(titles, root=root, session=session, batch_size=args.batch_size, state=state)
+    state.close()
+    session.log_stats()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
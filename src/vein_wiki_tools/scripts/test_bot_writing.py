@@ -11,6 +11,12 @@ import datetime
 
 import pywikibot
 
+from vein_wiki_tools.clients.wiki import WikiSession
+from vein_wiki_tools.services.auth import login
+from vein_wiki_tools.services.wiki_pages import write_page
+
+TEST_PAGE = "User:VeinBot/TestPage"
+
 test_text = f"""
 This is a test page created by VeinBot.<br><br>
 
@@ -20,13 +26,10 @@ Test write successful @ {datetime.datetime.now().isoformat()}
 """
 
 
-async def main():
-    site = pywikibot.Site("en", "vein")
-    user = site.user()
-    print(f"Logged in as: {user}")
-    page = pywikibot.Page(site, "User:VeinBot/TestPage")
-    page.text = test_text
-    page.save(summary="Test script - ignore me", bot=True)
+async def main(session: WikiSession | None = None) -> pywikibot.Page:
+    site = await login(session)
+    print(f"Logged in as: {site.user()}")
+    return await write_page(TEST_PAGE, test_text, summary="Test script - ignore me", session=session)
 
 
 if __name__ == "__main__":
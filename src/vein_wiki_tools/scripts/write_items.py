@@ -1,55 +1,253 @@
+import argparse
 import asyncio
+import os
 import re
+import time
+from collections.abc import AsyncIterable, Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Template
 
 from vein_wiki_tools.clients.file import create_page as f_create_page
-from vein_wiki_tools.clients.file import read_page as f_read_page
-from vein_wiki_tools.services.items import get_items
+from vein_wiki_tools.models.items import Item
+from vein_wiki_tools.services.items import get_items, iter_items
+from vein_wiki_tools.services.sync_state import normalize_content
 from vein_wiki_tools.services.template import get_template
-from vein_wiki_tools.services.wiki_pages import merge_pages, parse_page, render_page
+from vein_wiki_tools.services.wiki_pages import merge_all, merge_page_text
+from vein_wiki_tools.utils.file_helper import get_import_path, get_output_path
 from vein_wiki_tools.utils.logging import getLogger
+from vein_wiki_tools.utils.processes import get_process_pool
 
 logger = getLogger(__name__)
 
+MIRROR_PATH = get_import_path("wiki")
+MERGED_PATH = get_output_path("wiki")
+MERGE_WORKERS = os.cpu_count() or 1
+PIPELINE_QUEUE_SIZE = 64
+
+
+@dataclass
+class PipelineStats:
+    items: int = 0
+    skipped: int = 0
+    missing: int = 0
+    merged: int = 0
+    changed: int = 0
+
+    def __str__(self) -> str:
+        return f"items={self.items}, skipped={self.skipped}, missing={self.missing}, merged={self.merged}, changed={self.changed}"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Write wiki pages for the items in the item sheet")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="merge every page of the local wiki mirror in one go, writing only pages that change",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MERGE_WORKERS,
+        help="number of processes parsing and merging pages, 1 merges serially",
+    )
+    parser.add_argument(
+        "--category",
+        default="Ammo",
+        help="only write the pages of items in this category, empty for every item. Default = Ammo",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=PIPELINE_QUEUE_SIZE,
+        help="pages waiting between two stages of the pipeline, at most",
+    )
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace | None = None):
+    if args is None:
+        args = parse_args([])
+    if args.batch:
+        await batch_merge(workers=args.workers)
+        return
 
-async def main():
     # site = pywikibot.Site("en", "vein")
     # user = site.user()
     # logger.info(f"Logged in as: {user}")
 
+    template = await get_template("item.jinja")
+    await write_pages(
+        iter_items(),
+        render=lambda item: render_item_page(template, item),
+        category=args.category or None,
+        workers=args.workers,
+        queue_size=args.queue_size,
+    )
+
+
+def get_page_name(item: Item) -> str:
+    return item.filename.removesuffix(".json")
+
+
+def render_item_page(template: Template, item: Item) -> str:
+    new_page = template.render(subject=item)
+    return re.sub(r"\n{3,}", "\n\n", new_page).strip()
+
+
+def read_text(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+async def run_stage(inbox: asyncio.Queue, outbox: asyncio.Queue | None, work: Callable[[Any], Awaitable[Any]], concurrency: int = 1):
+    """
+    Feed everything put on ``inbox`` to ``work`` until the inbox is shut down, putting the results
+    that are not None on ``outbox``, and shut the outbox down once every worker of the stage is done.
+    """
+
+    async def worker():
+        while True:
+            try:
+                value = await inbox.get()
+            except asyncio.QueueShutDown:
+                return
+            result = await work(value)
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(concurrency):
+            tg.create_task(worker())
+    if outbox is not None:
+        outbox.shutdown()
+
+
+async def write_pages(
+    items: AsyncIterable[Item],
+    render: Callable[[Item], str],
+    category: str | None = "Ammo",
+    mirror: Path = MIRROR_PATH,
+    output: Path = MERGED_PATH,
+    workers: int = MERGE_WORKERS,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+) -> PipelineStats:
+    """
+    Merge freshly rendered item pages into their pages in the local wiki mirror, and write the merged
+    pages that differ from the mirror to ``output``.
+
+    Items stream through read, render, merge and write stages connected by queues of at most
+    ``queue_size`` pages, so that file reads and writes run in threads while pages are rendered and merged,
+    and only the pages in flight are held in memory. Items without a mirrored page are skipped.
+    """
+    start = time.perf_counter()
+    stats = PipelineStats()
+    to_read: asyncio.Queue[Item] = asyncio.Queue(queue_size)
+    to_render: asyncio.Queue[tuple[Item, str]] = asyncio.Queue(queue_size)
+    to_merge: asyncio.Queue[tuple[str, str, str]] = asyncio.Queue(queue_size)
+    to_write: asyncio.Queue[tuple[str, str]] = asyncio.Queue(queue_size)
+    loop = asyncio.get_running_loop()
+    executor = get_process_pool(workers) if workers > 1 else None
+
+    async def read(item: Item) -> tuple[Item, str] | None:
+        if (existing_page := await asyncio.to_thread(read_text, mirror / get_page_name(item))) is None:
+            logger.debug(f"No existing page for item: {item.name}")
+            stats.missing += 1
+            return None
+        return item, existing_page
+
+    async def render_new(page: tuple[Item, str]) -> tuple[str, str, str]:
+        item, existing_page = page
+        return get_page_name(item), existing_page, render(item)
+
+    async def merge(page: tuple[str, str, str]) -> tuple[str, str] | None:
+        name, existing_page, new_page = page
+        if executor is None:
+            text = merge_page_text(existing_page, new_page)
+        else:
+            text = await loop.run_in_executor(executor, merge_page_text, existing_page, new_page)
+        stats.merged += 1
+        return (name, text) if normalize_content(text) != normalize_content(existing_page) else None
+
+    async def write(page: tuple[str, str]):
+        name, text = page
+        await f_create_page(output / name, text, summary=f"Merging page for item: {name}")
+        logger.debug(f"Wrote merged page for item: {name}")
+        stats.changed += 1
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(run_stage(to_read, to_render, read, concurrency=2))
+            tg.create_task(run_stage(to_render, to_merge, render_new))
+            tg.create_task(run_stage(to_merge, to_write, merge, concurrency=workers))
+            tg.create_task(run_stage(to_write, None, write, concurrency=2))
+            async for item in items:
+                stats.items += 1
+                if not item.name:
+                    logger.warning(f"Skipping item with missing name: {item.filename}")
+                    stats.skipped += 1
+                elif category is not None and item.category != category:
+                    stats.skipped += 1
+                else:
+                    await to_read.put(item)
+            to_read.shutdown()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    logger.info(f"Wrote item pages in {time.perf_counter() - start:.1f}s: {stats}")
+    return stats
+
+
+def load_mirror(root: Path = MIRROR_PATH) -> dict[str, str]:
+    """Every page of the local wiki mirror, by path relative to the mirror"""
+    return {path.relative_to(root).as_posix(): path.read_text(encoding="utf-8") for path in sorted(root.rglob("*")) if path.is_file()}
+
+
+async def batch_merge(
+    workers: int = MERGE_WORKERS,
+    mirror: Path = MIRROR_PATH,
+    output: Path = MERGED_PATH,
+) -> dict[str, int]:
+    """
+    Merge freshly rendered item pages into every existing page of the local wiki mirror,
+    and write the merged pages that differ from the mirror to ``output``.
+    """
+    start = time.perf_counter()
+    existing_pages = load_mirror(mirror)
     items = await get_items()
-    logger.info(f"Retrieved {len(items)} items")
+    logger.info(f"Loaded {len(existing_pages)} mirrored pages and {len(items)} items")
 
+    template = await get_template("item.jinja")
+    pages: list[tuple[str, str, str]] = []
     for item in items:
         if not item.name:
             logger.warning(f"Skipping item with missing name: {item.filename}")
             continue
-        if item.category != "Ammo":
-            continue
-
-        # fetch ecxisting page
-        existing_page = await f_read_page(item.filename.rstrip(".json"))
-        if existing_page is not None:
-            existing_page_parsed = await parse_page(existing_page)
-        else:
+        name = get_page_name(item)
+        if (existing_page := existing_pages.get(name)) is None:
             logger.debug(f"No existing page for item: {item.name}")
-            return
-
-        # render new page
-        template = await get_template("item.jinja")  # Ensure template exists
-        new_page = template.render(subject=item)
-        new_page = re.sub(r"\n{3,}", "\n\n", new_page).strip()
-        new_page_parsed = await parse_page(new_page)
+            continue
+        pages.append((name, existing_page, render_item_page(template, item)))
 
-        # merge with existing page
-        merged_page_parsed = await merge_pages(
-            existing_page_parsed,
-            new_page_parsed,
-        )
-        merged_page_parsed_rendered = await render_page(merged_page_parsed)
+    changed = 0
+    timings: list[tuple[float, str]] = []
+    for merge in merge_all(pages, workers=workers):
+        timings.append((merge.seconds, merge.name))
+        logger.debug(f"Merged {merge.name} in {merge.seconds * 1000:.1f} ms [changed={merge.changed}]")
+        if merge.changed:
+            await f_create_page(output / merge.name, merge.text, summary=f"Merging page for item: {merge.name}")
+            changed += 1
 
-        summary = f"Creating page for ammo item: {item.name}"
-        await f_create_page(item.filename, item.name, merged_page_parsed_rendered, summary)
+    summary = {"mirrored": len(existing_pages), "merged": len(pages), "changed": changed, "unchanged": len(pages) - changed}
+    slowest = ", ".join(f"{name} ({seconds * 1000:.1f} ms)" for seconds, name in sorted(timings, reverse=True)[:5])
+    logger.info(f"Batch merge done in {time.perf_counter() - start:.1f}s: {summary}. Slowest: {slowest or '-'}")
+    return summary
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_args()))
@@ -1,19 +1,31 @@
+import argparse
 import asyncio
+import json
+import os
 from pathlib import Path
 
 import tqdm
 
 from vein_wiki_tools.clients.file import create_page as f_create_page
+from vein_wiki_tools.clients.pakdump.cache import ModelCache, get_model_cache, set_model_cache
+from vein_wiki_tools.clients.pakdump.index import get_pakdump_index
+from vein_wiki_tools.clients.pakdump.models import UEModel
 from vein_wiki_tools.clients.pakdump.services import (
     get_categories,
     get_ue_model_by_path,
     prep_context_for_ue_model,
 )
-from vein_wiki_tools.data.models import Node
-from vein_wiki_tools.data.pakdump.pakdump import pakdump_graph
-from vein_wiki_tools.services.template import render
+from vein_wiki_tools.data.models import Graph, Node
+from vein_wiki_tools.data.pakdump.pakdump import PakdumpData, pakdump_graph
+from vein_wiki_tools.errors import VeinError
+from vein_wiki_tools.services.compare import MANIFEST_PATH
+from vein_wiki_tools.services.manifest import compare_manifests, update_manifest
+from vein_wiki_tools.services.render_cache import RenderCache, get_render_key
+from vein_wiki_tools.services.sync_state import SYNC_STATE_PATH, SyncState
+from vein_wiki_tools.services.template import render_all
+from vein_wiki_tools.services.upload import MAX_UPLOAD_RATE, UploadScheduler
 from vein_wiki_tools.services.wiki_pages import merge_pages, parse_page, render_page
-from vein_wiki_tools.utils.file_helper import get_output_path
+from vein_wiki_tools.utils.file_helper import get_output_path, get_vein_root
 from vein_wiki_tools.utils.logging import getLogger
 
 logger = getLogger(__name__)
@@ -21,21 +33,87 @@ logger = getLogger(__name__)
 
 LOGS_PATH = get_output_path("logs")
 LOCAL_WIKI_PATH = get_output_path("wiki")
+MODEL_CACHE_PATH = get_output_path("cache") / "ue_models.sqlite"
+RENDER_CACHE_PATH = get_output_path("cache") / "renders.sqlite"
+# Pages written between commits of the render cache
+RENDER_CACHE_COMMIT_INTERVAL = 100
 
 VEIN_VERSIONS = ["0.022h10"]
-
-
-async def main() -> None:
+IMPORT_WORKERS = os.cpu_count() or 1
+RENDER_WORKERS = os.cpu_count() or 1
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Write wiki pages for the UE models in the pakdump")
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        default=None,
+        help="start from this graph snapshot, importing the pakdump and writing the snapshot if it doesn't exist",
+    )
+    parser.add_argument(
+        "--refresh-snapshot",
+        action="store_true",
+        help="import the pakdump even if the snapshot exists, and overwrite it",
+    )
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=RENDER_WORKERS,
+        help="number of processes rendering pages, 1 renders serially",
+    )
+    parser.add_argument(
+        "--compare-to",
+        default=None,
+        help=f"directory in output_files/ to compare the written pages to. Default = {VEIN_VERSIONS[-1]}",
+    )
+    parser.add_argument(
+        "--no-render-cache",
+        action="store_true",
+        help="render and write every page, even when unchanged since the last run",
+    )
+    parser.add_argument(
+        "--upload",
+        action="store_true",
+        help="save the written pages to the wiki, skipping pages that are unchanged since they were last synced",
+    )
+    parser.add_argument(
+        "--upload-rate",
+        type=float,
+        default=MAX_UPLOAD_RATE,
+        help="most saves per second, uploads go slower when the edit rate limit of the account is lower",
+    )
+    return parser.parse_args(argv)
+
+
+async def load_graph(snapshot: Path | None = None, refresh_snapshot: bool = False) -> Graph:
+    if snapshot is not None and snapshot.is_file() and not refresh_snapshot:
+        try:
+            return Graph.load(snapshot)
+        except VeinError as e:
+            # e.g. taken before a model changed, the import below writes it anew
+            logger.warning(f"Importing the pakdump instead of loading the graph snapshot: {e}")
+
+    if (model_cache := get_model_cache()) is None:
+        model_cache = ModelCache(MODEL_CACHE_PATH)
+        set_model_cache(model_cache)
+    graph = await pakdump_graph(data=PakdumpData(graph=Graph(), workers=IMPORT_WORKERS))
+    logger.info("Model cache: %s", model_cache.stats)
+    if snapshot is not None:
+        graph.dump(snapshot)
+    return graph
+
+
+async def main(args: argparse.Namespace | None = None) -> None:
+    if args is None:
+        args = parse_args()
     logger.info("Starting UE model wiki page writer")
-    graph = await pakdump_graph(data=None)
+    graph = await load_graph(snapshot=args.snapshot, refresh_snapshot=args.refresh_snapshot)
     logger.debug(f"Graph has {len(graph.nodes)} nodes")
 
     # Filter models for writables
     models_to_write: list[tuple[Node, dict]] = []
-    for node in tqdm.tqdm(graph.nodes.values(), desc="Filtering .."):
-        if node.ue_model.model_info.template is None:
-            # logger.warning(f"Missing template for {str(node.ue_model)}")
-            continue
+    for node in tqdm.tqdm(graph.get_templated_nodes(), desc="Filtering .."):
         # logger.info(f"Filtering, at: {node.ue_model.display_name()}")
         context = await prep_context_for_ue_model(node=node, graph=graph)
         if not context["infobox"].infobox_template:
@@ -43,64 +121,79 @@ async def main() -> None:
             continue
         models_to_write.append((node, context))
 
-    # Render pages
-    for n, c in tqdm.tqdm(models_to_write, desc="Writing .."):
-        ue_model = n.ue_model
-        # logger.info(f"Rendering {ue_model.display_name()}")
-        content = await render(template=f"{ue_model.model_info.template}.jinja", context=c)
-        subfolder = ue_model.model_info.template
-        if ue_model.model_info.super_type is not None:
-            subfolder = ue_model.model_info.super_type
-        if ue_model.model_info.sub_type is not None:
-            subfolder = ue_model.model_info.sub_type
-        await f_create_page(
-            path=LOCAL_WIKI_PATH / subfolder / f"{ue_model.model_info.console_name}.wiki",
-            text=content,
-            summary=f"Creating page for UE model: {ue_model.get_object_name()}",
-        )
+    # Render pages, skipping those whose context and templates are unchanged since they were last written
+    render_cache = RenderCache(RENDER_CACHE_PATH)
+    if args.no_render_cache:
+        render_cache.clear()
+    pages_to_render: list[tuple[Node, Path, str, str | None, dict]] = []
+    for node, context in models_to_write:
+        output = get_page_path(node.ue_model)
+        template = f"{node.ue_model.model_info.template}.jinja"
+        key = get_render_key(template, context)
+        if not render_cache.is_fresh(output, key):
+            pages_to_render.append((node, output, template, key, context))
+    logger.info("Render cache: %s", render_cache.stats)
+
+    rendered = render_all([(template, context) for _, _, template, _, context in pages_to_render], workers=args.render_workers)
+    # committed as the pages are written, a run failing halfway doesn't render them all again
+    try:
+        for i, ((n, output, _, key, _), content) in enumerate(
+            tqdm.tqdm(zip(pages_to_render, rendered, strict=True), total=len(pages_to_render), desc="Writing .."), start=1
+        ):
+            await f_create_page(
+                path=output,
+                text=content,
+                summary=f"Creating page for UE model: {n.ue_model.get_object_name()}",
+            )
+            render_cache.put(output, key)
+            if i % RENDER_CACHE_COMMIT_INTERVAL == 0:
+                render_cache.commit()
+    finally:
+        render_cache.close()
 
     # Generate stats comparing old version
-    previous_version = VEIN_VERSIONS[-1]
-    previous_version_root = get_output_path(previous_version)
-    new_files = updated = not_found = unchanged = 0
-    verified_files: list[Path] = []
-    if previous_version_root is not None and previous_version_root.is_dir():
-        previous_version_files = list(previous_version_root.glob("**/*"))
-        for previous_file in tqdm.tqdm(previous_version_files, f"Comparing to {previous_version}"):
-            relative_path = previous_file.relative_to(previous_version_root)
-            new_file_path = LOCAL_WIKI_PATH / relative_path
-            if new_file_path.is_file():
-                verified_files.append(new_file_path)
-                if not compare_files(previous_file, new_file_path):
-                    logger.info("Updated file: %s", str(relative_path))
-                    updated += 1
-                else:
-                    unchanged += 1
-            else:
-                logger.info("Missing file: %s", str(relative_path))
-                not_found += 1
+    # kept with the cache, so only pages are written to the wiki output
+    manifest = update_manifest(LOCAL_WIKI_PATH, path=MANIFEST_PATH / f"{LOCAL_WIKI_PATH.name}.manifest.json")
+    compare_to = args.compare_to or VEIN_VERSIONS[-1]
+    compare_root = get_output_path(compare_to)
+    if compare_root.is_dir():
+        diff = compare_manifests(update_manifest(compare_root, path=MANIFEST_PATH / f"{compare_to}.manifest.json"), manifest)
+        report_path = LOGS_PATH / f"compare-{compare_to}.json"
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(diff.to_dict(), indent=2))
+        logger.info("Compared to %s: %s [report=%s]", compare_to, diff, report_path)
     else:
-        logger.info("Found no previous output to compare for version %s", previous_version)
+        logger.info("Found no previous output to compare for version %s", compare_to)
 
-    for file in LOCAL_WIKI_PATH.glob("**/*"):
-        if file not in verified_files:
-            relative_path = file.relative_to(LOCAL_WIKI_PATH)
-            logger.info("New file: %s", str(relative_path))
-            new_files += 1
+    get_pakdump_index(get_vein_root()).report_unresolved()
 
     # Backup from wiki
     if False:
         pass
 
     # Write to wiki
-    if False:
-        pass
+    if args.upload:
+        scheduler = UploadScheduler(SyncState(SYNC_STATE_PATH), max_rate=args.upload_rate)
+        scheduler.upload(
+            (
+                node.ue_model.display_name(),
+                get_page_path(node.ue_model).read_text(encoding="utf-8"),
+                f"Updating page for UE model: {node.ue_model.get_object_name()}",
+            )
+            for node, _ in models_to_write
+        )
+        scheduler.state.close()
+        scheduler.session.log_stats()
 
 
-def compare_files(file1: Path, file2: Path) -> bool:
-    """Compare two files for equality."""
-    return file1.read_text() == file2.read_text()
+def get_page_path(ue_model: UEModel) -> Path:
+    subfolder = ue_model.model_info.template
+    if ue_model.model_info.super_type is not None:
+        subfolder = ue_model.model_info.super_type
+    if ue_model.model_info.sub_type is not None:
+        subfolder = ue_model.model_info.sub_type
+    return LOCAL_WIKI_PATH / str(subfolder) / f"{ue_model.model_info.console_name}.wiki"
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_args()))
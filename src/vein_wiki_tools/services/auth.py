@@ -2,11 +2,10 @@ import logging
 
 import pywikibot
 
+from vein_wiki_tools.clients.wiki import WikiSession, get_session
+
 logger = logging.getLogger(__name__)
 
 
-async def login() -> pywikibot._BaseSite:
-    site = pywikibot.Site("en", "vein")
-    await site.login()
-    logger.debug(f"Logged in as: {site.user()}")
-    return site
+async def login(session: WikiSession | None = None) -> pywikibot.site.BaseSite:
+    return (session or get_session()).login()
@@ -1,6 +1,172 @@
+import json
+import os
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from vein_wiki_tools.services.manifest import ManifestDiff, compare_manifests, update_manifest
+from vein_wiki_tools.utils.file_helper import get_output_path
+from vein_wiki_tools.utils.logging import getLogger
+from vein_wiki_tools.utils.processes import get_process_pool
+
+logger = getLogger(__name__)
+
 PATCH_PROGRESSION = ["022h10"]
 CURRENT = "022h16"
 
+MISSING = "<missing>"
+# Manifests of compared trees, kept out of them so a compare doesn't write into an old version or a pakdump
+MANIFEST_PATH = get_output_path("cache") / "manifests"
+
+
+@dataclass
+class FieldChange:
+    field: str
+    old: Any
+    new: Any
+
+
+@dataclass
+class ModelChange:
+    """Changes to one model (an export of a pakdump file) between two versions"""
+
+    file: str
+    model: str
+    status: str  # added, removed or changed
+    fields: list[FieldChange] = field(default_factory=list)
+
+
+@dataclass
+class VersionDiff:
+    old_version: str
+    new_version: str
+    files: ManifestDiff
+    models: list[ModelChange] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "old_version": self.old_version,
+            "new_version": self.new_version,
+            "files": self.files.to_dict(),
+            "models": [
+                {
+                    "file": change.file,
+                    "model": change.model,
+                    "status": change.status,
+                    "fields": {f.field: {"old": f.old, "new": f.new} for f in change.fields},
+                }
+                for change in self.models
+            ],
+        }
+
+
+def compare_outputs(
+    versions: list[str] | None = None,
+    get_root: Callable[[str], Path] = get_output_path,
+    workers: int = os.cpu_count() or 1,
+    manifest_dir: Path = MANIFEST_PATH,
+) -> list[VersionDiff]:
+    """
+    Diff every pair of consecutive versions in a patch progression.
+
+    Files are compared through content hash manifests. Only the JSON files that
+    changed are decoded, and diffed field by field per model. The models of new
+    and missing JSON files are reported as added and removed. Other files,
+    like rendered wiki pages, are only reported as new, updated or missing.
+
+    Args:
+        versions (list[str]): versions in patch order. ``Default = PATCH_PROGRESSION + [CURRENT]``
+        get_root (Callable): the directory of a version. ``Default = output_files/<version>``
+        workers (int): threads hashing files and processes diffing JSON files
+        manifest_dir (Path): where the manifests of the versions are kept. ``Default = output_files/cache/manifests``
+
+    Return:
+        ``list[VersionDiff]`` one per consecutive pair of versions
+    """
+    if versions is None:
+        versions = [*PATCH_PROGRESSION, CURRENT]
+
+    manifests = {}
+    for version in versions:
+        manifests[version] = update_manifest(get_root(version), path=manifest_dir / f"{version}.manifest.json", workers=workers)
+
+    diffs: list[VersionDiff] = []
+    for old_version, new_version in zip(versions, versions[1:]):
+        old, new = manifests[old_version], manifests[new_version]
+        files = compare_manifests(old, new)
+        diff = VersionDiff(old_version=old_version, new_version=new_version, files=files)
+        json_files = [
+            *((path, old.root / path, new.root / path) for path in files.updated if path.endswith(".json")),
+            *((path, None, new.root / path) for path in files.new if path.endswith(".json")),
+            *((path, old.root / path, None) for path in files.missing if path.endswith(".json")),
+        ]
+        diff.models = [change for changes in diff_json_files(json_files, workers=workers) for change in changes]
+        logger.info("Compared %s to %s: %s, %s changed models", old_version, new_version, files, len(diff.models))
+        diffs.append(diff)
+    return diffs
+
+
+def diff_json_files(
+    files: list[tuple[str, Path | None, Path | None]], workers: int = 1, chunk_size: int = 16
+) -> Iterator[list[ModelChange]]:
+    """
+    Diff ``(relative_path, old, new)`` JSON files, yielding the model changes in the same order as ``files``.
+    A file missing on one side is None, all its models are then added or removed.
+    """
+    if workers <= 1 or len(files) <= chunk_size:
+        yield from map(_diff_json_file, files)
+        return
+    with get_process_pool(workers) as executor:
+        yield from executor.map(_diff_json_file, files, chunksize=chunk_size)
+
+
+def _diff_json_file(file: tuple[str, Path | None, Path | None]) -> list[ModelChange]:
+    relative, old_path, new_path = file
+    old = json.loads(old_path.read_text()) if old_path is not None else []
+    new = json.loads(new_path.read_text()) if new_path is not None else []
+    return diff_models(file=relative, old=old, new=new)
+
+
+def diff_models(file: str, old: Any, new: Any) -> list[ModelChange]:
+    old_models, new_models = get_models(old, default=file), get_models(new, default=file)
+    changes: list[ModelChange] = []
+    for name, new_model in new_models.items():
+        if name not in old_models:
+            changes.append(ModelChange(file=file, model=name, status="added"))
+        elif fields := diff_fields(old_models[name], new_model):
+            changes.append(ModelChange(file=file, model=name, status="changed", fields=fields))
+    for name in old_models:
+        if name not in new_models:
+            changes.append(ModelChange(file=file, model=name, status="removed"))
+    return changes
+
+
+def get_models(content: Any, default: str) -> dict[str, Any]:
+    """The exports of a pakdump file by ``Type'Name'``, or the whole document as one model"""
+    if isinstance(content, list) and all(isinstance(m, dict) and "Name" in m for m in content):
+        return {f"{m.get('Type')}'{m['Name']}'": m for m in content}
+    return {default: content}
+
+
+def diff_fields(old: Any, new: Any) -> list[FieldChange]:
+    """Changed leaf values between two JSON values, with dotted field paths like ``Properties.MeleeTime``"""
+    old_fields, new_fields = dict(flatten(old)), dict(flatten(new))
+    changes = [
+        FieldChange(field=name, old=old_fields.get(name, MISSING), new=value)
+        for name, value in new_fields.items()
+        if old_fields.get(name, MISSING) != value
+    ]
+    changes.extend(FieldChange(field=name, old=value, new=MISSING) for name, value in old_fields.items() if name not in new_fields)
+    return changes
+
 
-def compare_outputs():
-    pass
+def flatten(value: Any, prefix: str = "") -> Iterator[tuple[str, Any]]:
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list) and value:
+        for i, item in enumerate(value):
+            yield from flatten(item, f"{prefix}[{i}]")
+    else:
+        yield prefix, value
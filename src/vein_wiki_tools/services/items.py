@@ -1,3 +1,4 @@
+from collections.abc import AsyncIterator
 from enum import Enum, auto
 
 from vein_wiki_tools.models.items import Item
@@ -17,3 +18,16 @@ async def get_items(source: ItemSource = ItemSource.CSV) -> list[Item]:
         return items
 
     raise ValueError(f"Unsupported item source: {source}")
+
+
+async def iter_items(source: ItemSource = ItemSource.CSV) -> AsyncIterator[Item]:
+    """Like get_items, but yields the items as they are read instead of loading them all first"""
+    if source == ItemSource.CSV:
+        from vein_wiki_tools.data.csv.load import csv_iter
+        from vein_wiki_tools.utils.file_helper import get_full_file_path
+
+        async for item in csv_iter(get_full_file_path("import_files/vein_items_subset.csv")):
+            yield item
+        return
+
+    raise ValueError(f"Unsupported item source: {source}")
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+MANIFEST_FILENAME = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestEntry:
+    hash: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class Manifest:
+    """Content hash and size of every file in an output directory, keyed by relative posix path"""
+
+    root: Path
+    entries: dict[str, ManifestEntry] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, root: Path, previous: Manifest | None = None, workers: int = 1) -> Manifest:
+        """
+        Hash every file under ``root``. Files with the same size and mtime as in ``previous``
+        keep their hash without being read, the rest are hashed by ``workers`` threads.
+        """
+        manifest = cls(root=root)
+        to_hash: list[tuple[str, Path, os.stat_result]] = []
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                relative = path.relative_to(root).as_posix()
+                if relative == MANIFEST_FILENAME:
+                    continue
+                stat = path.stat()
+                if previous is not None and (entry := previous.entries.get(relative)) is not None:
+                    if (entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                        manifest.entries[relative] = entry
+                        continue
+                to_hash.append((relative, path, stat))
+
+        reused = len(manifest.entries)
+        # hashlib releases the GIL while hashing, so threads are enough to use more cores
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            hashes = executor.map(hash_file, [path for _, path, _ in to_hash])
+            for (relative, _, stat), digest in zip(to_hash, hashes, strict=True):
+                manifest.entries[relative] = ManifestEntry(hash=digest, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        manifest.entries = dict(sorted(manifest.entries.items()))
+        logger.debug("Built manifest [root=%s, files=%s, reused=%s]", root, len(manifest.entries), reused)
+        return manifest
+
+    @classmethod
+    def load(cls, root: Path, path: Path | None = None) -> Manifest | None:
+        try:
+            content = json.loads((path or get_manifest_path(root)).read_text())
+        except (OSError, ValueError):
+            return None
+        if content.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(root=root, entries={path: ManifestEntry(**entry) for path, entry in content["files"].items()})
+
+    def save(self, path: Path | None = None) -> None:
+        files = {relative: asdict(entry) for relative, entry in sorted(self.entries.items())}
+        path = path or get_manifest_path(self.root)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"version": MANIFEST_VERSION, "files": files}, indent=1))
+
+
+@dataclass
+class ManifestDiff:
+    old_root: Path
+    new_root: Path
+    new: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "old": str(self.old_root),
+            "new": str(self.new_root),
+            "counts": {
+                "new": len(self.new),
+                "updated": len(self.updated),
+                "missing": len(self.missing),
+                "unchanged": len(self.unchanged),
+            },
+            "new_files": self.new,
+            "updated_files": self.updated,
+            "missing_files": self.missing,
+            "unchanged_files": self.unchanged,
+        }
+
+    def __str__(self) -> str:
+        return f"new={len(self.new)}, updated={len(self.updated)}, missing={len(self.missing)}, unchanged={len(self.unchanged)}"
+
+
+def hash_file(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def get_manifest_path(root: Path) -> Path:
+    return root / MANIFEST_FILENAME
+
+
+def update_manifest(root: Path, path: Path | None = None, workers: int = 1) -> Manifest:
+    """
+    Bring the manifest of a directory up to date, rehashing only files that changed.
+
+    The manifest is kept in the directory itself unless another ``path`` is given,
+    e.g. for a pakdump, where an extra .json file would be picked up by the import.
+    """
+    manifest = Manifest.build(root, previous=Manifest.load(root, path=path), workers=workers)
+    manifest.save(path=path)
+    return manifest
+
+
+def compare_manifests(old: Manifest, new: Manifest) -> ManifestDiff:
+    diff = ManifestDiff(old_root=old.root, new_root=new.root)
+    for path, entry in sorted(new.entries.items()):
+        if (old_entry := old.entries.get(path)) is None:
+            diff.new.append(path)
+        elif (old_entry.hash, old_entry.size) != (entry.hash, entry.size):
+            diff.updated.append(path)
+        else:
+            diff.unchanged.append(path)
+    diff.missing = sorted(path for path in old.entries if path not in new.entries)
+    return diff
+
+
+def compare_output_dirs(old_root: Path, new_root: Path) -> ManifestDiff:
+    return compare_manifests(update_manifest(old_root), update_manifest(new_root))
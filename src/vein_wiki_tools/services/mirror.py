@@ -0,0 +1,154 @@
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import quote
+
+from vein_wiki_tools.clients.wiki import PRELOAD_BATCH_SIZE, WikiSession, get_session
+from vein_wiki_tools.errors import VeinError
+from vein_wiki_tools.services.sync_state import SEEN, SyncState, get_content_hash
+from vein_wiki_tools.utils.file_helper import get_import_path
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class MirrorStats:
+    fetched: int = 0
+    written: int = 0
+    unchanged: int = 0
+    missing: int = 0
+    removed: int = 0
+    moved: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"fetched={self.fetched}, written={self.written}, unchanged={self.unchanged}, missing={self.missing}, "
+            f"removed={self.removed}, moved={self.moved}"
+        )
+
+
+def get_mirror_path() -> Path:
+    return get_import_path("wiki")
+
+
+def get_mirror_filename(title: str) -> str:
+    """File name of a page in the mirror, with ``/`` of subpages escaped"""
+    return quote(title, safe=" !$&'()*+,-.:;=@_~")
+
+
+def mirror_pages(
+    titles: Iterable[str] | Mapping[str, str],
+    root: Path | None = None,
+    session: WikiSession | None = None,
+    batch_size: int = PRELOAD_BATCH_SIZE,
+    state: SyncState | None = None,
+    remove_missing: bool = False,
+) -> MirrorStats:
+    """
+    Download the current text of pages into the local wiki mirror, ``batch_size`` titles per request.
+
+    Pages are written as they arrive, files whose text is already up to date are left untouched.
+
+    Args:
+        titles: the titles to mirror, or a mapping of title to file name in the mirror,
+            e.g. item pages stored under the name of their blueprint
+        root (Path): the mirror. ``Default = import_files/wiki``
+        state (SyncState): record the revision, content hash and file of every mirrored page,
+            and the time of the first sync, to refresh the mirror from later
+        remove_missing (bool): remove the files of pages that don't exist (anymore)
+    """
+    root = root or get_mirror_path()
+    root.mkdir(parents=True, exist_ok=True)
+    session = session or get_session()
+    started = session.server_time() if state is not None and state.get_last_sync() is None else None
+    filenames = titles if isinstance(titles, Mapping) else {}
+    stats = MirrorStats()
+    for title, text, revid in session.preload(titles, batch_size=batch_size):
+        stats.fetched += 1
+        path = root / filenames.get(title, get_mirror_filename(title))
+        if text is None:
+            logger.debug(f"No wiki page for: {title}")
+            stats.missing += 1
+            if remove_missing:
+                if path.is_file():
+                    path.unlink()
+                    stats.removed += 1
+                if state is not None:
+                    state.forget(title)
+                    state.forget_mirror_file(title)
+            continue
+        if state is not None:
+            state.record(title, get_content_hash(text), revid, SEEN, commit=False)
+            state.set_mirror_file(title, path.name, commit=False)
+        if path.is_file() and path.read_text(encoding="utf-8") == text:
+            stats.unchanged += 1
+            continue
+        path.write_text(text, encoding="utf-8")
+        stats.written += 1
+    if state is not None:
+        state.commit()
+        if started is not None:
+            state.set_last_sync(started)
+    logger.info(f"Mirrored wiki pages to {root}: {stats}")
+    return stats
+
+
+def refresh_mirror(
+    state: SyncState,
+    root: Path | None = None,
+    session: WikiSession | None = None,
+    batch_size: int = PRELOAD_BATCH_SIZE,
+) -> MirrorStats:
+    """
+    Update the local wiki mirror with the pages changed on the wiki since it was last synced.
+
+    Only pages in the mirror are followed. Pages edited since are downloaded again, ``batch_size``
+    titles per request, files of deleted pages are removed, and moved pages follow their new title.
+    Files named after the title of their page are renamed with it, others, like item pages named
+    after their blueprint, keep their name.
+
+    When the mirror was last synced longer ago than the wiki keeps its recent changes, all pages
+    of the mirror are downloaded again instead, moves in between can't be followed then.
+
+    Args:
+        state (SyncState): the sync state the mirror was made with, see ``mirror_pages``
+        root (Path): the mirror. ``Default = import_files/wiki``
+    """
+    if (since := state.get_last_sync()) is None:
+        raise VeinError("The wiki mirror was never synced, mirror the pages first [state=%s]", state.path)
+    root = root or get_mirror_path()
+    session = session or get_session()
+    # the time is taken before listing the changes, changes made meanwhile are listed again next time
+    now = session.server_time()
+    files = state.get_mirror_files()
+    if not session.has_changes_since(since, now):
+        logger.warning(f"The recent changes of the wiki don't reach back to the last sync at {since}, mirroring all pages again")
+        stats = mirror_pages(files, root=root, session=session, batch_size=batch_size, state=state, remove_missing=True)
+        state.set_last_sync(now)
+        logger.info(f"Refreshed the wiki mirror from {since} to {now}: {stats}")
+        return stats
+    changed: dict[str, str] = {}
+    moved = 0
+    for change in session.get_changes(since):
+        if change.title not in files:
+            continue
+        if change.kind == "move" and change.new_title is not None:
+            filename = files.pop(change.title)
+            changed.pop(change.title, None)
+            if filename == get_mirror_filename(change.title):
+                (root / filename).unlink(missing_ok=True)
+                filename = get_mirror_filename(change.new_title)
+            files[change.new_title] = changed[change.new_title] = filename
+            state.set_mirror_file(change.new_title, filename)
+            state.forget_mirror_file(change.title)
+            state.forget(change.title)
+            moved += 1
+        else:
+            changed[change.title] = files[change.title]
+    logger.debug(f"Wiki pages in the mirror changed since {since}: {len(changed)}")
+    stats = mirror_pages(changed, root=root, session=session, batch_size=batch_size, state=state, remove_missing=True)
+    stats.moved = moved
+    state.set_last_sync(now)
+    logger.info(f"Refreshed the wiki mirror from {since} to {now}: {stats}")
+    return stats
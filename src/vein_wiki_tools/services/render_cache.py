@@ -0,0 +1,127 @@
+import dataclasses
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from vein_wiki_tools.services.template import get_template_fingerprint
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+# Bump when pages are rendered differently without any change to the templates
+RENDER_CACHE_VERSION = 1
+
+
+@dataclass
+class RenderCacheStats:
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self) -> str:
+        return f"hits={self.hits}, misses={self.misses}, uncacheable={self.uncacheable}, hit_ratio={self.hit_ratio():.1%}"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return {"__type__": type(value).__qualname__, **value.model_dump(mode="json", by_alias=True)}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {"__type__": type(value).__qualname__, **{f.name: getattr(value, f.name) for f in dataclasses.fields(value)}}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"Can't hash value of type {type(value)}")
+
+
+def get_render_key(template: str, context: dict[str, Any]) -> str | None:
+    """
+    Stable hash of a page: the template sources it touches and the prepared context.
+
+    Return:
+        the key, or None when the context holds values that can't be hashed stably
+    """
+    try:
+        serialized = json.dumps(context, default=_json_default, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+    digest = hashlib.blake2b(str(RENDER_CACHE_VERSION).encode(), digest_size=16)
+    digest.update(get_template_fingerprint(template).encode())
+    digest.update(serialized.encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Remembers which render key each output file was last written with.
+
+    A page is a hit when its key is unchanged and the output file still has the size
+    and mtime it was written with, in which case both rendering and writing can be skipped.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.stats = RenderCacheStats()
+        self._connection: sqlite3.Connection | None = None
+
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages (path TEXT PRIMARY KEY, key TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)"
+            )
+        return self._connection
+
+    def is_fresh(self, output: Path, key: str | None) -> bool:
+        if key is None:
+            self.stats.uncacheable += 1
+            return False
+        row = self.connection().execute("SELECT key, size, mtime_ns FROM pages WHERE path = ?", (str(output),)).fetchone()
+        if row is not None and row[0] == key:
+            try:
+                stat = output.stat()
+            except OSError:
+                stat = None
+            if stat is not None and (stat.st_size, stat.st_mtime_ns) == (row[1], row[2]):
+                self.stats.hits += 1
+                return True
+        self.stats.misses += 1
+        return False
+
+    def put(self, output: Path, key: str | None) -> None:
+        if key is None:
+            return
+        stat = output.stat()
+        self.connection().execute(
+            "INSERT OR REPLACE INTO pages (path, key, size, mtime_ns) VALUES (?, ?, ?, ?)",
+            (str(output), key, stat.st_size, stat.st_mtime_ns),
+        )
+
+    def commit(self) -> None:
+        if self._connection is not None:
+            self._connection.commit()
+
+    def clear(self) -> None:
+        conn = self.connection()
+        conn.execute("DELETE FROM pages")
+        conn.commit()
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+        self._connection = None
@@ -0,0 +1,119 @@
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from vein_wiki_tools.utils.file_helper import get_output_path
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+SYNC_STATE_PATH = get_output_path("cache") / "sync_state.sqlite"
+
+SEEN = "seen"
+WRITTEN = "written"
+
+
+@dataclass(frozen=True, slots=True)
+class SyncRecord:
+    revid: int | None
+    hash: str
+    source: str  # SEEN when read from the wiki, WRITTEN when saved by us
+
+
+def normalize_content(text: str) -> str:
+    """Wiki text as MediaWiki stores it: unix newlines, and no trailing whitespace, on lines or at the end"""
+    return "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").split("\n")).rstrip()
+
+
+def get_content_hash(text: str) -> str:
+    return hashlib.blake2b(normalize_content(text).encode(), digest_size=16).hexdigest()
+
+
+class SyncState:
+    """
+    The last revision id and content hash we saw on the wiki, or wrote to it, per title.
+
+    A page whose new text hashes the same as the last known revision doesn't need to be
+    uploaded, without asking the wiki. Whether the last known revision is still the
+    latest is cheap to check for many titles at once, see ``WikiSession.get_revids``.
+
+    Also kept are the file of every page in the local mirror, and the time of the wiki
+    when the mirror was last synced, to refresh it with only the pages changed since.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages "
+                "(title TEXT PRIMARY KEY, revid INTEGER, hash TEXT NOT NULL, source TEXT NOT NULL, synced_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE TABLE IF NOT EXISTS mirror (title TEXT PRIMARY KEY, filename TEXT NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return self._connection
+
+    def get(self, title: str) -> SyncRecord | None:
+        row = self.connection().execute("SELECT revid, hash, source FROM pages WHERE title = ?", (title,)).fetchone()
+        return SyncRecord(*row) if row is not None else None
+
+    def record(self, title: str, hash: str, revid: int | None, source: str, commit: bool = True) -> None:
+        conn = self.connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO pages (title, revid, hash, source, synced_at) VALUES (?, ?, ?, ?, ?)",
+            (title, revid, hash, source, time.time()),
+        )
+        if commit:
+            conn.commit()
+
+    def forget(self, title: str) -> None:
+        conn = self.connection()
+        conn.execute("DELETE FROM pages WHERE title = ?", (title,))
+        conn.commit()
+
+    def get_mirror_files(self) -> dict[str, str]:
+        return dict(self.connection().execute("SELECT title, filename FROM mirror"))
+
+    def set_mirror_file(self, title: str, filename: str, commit: bool = True) -> None:
+        conn = self.connection()
+        conn.execute("INSERT OR REPLACE INTO mirror (title, filename) VALUES (?, ?)", (title, filename))
+        if commit:
+            conn.commit()
+
+    def forget_mirror_file(self, title: str) -> None:
+        conn = self.connection()
+        conn.execute("DELETE FROM mirror WHERE title = ?", (title,))
+        conn.commit()
+
+    def get_last_sync(self) -> str | None:
+        """Time of the wiki, as an ISO 8601 timestamp, the mirror was last synced at"""
+        row = self.connection().execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        return row[0] if row is not None else None
+
+    def set_last_sync(self, timestamp: str) -> None:
+        conn = self.connection()
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sync', ?)", (timestamp,))
+        conn.commit()
+
+    def commit(self) -> None:
+        if self._connection is not None:
+            self._connection.commit()
+
+    def clear(self) -> None:
+        conn = self.connection()
+        for table in ("pages", "mirror", "meta"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+        self._connection = None
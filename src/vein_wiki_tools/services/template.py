@@ -1,7 +1,12 @@
+import hashlib
 import re
+from collections.abc import Iterator
+from functools import cache
 from typing import Any
 
-from jinja2 import Environment, PackageLoader, Template, select_autoescape
+from jinja2 import Environment, PackageLoader, Template, TemplateNotFound, meta, select_autoescape
+
+from vein_wiki_tools.utils.processes import get_process_pool
 
 env = Environment(
     loader=PackageLoader("vein_wiki_tools", "templates"),
@@ -13,12 +18,67 @@ async def get_template(template_name: str) -> Template:
     return env.get_template(template_name)
 
 
+def get_template_sources(template_name: str) -> list[str]:
+    """Names of the template and every template it includes, imports or extends, recursively"""
+    seen: set[str] = set()
+    pending = [template_name]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        try:
+            source, _, _ = env.loader.get_source(env, name)
+        except TemplateNotFound:
+            # Rendering will fail on it, there is nothing to fingerprint
+            continue
+        seen.add(name)
+        for ref in meta.find_referenced_templates(env.parse(source)):
+            if ref is None:
+                # A dynamic reference, like the infobox template, could be any template
+                return sorted(env.list_templates(extensions=["jinja"]))
+            pending.append(ref)
+    return sorted(seen)
+
+
+@cache
+def get_template_fingerprint(template_name: str) -> str:
+    """Hash the sources of a template and every template it touches"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in get_template_sources(template_name):
+        source, _, _ = env.loader.get_source(env, name)
+        digest.update(name.encode())
+        digest.update(source.encode())
+    return digest.hexdigest()
+
+
 async def render(template: str, context: dict[str, Any]) -> str:
+    return render_sync(template=template, context=context)
+
+
+def render_sync(template: str, context: dict[str, Any]) -> str:
     rendered = env.get_template(template).render(context)
     rendered = trim_bad_newlines(rendered)
     return rendered
 
 
+def render_all(pages: list[tuple[str, dict[str, Any]]], workers: int = 1, chunk_size: int = 8) -> Iterator[str]:
+    """
+    Render ``(template, context)`` pairs, yielding the text in the same order as ``pages``.
+
+    With more than one worker, rendering is spread over a process pool, so contexts must be picklable.
+    """
+    if workers <= 1 or len(pages) <= chunk_size:
+        yield from (render_sync(template=template, context=context) for template, context in pages)
+        return
+    with get_process_pool(workers) as executor:
+        yield from executor.map(_render_page, pages, chunksize=chunk_size)
+
+
+def _render_page(page: tuple[str, dict[str, Any]]) -> str:
+    template, context = page
+    return render_sync(template=template, context=context)
+
+
 def trim_bad_newlines(text: str) -> str:
     start_pattern = r"^\s*\n"
     start_replacement = ""
@@ -0,0 +1,247 @@
+import itertools
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import pywikibot
+from pywikibot.exceptions import APIError, MaxlagTimeoutError, OtherPageSaveError, PageSaveRelatedError, ServerError, TimeoutError
+
+from vein_wiki_tools.clients.wiki import PRELOAD_BATCH_SIZE, WikiSession, get_session
+from vein_wiki_tools.services.sync_state import WRITTEN, SyncState, get_content_hash
+from vein_wiki_tools.utils.logging import getLogger
+
+logger = getLogger(__name__)
+
+# API error codes that mean the wiki wants us to slow down, rather than that the edit is refused
+THROTTLE_ERROR_CODES = {"ratelimited", "maxlag", "readonly"}
+# Saves per second when the wiki doesn't limit the edit rate of the account
+MAX_UPLOAD_RATE = 1.0
+
+
+class TokenBucket:
+    """
+    Paces saves to ``rate`` per second, allowing bursts of up to ``capacity``.
+
+    The rate is adaptive: every backoff halves it, down to ``min_rate``, and every
+    success raises it by ``increase`` again, up to ``max_rate``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        min_rate: float | None = None,
+        max_rate: float | None = None,
+        increase: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase = increase if increase is not None else self.max_rate / 10
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.updated = clock()
+        self.paused_until = 0.0
+
+    def refill(self) -> None:
+        now = self.clock()
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def acquire(self) -> float:
+        """Wait for a token, return how many seconds were waited"""
+        waited = 0.0
+        while True:
+            now = self.clock()
+            if now < self.paused_until:
+                delay = self.paused_until - now
+            else:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+    def backoff(self, pause: float = 0.0) -> None:
+        """Halve the rate, and hand out no tokens for ``pause`` seconds, nor gather them"""
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, self.clock() + pause)
+        self.updated = max(self.updated, self.paused_until)
+
+    def recover(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+@dataclass
+class UploadStats:
+    saved: int = 0
+    skipped: int = 0
+    conflicts: int = 0
+    failed: int = 0
+    retries: int = 0
+    lagged: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"saved={self.saved}, skipped={self.skipped}, conflicts={self.conflicts}, "
+            f"failed={self.failed}, retries={self.retries}, lagged={self.lagged}"
+        )
+
+
+def is_throttled(error: str | Exception) -> bool:
+    """Whether a failed save is worth retrying later, because the wiki is under load or throttling us"""
+    if isinstance(error, APIError):
+        return error.code in THROTTLE_ERROR_CODES
+    return isinstance(error, (MaxlagTimeoutError, ServerError, TimeoutError))
+
+
+def get_edit_bucket(site: pywikibot.site.APISite, max_rate: float = MAX_UPLOAD_RATE) -> TokenBucket:
+    """A token bucket at the edit rate limit the wiki reports for the account, at most ``max_rate``"""
+    limit = site.ratelimit("edit")
+    rate = min(limit.ratio, max_rate) if limit.seconds else max_rate
+    logger.debug(f"Edit rate limit: {limit}, uploading at {rate:.2f}/s")
+    return TokenBucket(rate=rate)
+
+
+class UploadScheduler:
+    """
+    Saves pages to the wiki one at a time, paced by a token bucket.
+
+    Unless given a bucket, saves start at the edit rate limit the wiki reports for the account.
+    The bucket slows down whenever the wiki pushes back: on every ``maxlag`` response, which
+    pywikibot waits out by itself, and when pywikibot runs out of retries on lag, edit throttling
+    or server errors. The page is then retried here once the ``Retry-After`` of the wiki, or
+    ``backoff`` seconds, has passed.
+
+    Every save is recorded in the sync state right away, so an interrupted upload can be run
+    again and picks up where it stopped. Pages are skipped without asking the wiki when their
+    text hashes the same as the last revision we saw or wrote. The other pages are checked,
+    ``PRELOAD_BATCH_SIZE`` titles per request, for edits made on the wiki since we last synced
+    them, and left alone as conflicts if there are any, to be mirrored and merged again.
+    """
+
+    def __init__(
+        self,
+        state: SyncState,
+        session: WikiSession | None = None,
+        bucket: TokenBucket | None = None,
+        max_rate: float = MAX_UPLOAD_RATE,
+        max_attempts: int = 5,
+        backoff: float = 30.0,
+        check_revisions: bool = True,
+    ) -> None:
+        self.state = state
+        self.session = session or get_session()
+        self.bucket = bucket
+        self.max_rate = max_rate
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.check_revisions = check_revisions
+        self.stats = UploadStats()
+
+    def upload(self, pages: Iterable[tuple[str, str, str]]) -> UploadStats:
+        """Save ``(title, text, summary)`` pages, returning the stats of this scheduler so far"""
+        for batch in itertools.batched(pages, PRELOAD_BATCH_SIZE):
+            changed: list[tuple[str, str, str, str]] = []
+            for title, text, summary in batch:
+                hash = get_content_hash(text)
+                if (record := self.state.get(title)) is not None and record.hash == hash:
+                    self.stats.skipped += 1
+                else:
+                    changed.append((title, text, summary, hash))
+            conflicts = self.find_conflicts([title for title, *_ in changed]) if self.check_revisions else set()
+            for title, text, summary, hash in changed:
+                if title not in conflicts:
+                    self.save_page(title, text, summary, hash)
+        logger.info(f"Uploaded pages: {self.stats}" + (f" [rate={self.bucket.rate:.2f}/s]" if self.bucket is not None else ""))
+        return self.stats
+
+    def find_conflicts(self, titles: list[str]) -> set[str]:
+        """
+        Titles whose latest revision on the wiki isn't the last one we saw or wrote,
+        including pages that exist on the wiki but were never mirrored
+        """
+        expected: dict[str, int | None] = {}
+        for title in titles:
+            record = self.state.get(title)
+            if record is None:
+                expected[title] = None
+            elif record.revid is not None:
+                expected[title] = record.revid
+        if not expected:
+            return set()
+        revids = self.session.get_revids(expected)
+        conflicts = {title for title, revid in expected.items() if revids.get(title) != revid}
+        for title in sorted(conflicts):
+            if expected[title] is None:
+                logger.warning(f"Not saving {title}, it exists on the wiki but was never mirrored [revid={revids.get(title)}]")
+            else:
+                logger.warning(
+                    f"Not saving {title}, it was changed on the wiki since the last sync [revid={expected[title]} -> {revids.get(title)}]"
+                )
+        self.stats.conflicts += len(conflicts)
+        return conflicts
+
+    def save_page(self, title: str, text: str, summary: str, hash: str) -> bool:
+        site = self.session.login()
+        if self.bucket is None:
+            self.bucket = get_edit_bucket(site, self.max_rate)
+        with self.watch_lag(site):
+            for attempt in range(1, self.max_attempts + 1):
+                self.bucket.acquire()
+                try:
+                    page = self.session.save(title, text, summary=summary)
+                except PageSaveRelatedError as e:
+                    if not isinstance(e, OtherPageSaveError) or not is_throttled(e.reason):
+                        # refused for this page only, e.g. protected or caught by a filter
+                        logger.error(f"Not saving {title}: {e}")
+                        self.stats.failed += 1
+                        return False
+                    error = e.reason
+                else:
+                    self.state.record(title, hash, page.latest_revision_id, WRITTEN)
+                    self.bucket.recover()
+                    self.stats.saved += 1
+                    return True
+                pause = site.throttle.retry_after or self.backoff
+                logger.warning(f"Saving {title} failed, attempt {attempt}/{self.max_attempts}, pausing {pause}s: {error}")
+                self.bucket.backoff(pause)
+                self.stats.retries += 1
+        logger.error(f"Giving up on saving {title} after {self.max_attempts} attempts")
+        self.stats.failed += 1
+        return False
+
+    @contextmanager
+    def watch_lag(self, site: pywikibot.site.APISite) -> Iterator[None]:
+        """
+        Count and back off on the maxlag responses pywikibot waits out by itself, through the lag()
+        of the site throttle. The throttle is shared by everything using the site, so it is only
+        wrapped while this scheduler saves.
+        """
+        throttle = site.throttle
+        patched = "lag" in vars(throttle)
+        lag = throttle.lag
+
+        def on_lag(lagtime: float | None = None) -> None:
+            self.stats.lagged += 1
+            if self.bucket is not None:
+                self.bucket.backoff()
+            lag(lagtime)
+
+        throttle.lag = on_lag
+        try:
+            yield
+        finally:
+            if patched:
+                throttle.lag = lag
+            else:
+                del throttle.lag
@@ -1,24 +1,29 @@
+import io
+import itertools
 import logging
 import re
+import time
 from collections import defaultdict, deque
+from collections.abc import Iterator
+from dataclasses import dataclass
 from enum import Enum, auto
+from typing import NamedTuple, TextIO
 
 import pywikibot
 
+from vein_wiki_tools.clients.wiki import WikiSession, get_session
+from vein_wiki_tools.services.sync_state import normalize_content
+from vein_wiki_tools.utils.processes import get_process_pool
+
 logger = logging.getLogger(__name__)
 
 
-async def get_page(name: str):
-    site = pywikibot.Site("en", "vein")
-    page = pywikibot.Page(site, name)
-    return page
+async def get_page(name: str, session: WikiSession | None = None) -> pywikibot.Page:
+    return (session or get_session()).page(name)
 
 
-async def write_page(name: str, content: str, summary: str = ""):
-    site = pywikibot.Site("en", "vein")
-    page = pywikibot.Page(site, name)
-    page.text = content
-    page.save(summary=summary)
+async def write_page(name: str, content: str, summary: str = "", session: WikiSession | None = None) -> pywikibot.Page:
+    return (session or get_session()).save(name, content, summary=summary)
 
 
 class ParserFlag(Enum):
@@ -139,54 +144,143 @@ def is_control_line(line: str) -> tuple[ParserFlag, str | None]:
         return ParserFlag.NONE, None
 
 
-async def parse_page(text: str) -> ParsedPage:
-    pre_sections = True
+class Token(NamedTuple):
+    flag: ParserFlag
+    name: str | None
+    line: str
+    # Template nesting depth before this line, lines inside a template are never control lines
+    depth: int = 0
+    header_size: int = 0
+    # For ``{{name start}}`` templates, the name of the matching ``{{name end}}``
+    end: str | None = None
+
+
+def get_template_name(line: str) -> str:
+    name = line[2:]
+    for separator in ("|", "}}"):
+        name = name.split(separator, 1)[0]
+    return name.strip().lower()
+
+
+def tokenize(text: str) -> list[Token]:
+    """
+    Classify every line of a page once.
+
+    Multi-line templates are tracked by counting braces, so a template spans from the
+    line opening it (TEMPLATE_START) to the line bringing the depth back to 0 (TEMPLATE_END).
+    A template that is never closed would swallow every section and category after it,
+    the line opening it is text instead.
+    """
+    lines = text.splitlines()
+    deltas = [line.count("{{") - line.count("}}") for line in lines]
+    # The lowest brace balance from each line to the end of the page: a template opened at
+    # balance b on line i is closed on the page if this drops to b again from i on
+    lowest = list(itertools.accumulate(deltas))
+    for i in range(len(lowest) - 2, -1, -1):
+        lowest[i] = min(lowest[i], lowest[i + 1])
+
+    tokens: list[Token] = []
+    depth = 0
+    balance = 0
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        flag, name, header_size, end = ParserFlag.NONE, None, 0, None
+        new_depth = max(depth + deltas[i], 0)
+
+        if depth == 0 and new_depth > 0 and lowest[i] > balance:
+            new_depth = 0
+        elif depth > 0:
+            if new_depth == 0:
+                flag, name = ParserFlag.TEMPLATE_END, ""
+        elif stripped.startswith("{{"):
+            name = get_template_name(stripped)
+            if new_depth > 0:
+                flag = ParserFlag.TEMPLATE_START
+            elif name.endswith("start"):
+                flag, name = ParserFlag.TEMPLATE_START, name[:-5].strip()
+                end = name
+            elif name.endswith("end"):
+                flag, name = ParserFlag.TEMPLATE_END, name[:-3].strip()
+            else:
+                flag = ParserFlag.TEMPLATE_COMPLETE
+        elif stripped.startswith("="):
+            if match := SECTION_RE.match(stripped):
+                flag, name, header_size = ParserFlag.SECTION, stripped.strip("= ").lower(), len(match.group(1))
+        elif stripped.startswith("[[Category:") and stripped.endswith("]]"):
+            flag, name = ParserFlag.CATEGORIES, stripped[11:-2].strip().lower()
+
+        tokens.append(Token(flag=flag, name=name, line=line, depth=depth, header_size=header_size, end=end))
+        depth = new_depth
+        balance += deltas[i]
+    return tokens
+
+
+def parse_page_sync(text: str) -> ParsedPage:
+    """
+    Build a ParsedPage from the tokens of ``text`` in a single pass.
+
+    - an infobox template before the first section becomes the infobox
+    - other lines before the first section become the pre_section
+    - sections nest by header size, and hold every line up to the next section or category
+    - category lines are collected wherever they are, lines after them are dropped
+    """
     parsed_page = ParsedPage()
-    q: deque[str] = deque()
-    q.extend(text.splitlines())
-
-    while len(q) > 0:
-        line = q[0]
-        logger.debug(f"Processing line: {line}")
-        flag, category_name = is_control_line(line)
-        if flag != ParserFlag.NONE and category_name is None:
-            raise ValueError("Expected category name for control line")
+    pre_sections = True
+    # Sections from the outermost to the one currently receiving lines
+    open_sections: list[ParsedSection] = []
+    # The infobox while its lines are being collected, and the token that opened it
+    infobox: ParsedInfobox | None = None
+    infobox_start: Token | None = None
 
+    for token in tokenize(text):
         # infobox, other templates will be in sections for now
-        if flag == ParserFlag.TEMPLATE_START and category_name is not None:
-            if pre_sections and "infobox" in category_name.lower():
-                category_name = "infobox"
-                parsed_page.infobox = await parse_infobox(q)
+        if infobox is not None and infobox_start is not None:
+            infobox.lines.append(token.line)
+            if token.flag == ParserFlag.TEMPLATE_END:
+                if token.depth > 0 if infobox_start.end is None else token.name == infobox_start.end:
+                    infobox = infobox_start = None
             continue
-        # sections
-        elif flag == ParserFlag.SECTION and category_name is not None:
-            pre_sections = False
-            section = await parse_sections(q)
-            if section is None:
-                logger.error("Section parsing returned None")
+        if token.depth == 0:
+            flag = token.flag
+            if flag == ParserFlag.TEMPLATE_START or flag == ParserFlag.TEMPLATE_COMPLETE:
+                if pre_sections and parsed_page.infobox is None and token.name is not None and "infobox" in token.name:
+                    parsed_page.infobox = ParsedInfobox(name="infobox", lines=[token.line])
+                    if flag == ParserFlag.TEMPLATE_START:
+                        infobox, infobox_start = parsed_page.infobox, token
+                    continue
+            # sections
+            elif flag == ParserFlag.SECTION:
+                pre_sections = False
+                section = ParsedSection(name=token.name or "", header_size=token.header_size, lines=[token.line])
+                while open_sections and open_sections[-1].header_size >= section.header_size:
+                    open_sections.pop()
+                if open_sections:
+                    open_sections[-1].children[section.name] = section
+                else:
+                    parsed_page.sections[section.name] = section
+                open_sections.append(section)
                 continue
-            parsed_page.sections[section.name] = section
-            continue
-        # loose text before sections, i.e. pre_section
-        elif flag == ParserFlag.NONE and category_name is None:
-            if pre_sections:
-                if parsed_page.pre_section is None:
-                    parsed_page.pre_section = ParsedText()
-                parsed_page.pre_section.lines.append(q.popleft())
+            # categories
+            elif flag == ParserFlag.CATEGORIES:
+                parsed_page.categories.append(token.line)
+                open_sections.clear()
                 continue
-            logger.debug(f"No place to put line, skipping: {q.popleft()}")
-        # categories
-        elif flag == ParserFlag.CATEGORIES and category_name is not None:
-            parsed_page.categories.extend(await parse_categories(q))
-            continue
-        # unhandled
-        else:
-            logger.error(f"Unhandled parser state: {flag}, {category_name}")
-            raise ValueError("Unhandled parser state")
+
+        if open_sections:
+            open_sections[-1].lines.append(token.line)
+        # loose text before sections, i.e. pre_section
+        elif pre_sections:
+            if parsed_page.pre_section is None:
+                parsed_page.pre_section = ParsedText()
+            parsed_page.pre_section.lines.append(token.line)
 
     return parsed_page
 
 
+async def parse_page(text: str) -> ParsedPage:
+    return parse_page_sync(text)
+
+
 async def parse_infobox(q: deque[str]) -> ParsedInfobox:
     infobox = ParsedInfobox(name="infobox")
     while len(q) > 0:
@@ -247,6 +341,10 @@ async def parse_categories(q: deque[str]) -> list[str]:
 
 
 async def merge_pages(original: ParsedPage, new: ParsedPage) -> ParsedPage:
+    return merge_pages_sync(original, new)
+
+
+def merge_pages_sync(original: ParsedPage, new: ParsedPage) -> ParsedPage:
     merged = ParsedPage()
     processed_parts = []
 
@@ -295,17 +393,103 @@ async def merge_pages(original: ParsedPage, new: ParsedPage) -> ParsedPage:
     return merged
 
 
-async def render_page(parsed_page: ParsedPage) -> str:
-    page = ""
+class PageWriter:
+    """
+    Writes page lines to a text stream, with the same result as joining them with newlines
+    and stripping the whole page, without holding the page in memory.
+    """
+
+    def __init__(self, out: TextIO) -> None:
+        self.out = out
+        # The last non-blank line and the blank lines after it, held back until we know whether they end the page
+        self.last: str | None = None
+        self.blank: list[str] = []
+
+    def write(self, line: str) -> None:
+        if not line.strip():
+            if self.last is not None:
+                self.blank.append(line)
+            return
+        if self.last is None:
+            line = line.lstrip()
+        else:
+            self.out.write(self.last)
+            for blank in self.blank:
+                self.out.write("\n")
+                self.out.write(blank)
+            self.out.write("\n")
+            self.blank.clear()
+        self.last = line
+
+    def close(self) -> None:
+        if self.last is not None:
+            self.out.write(self.last.rstrip())
+        self.last = None
+        self.blank.clear()
+
+
+def write_section(writer: PageWriter, section: ParsedSection) -> None:
+    for line in section.lines:
+        writer.write(line)
+    for child in section.children.values():
+        write_section(writer, child)
+
+
+def serialize_page(parsed_page: ParsedPage, out: TextIO) -> None:
+    """Write a parsed page to ``out`` in one pass, including the child sections of every section"""
+    writer = PageWriter(out)
     if parsed_page.infobox is not None:
         for line in parsed_page.infobox.lines:
-            page += f"{line}\n"
+            writer.write(line)
     if parsed_page.pre_section is not None:
         for line in parsed_page.pre_section.lines:
-            page += f"{line}\n"
-    for section in parsed_page.sections:
-        block_lines: list[str] = parsed_page.sections[section].lines
-        page += "\n".join(block_lines) + "\n"
+            writer.write(line)
+    for section in parsed_page.sections.values():
+        write_section(writer, section)
     for category in parsed_page.categories:
-        page += f"{category}\n"
-    return page.strip()
+        writer.write(category)
+    writer.close()
+
+
+def render_page_sync(parsed_page: ParsedPage) -> str:
+    out = io.StringIO()
+    serialize_page(parsed_page, out)
+    return out.getvalue()
+
+
+async def render_page(parsed_page: ParsedPage) -> str:
+    return render_page_sync(parsed_page)
+
+
+@dataclass
+class PageMerge:
+    name: str
+    text: str
+    changed: bool
+    seconds: float
+
+
+def merge_page_text(existing: str, new: str) -> str:
+    """Parse both texts, merge the new page into the existing one and render the result"""
+    return render_page_sync(merge_pages_sync(parse_page_sync(existing), parse_page_sync(new)))
+
+
+def merge_all(pages: list[tuple[str, str, str]], workers: int = 1, chunk_size: int = 16) -> Iterator[PageMerge]:
+    """
+    Merge ``(name, existing, new)`` page texts, yielding the results in the same order as ``pages``.
+
+    With more than one worker, parsing and merging are spread over a process pool.
+    """
+    if workers <= 1 or len(pages) <= chunk_size:
+        yield from map(_merge_page, pages)
+        return
+    with get_process_pool(workers) as executor:
+        yield from executor.map(_merge_page, pages, chunksize=chunk_size)
+
+
+def _merge_page(page: tuple[str, str, str]) -> PageMerge:
+    name, existing, new = page
+    start = time.perf_counter()
+    text = merge_page_text(existing, new)
+    changed = normalize_content(text) != normalize_content(existing)
+    return PageMerge(name=name, text=text, changed=changed, seconds=time.perf_counter() - start)
@@ -4,6 +4,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class VeinSettings(BaseSettings):
     vein_pak_dump_root: Path
+    vein_model_cache_path: Path | None = None
 
     model_config = SettingsConfigDict(
         env_file=".env",
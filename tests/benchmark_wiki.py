@@ -0,0 +1,112 @@
+"""
+Time the sync path against the local stand-in of the wiki, one line per stage.
+
+Reads and edits go through the real client code, pywikibot included, only the wiki is fake.
+Run from the repository root, with VEIN_PAK_DUMP_ROOT set:
+
+    python -m tests.benchmark_wiki --pages 2000 --edits 1000
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pywikibot
+
+from tests.fake_wiki import BOT_PASSWORD_NAME, PASSWORD, FakeWiki, Fault
+from vein_wiki_tools.clients.wiki import WikiSession
+from vein_wiki_tools.services import auth
+from vein_wiki_tools.services.mirror import mirror_pages
+from vein_wiki_tools.services.sync_state import SyncState
+from vein_wiki_tools.services.upload import TokenBucket, UploadScheduler
+from vein_wiki_tools.services.wiki_pages import get_page, write_page
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark wiki reads and edits against a local fake wiki")
+    parser.add_argument("--pages", type=int, default=2000, help="pages on the wiki, all read once one by one and once preloaded")
+    parser.add_argument("--edits", type=int, default=1000, help="pages edited one by one, and then through the upload scheduler")
+    parser.add_argument("--lag-every", type=int, default=100, help="answer every nth upload with maxlag, 0 = never")
+    return parser.parse_args(argv)
+
+
+def timed(name: str, calls: int, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / calls * 1000 if calls else 0.0
+    rate = calls / elapsed if elapsed else 0.0
+    print(f"{name:<24} {calls:>8} calls {elapsed:>8.2f} s {per_call:>8.2f} ms/call {rate:>8.1f} calls/s")
+    return elapsed
+
+
+def configure_pywikibot(base_dir: Path, wiki: FakeWiki) -> WikiSession:
+    """Point pywikibot at the fake wiki, logging in with its bot password, without pywikibot pacing the edits"""
+    password_file = base_dir / "user-password.cfg"
+    password_file.write_text(f'("{wiki.user}", BotPassword("{BOT_PASSWORD_NAME}", "{PASSWORD}"))\n')
+    password_file.chmod(0o600)
+    pywikibot.config.base_dir = str(base_dir)
+    pywikibot.config.password_file = str(password_file)
+    pywikibot.config.put_throttle = 0
+    pywikibot.config.retry_wait = 0
+    fam = wiki.get_family()
+    pywikibot.config.usernames[fam.name] = {"en": wiki.user}
+    return WikiSession(fam=fam)
+
+
+async def read_pages(titles: list[str], session: WikiSession) -> None:
+    for title in titles:
+        (await get_page(title, session=session)).text
+
+
+async def write_pages(pages: list[tuple[str, str]], session: WikiSession) -> None:
+    for title, text in pages:
+        await write_page(title, text, summary="benchmark", session=session)
+
+
+def run(wiki: FakeWiki, session: WikiSession, state: SyncState, pages: int, edits: int, lag_every: int = 0) -> dict[str, float]:
+    """Time every stage of the sync path, return the seconds per stage"""
+    titles = [f"Page {i}" for i in range(pages)]
+    for title in titles:
+        wiki.add_page(title, f"Text of {title}", user="Someone")
+    edited = titles[:edits]
+    new_texts = [(title, f"New text of {title}") for title in edited]
+    uploads = [(title, f"Uploaded text of {title}", "benchmark") for title in edited]
+    scheduler = UploadScheduler(state, session=session, bucket=TokenBucket(rate=1_000_000.0), backoff=0.01)
+
+    timings = {
+        "login": timed("login", 1, lambda: asyncio.run(auth.login(session))),
+        "get_page": timed("get_page", pages, lambda: asyncio.run(read_pages(titles, session))),
+        "preload": timed("preload", pages, lambda: list(session.preload(titles))),
+        "write_page": timed("write_page", edits, lambda: asyncio.run(write_pages(new_texts, session))),
+        # the scheduler only saves over pages it has seen
+        "mirror": timed("mirror", pages, lambda: mirror_pages(titles, root=state.path.parent / "wiki", session=session, state=state)),
+        "revids": timed("revision check", edits, lambda: session.get_revids(edited)),
+    }
+    if lag_every:
+        wiki.inject(*(Fault("edit", code="maxlag", lag=0.01) for _ in range(edits // lag_every)))
+    timings["upload"] = timed("upload", edits, lambda: scheduler.upload(uploads))
+    timings["upload no-op"] = timed("upload no-op", edits, lambda: scheduler.upload(uploads))
+    print(f"upload: {scheduler.stats}")
+    return timings
+
+
+def main(args: argparse.Namespace) -> None:
+    # a log line per request would be most of the time measured
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp, FakeWiki() as wiki:
+        session = configure_pywikibot(Path(tmp), wiki)
+        state = SyncState(Path(tmp) / "sync_state.sqlite")
+        run(wiki, session, state, args.pages, args.edits, args.lag_every)
+        state.close()
+        print(f"requests: {dict(sorted(wiki.requests.items()))}")
+        for operation, latency in sorted(session.stats.items()):
+            print(f"wiki {operation:<19} {latency}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,75 @@
+import os
+import shutil
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from vein_wiki_tools.clients.pakdump import cache, services
+from vein_wiki_tools.clients.pakdump.cache import ModelCache
+from vein_wiki_tools.clients.pakdump.models import UEBlueprintGeneratedClass
+from vein_wiki_tools.clients.pakdump.tools import UETool
+
+
+async def test_model_cache_roundtrip(testfiles: Path, tmp_path: Path):
+    path = testfiles / "Vein" / "Tools" / "T_BasicCutting.json"
+    ue_model = services.get_ue_model_by_path(path)
+    model_cache = ModelCache(tmp_path / "models.sqlite")
+
+    assert model_cache.get(path) is None
+    model_cache.put(path, ue_model, (path,))
+    cached = model_cache.get(path)
+
+    assert cached is not None
+    cached_model, sources = cached
+    assert isinstance(cached_model, UETool)
+    assert cached_model == ue_model
+    assert sources == (path,)
+    assert model_cache.stats.hits == 1
+    assert model_cache.stats.misses == 1
+    assert model_cache.stats.writes == 1
+
+
+async def test_model_cache_invalidated_by_mtime(testfiles: Path, tmp_path: Path):
+    path = tmp_path / "T_BasicCutting.json"
+    shutil.copy(testfiles / "Vein" / "Tools" / "T_BasicCutting.json", path)
+    model_cache = ModelCache(tmp_path / "models.sqlite")
+    model_cache.put(path, services.get_ue_model_by_path(path), (path,))
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert model_cache.get(path) is None
+    assert model_cache.stats.invalidations == 1
+    # the stale entry is dropped, so the next lookup is a plain miss
+    assert model_cache.get(path) is None
+    assert model_cache.stats.invalidations == 1
+    assert model_cache.stats.misses == 2
+
+
+async def test_model_cache_invalidated_by_fingerprint(testfiles: Path, tmp_path: Path):
+    path = testfiles / "Vein" / "Tools" / "T_BasicCutting.json"
+    ue_model = services.get_ue_model_by_path(path)
+    ModelCache(tmp_path / "models.sqlite", fingerprint="old").put(path, ue_model, (path,))
+
+    model_cache = ModelCache(tmp_path / "models.sqlite", fingerprint="new")
+    assert model_cache.get(path) is None
+    assert model_cache.stats.invalidations == 1
+
+
+async def test_get_ue_model_uses_model_cache(testfiles: Path, tmp_path: Path, mocker: MockerFixture):
+    model_cache = ModelCache(tmp_path / "models.sqlite")
+    mocker.patch.object(cache, "_model_cache", model_cache)
+    path = testfiles / "Vein" / "Items" / "Weapons" / "Melee" / "Crafted" / "BP_Melee_ClawSword.json"
+
+    services.get_ue_model_and_sources_by_path.cache_clear()
+    cold, cold_sources = services.get_ue_model_and_sources_by_path(path)
+    services.get_ue_model_and_sources_by_path.cache_clear()
+    get_type = mocker.spy(services, "get_type")
+    warm, warm_sources = services.get_ue_model_and_sources_by_path(path)
+    services.get_ue_model_and_sources_by_path.cache_clear()
+
+    assert isinstance(warm, UEBlueprintGeneratedClass)
+    assert warm == cold
+    assert warm_sources == cold_sources
+    assert get_type.call_count == 0
+    assert model_cache.stats.hits >= 1
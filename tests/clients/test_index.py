@@ -0,0 +1,96 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from vein_wiki_tools.clients.pakdump.index import PakdumpIndex, get_pakdump_index, normalize_object_name, normalize_object_path
+from vein_wiki_tools.clients.pakdump.models import UEReference
+from vein_wiki_tools.clients.pakdump.services import get_path_by_reference
+
+
+@pytest.mark.parametrize(
+    "object_path,expected",
+    [
+        ("Vein/Content/Vein/Items/Ammo/BP_Ammo_9mm.0", "items/ammo/bp_ammo_9mm"),
+        ("/Game/Vein/Items/Ammo/BP_Ammo_9mm.1", "items/ammo/bp_ammo_9mm"),
+        ("Vein/Items/Ammo/BP_Ammo_9mm.0", "items/ammo/bp_ammo_9mm"),
+        ("/Script/Vein", "script/vein"),
+    ],
+)
+async def test_normalize_object_path(object_path: str, expected: str):
+    assert normalize_object_path(object_path) == expected
+
+
+@pytest.mark.parametrize(
+    "object_name,expected",
+    [
+        ("BlueprintGeneratedClass'BP_Ammo_9mm_C'", "bp_ammo_9mm"),
+        ("ItemType'IT_Ammo'", "it_ammo"),
+        ("BP_Ammo_9mm", "bp_ammo_9mm"),
+    ],
+)
+async def test_normalize_object_name(object_name: str, expected: str):
+    assert normalize_object_name(object_name) == expected
+
+
+async def test_resolve_by_path_and_name(testfiles: Path):
+    root = testfiles / "Vein"
+    index = PakdumpIndex.build(root)
+    by_path = UEReference(object_name="Unknown'Unknown'", object_path="Vein/Content/Vein/Items/Ammo/BP_Ammo_9mm.0")
+    by_name = UEReference(object_name="BlueprintGeneratedClass'BP_Ammo_9mm_C'", object_path="/Game/Moved/BP_Ammo_9mm.0")
+
+    assert index.resolve(by_path) == root / "Items" / "Ammo" / "BP_Ammo_9mm.json"
+    assert index.resolve(by_name) == root / "Items" / "Ammo" / "BP_Ammo_9mm.json"
+    assert not index.unresolved
+
+
+async def test_unresolved_references_are_reported(testfiles: Path):
+    index = PakdumpIndex.build(testfiles / "Vein")
+    missing = UEReference(object_name="ItemType'IT_Ammo'", object_path="Vein/Content/Vein/ItemTypes/IT_Ammo.0")
+
+    assert index.resolve(missing) is None
+    assert index.report_unresolved() == ["ItemType'IT_Ammo' (Vein/Content/Vein/ItemTypes/IT_Ammo.0)"]
+
+
+async def test_ambiguous_names_need_a_path(testfiles: Path):
+    index = PakdumpIndex.from_files(root=testfiles, files=["a/BP_Thing.json", "b/BP_Thing.json"])
+    reference = UEReference(object_name="BlueprintGeneratedClass'BP_Thing_C'", object_path="Vein/Content/Vein/c/BP_Thing.0")
+
+    assert "bp_thing" in index.ambiguous_names
+    assert index.resolve(reference) is None
+
+
+async def test_index_save_and_load(testfiles: Path, tmp_path: Path):
+    root = testfiles / "Vein"
+    index = PakdumpIndex.build(root)
+    index.save(tmp_path / "index.json")
+    loaded = PakdumpIndex.load(root=root, path=tmp_path / "index.json")
+
+    assert loaded is not None
+    assert loaded.paths == index.paths
+    assert loaded.names == index.names
+
+
+async def test_index_load_rejects_changed_pakdump(testfiles: Path, tmp_path: Path):
+    root = tmp_path / "Vein"
+    shutil.copytree(testfiles / "Vein" / "Items" / "Ammo", root / "Items" / "Ammo")
+    PakdumpIndex.build(root).save(tmp_path / "index.json")
+
+    (root / "Tools").mkdir()
+
+    assert PakdumpIndex.load(root=root, path=tmp_path / "index.json") is None
+
+
+async def test_get_path_by_reference_rebuilds_stale_index(testfiles: Path, tmp_path: Path):
+    root = tmp_path / "Vein"
+    shutil.copytree(testfiles / "Vein" / "Items" / "Ammo", root / "Items" / "Ammo")
+    get_pakdump_index.cache_clear()
+    get_pakdump_index(root)
+    # a file moved deeper in the pakdump leaves the folders right under the root as they are
+    (root / "Items" / "Ammo" / "Moved").mkdir()
+    (root / "Items" / "Ammo" / "BP_Ammo_9mm.json").rename(root / "Items" / "Ammo" / "Moved" / "BP_Ammo_9mm.json")
+    get_pakdump_index.cache_clear()
+    reference = UEReference(object_name="BlueprintGeneratedClass'BP_Ammo_9mm_C'", object_path="Vein/Content/Vein/Items/Ammo/BP_Ammo_9mm.0")
+
+    assert get_path_by_reference(reference, _root=root) == root / "Items" / "Ammo" / "Moved" / "BP_Ammo_9mm.json"
+    get_pakdump_index.cache_clear()
@@ -1,8 +1,18 @@
 from pathlib import Path
 
 import pytest
+from pytest_mock import MockerFixture
 
-from vein_wiki_tools.clients.pakdump.models import UEBlueprintGeneratedClass, UEModelInfo, UEReference
+from vein_wiki_tools.clients.pakdump import get_subclass_type
+from vein_wiki_tools.clients.pakdump.models import (
+    UE_TYPE_REGISTRY,
+    UEBlueprintGeneratedClass,
+    UEModel,
+    UEModelInfo,
+    UEReference,
+    register_ue_type,
+)
+from vein_wiki_tools.clients.pakdump.tools import UETool
 from vein_wiki_tools.clients.pakdump.services import get_ue_model_by_path, get_ue_model_by_reference
 
 
@@ -58,3 +68,66 @@ async def test_model_info():
     model_info = UEModelInfo()
     model_info.categories.add("moo")
     assert isinstance(model_info.categories, set)
+
+
+@pytest.mark.parametrize("type_name", ["Tool", "tool", "UETool"])
+async def test_get_subclass_type(type_name: str):
+    assert get_subclass_type(type_name) is UETool
+
+
+async def test_get_subclass_type_unknown():
+    assert get_subclass_type("NotAType") is None
+    assert get_subclass_type(None) is None
+
+
+async def test_subclasses_register_themselves(mocker: MockerFixture):
+    mocker.patch.dict(UE_TYPE_REGISTRY)
+
+    class UEPluginModel(UEModel):
+        pass
+
+    assert get_subclass_type("PluginModel") is UEPluginModel
+
+
+async def test_register_ue_type(mocker: MockerFixture):
+    mocker.patch.dict(UE_TYPE_REGISTRY)
+    register_ue_type("ToolAlias", UETool)
+    assert get_subclass_type("ToolAlias") is UETool
+
+
+def create_item_model() -> UEModel:
+    return UEModel(
+        type="BlueprintGeneratedClass",
+        name="BP_Melee_Shovel_C",
+        super_struct=UEReference(object_name="Class'Item'", object_path="/Script/Vein"),
+    )
+
+
+async def test_model_info_is_computed_once(mocker: MockerFixture):
+    classify = mocker.spy(UEModel, "classify")
+    ue_model = create_item_model()
+
+    assert ue_model.model_info.super_type == "item"
+    assert ue_model.model_info is ue_model.model_info
+    assert classify.call_count == 1
+
+
+async def test_model_info_is_not_shared(testfiles: Path):
+    ammo = get_ue_model_by_path(testfiles / "Vein" / "Items" / "Ammo" / "BP_Ammo_9mm.json")
+    tool = get_ue_model_by_path(testfiles / "Vein" / "Tools" / "T_BasicCutting.json")
+    ammo.model_info.categories.add("Ammo")
+
+    assert ammo.model_info is not tool.model_info
+    assert "Ammo" not in tool.model_info.categories
+
+
+async def test_set_console_name():
+    ue_model = create_item_model()
+    ue_model.model_info.categories.add("Tools")
+    assert ue_model.model_info.sub_type is None
+
+    ue_model.set_console_name("BP_Melee_Shovel")
+
+    assert ue_model.model_info.console_name == "BP_Melee_Shovel"
+    assert ue_model.model_info.sub_type == "melee"
+    assert "Tools" in ue_model.model_info.categories
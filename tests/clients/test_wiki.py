@@ -0,0 +1,110 @@
+import pickle
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+from pywikibot.exceptions import NoPageError, NoUsernameError
+
+from tests import benchmark_wiki
+from tests.fake_wiki import FakeWiki
+from vein_wiki_tools.clients import wiki
+from vein_wiki_tools.clients.wiki import WikiSession
+from vein_wiki_tools.scripts import test_bot_writing
+from vein_wiki_tools.services import auth, wiki_pages
+from vein_wiki_tools.services.sync_state import SyncState
+
+
+async def test_wiki_session_reuses_site(mocker: MockerFixture):
+    site = mocker.patch.object(wiki.pywikibot, "Site", autospec=True)
+    page = mocker.patch.object(wiki.pywikibot, "Page", autospec=True)
+    page.return_value.get.side_effect = ["first", NoPageError(page.return_value)]
+    session = WikiSession()
+
+    assert session.fetch("Shovel") == "first"
+    assert session.fetch("Missing") is None
+    await wiki_pages.write_page("Shovel", "text", summary="update", session=session)
+    await auth.login(session)
+
+    site.assert_called_once_with("en", "vein")
+    site.return_value.login.assert_called_once_with()
+    page.return_value.save.assert_called_once_with(summary="update")
+    assert session.stats["site"].calls == 1
+    assert session.stats["login"].calls == 1
+    assert session.stats["fetch"].calls == 2
+    assert session.stats["save"].calls == 1
+
+
+async def test_wiki_session_is_borrowed_by_default(mocker: MockerFixture):
+    site = mocker.patch.object(wiki.pywikibot, "Site", autospec=True)
+    mocker.patch.object(wiki.pywikibot, "Page", autospec=True)
+    session = WikiSession()
+    mocker.patch.object(wiki, "_session", session)
+
+    await wiki_pages.get_page("Shovel")
+    await wiki.read_page("Shovel")
+
+    assert wiki.get_session() is session
+    site.assert_called_once_with("en", "vein")
+    assert session.stats["fetch"].calls == 1
+
+
+async def test_wiki_session_pickles_without_site(mocker: MockerFixture):
+    mocker.patch.object(wiki.pywikibot, "Site", autospec=True)
+    session = WikiSession()
+    assert session.site is not None
+    session.stats["fetch"].record(0.5)
+
+    restored = pickle.loads(pickle.dumps(session))
+
+    assert restored._site is None
+    assert restored.stats["fetch"].calls == 1
+
+
+async def test_pages_through_fake_wiki(fake_wiki: FakeWiki, wiki_session: WikiSession):
+    fake_wiki.add_page("Shovel", "old")
+
+    # reading doesn't need a login
+    assert (await wiki_pages.get_page("Shovel", session=wiki_session)).text == "old"
+    assert "login" not in fake_wiki.requests
+    site = await auth.login(wiki_session)
+    await wiki_pages.write_page("Shovel", "new", summary="update", session=wiki_session)
+    await test_bot_writing.main(session=wiki_session)
+
+    assert site.user() == fake_wiki.user
+    assert fake_wiki.requests["login"] == 1
+    assert fake_wiki.pages["Shovel"].latest.text == "new"
+    assert fake_wiki.pages["Shovel"].latest.user == fake_wiki.user
+    assert fake_wiki.pages[test_bot_writing.TEST_PAGE].latest.text == test_bot_writing.test_text
+
+
+async def test_login_again_when_the_session_ends(fake_wiki: FakeWiki, wiki_session: WikiSession):
+    wiki_session.save("Shovel", "old")
+    fake_wiki.sessions.clear()
+
+    wiki_session.save("Shovel", "new")
+
+    assert fake_wiki.requests["login"] == 2
+    assert fake_wiki.pages["Shovel"].latest.text == "new"
+
+
+async def test_login_with_wrong_password(pywikibot_config, mocker: MockerFixture):
+    with FakeWiki(password="other") as fake_wiki:
+        fam = fake_wiki.get_family()
+        mocker.patch.dict(pywikibot_config.usernames, {fam.name: {"en": fake_wiki.user}})
+
+        with pytest.raises(NoUsernameError, match="Failed"):
+            await auth.login(WikiSession(fam=fam))
+
+
+def test_benchmark_against_fake_wiki(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    # not async, the benchmark runs the async page functions itself
+    timings = benchmark_wiki.run(fake_wiki, wiki_session, SyncState(tmp_path / "sync_state.sqlite"), pages=120, edits=60, lag_every=30)
+
+    assert list(timings) == ["login", "get_page", "preload", "write_page", "mirror", "revids", "upload", "upload no-op"]
+    # every page edited through write_page, and then through the upload scheduler, twice answered with maxlag first
+    assert fake_wiki.requests["edit"] == 60 + 60 + 2
+    assert fake_wiki.requests["login"] == 1
+    # 60 titles are two batches, checked once by the benchmark and once by the first upload
+    assert wiki_session.stats["revids"].calls == 2 + 2
+    assert fake_wiki.pages["Page 59"].latest.text == "Uploaded text of Page 59"
+    assert fake_wiki.pages["Page 60"].latest.text == "Text of Page 60"
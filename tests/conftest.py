@@ -1,8 +1,12 @@
 from pathlib import Path
 
 import pytest
+import pywikibot
 from pytest_mock import MockerFixture
 
+from tests.fake_wiki import BOT_PASSWORD_NAME, PASSWORD, FakeWiki
+from vein_wiki_tools.clients.pakdump import index
+from vein_wiki_tools.clients.wiki import WikiSession
 from vein_wiki_tools.utils import file_helper
 
 
@@ -19,3 +23,41 @@ async def mock_vein_root(mocker: MockerFixture, testfiles: Path):
         autospec=True,
         return_value=testfiles,
     )
+
+
+@pytest.fixture(autouse=True)
+def mock_pakdump_index_path(mocker: MockerFixture, tmp_path_factory: pytest.TempPathFactory):
+    # Keep the persisted pakdump index out of the testfiles
+    index_dir = tmp_path_factory.mktemp("pakdump_index")
+    mocker.patch.object(index, index.get_index_path.__name__, side_effect=lambda root: index_dir / index.PAKDUMP_INDEX_FILENAME)
+
+
+@pytest.fixture(scope="session")
+def pywikibot_config(tmp_path_factory: pytest.TempPathFactory):
+    # pywikibot keeps its api cache and throttle file in its base dir, and its sites outlive a test
+    base_dir = tmp_path_factory.mktemp("pywikibot")
+    # the fake wikis take the bot password of user-password.cfg
+    password_file = base_dir / "user-password.cfg"
+    password_file.write_text(f'("VeinBot", BotPassword("{BOT_PASSWORD_NAME}", "{PASSWORD}"))\n')
+    password_file.chmod(0o600)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(pywikibot.config, "base_dir", str(base_dir))
+        monkeypatch.setattr(pywikibot.config, "password_file", str(password_file))
+        # leave pacing to the code under test, and retry failed requests right away
+        monkeypatch.setattr(pywikibot.config, "put_throttle", 0)
+        monkeypatch.setattr(pywikibot.config, "retry_wait", 0)
+        monkeypatch.setattr(pywikibot.config, "max_retries", 2)
+        yield pywikibot.config
+
+
+@pytest.fixture
+def fake_wiki(pywikibot_config):
+    with FakeWiki() as wiki:
+        yield wiki
+
+
+@pytest.fixture
+def wiki_session(fake_wiki: FakeWiki, mocker: MockerFixture):
+    fam = fake_wiki.get_family()
+    mocker.patch.dict(pywikibot.config.usernames, {fam.name: {"en": fake_wiki.user}})
+    return WikiSession(fam=fam)
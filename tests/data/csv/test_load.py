@@ -1,4 +1,11 @@
-from vein_wiki_tools.data.csv.load import csv_read
+import csv
+from pathlib import Path
+
+import pytest
+
+from vein_wiki_tools.data.csv.load import csv_iter, csv_read, to_item
+from vein_wiki_tools.data.csv.models import strings_equal_to_none
+from vein_wiki_tools.models.items import Item
 from vein_wiki_tools.utils.file_helper import get_full_file_path
 
 
@@ -6,3 +13,80 @@ async def test_csv_read():
     test_file_path = get_full_file_path("tests/data/csv/vein_items_subset.csv")
     item_list = await csv_read(test_file_path)
     assert len(item_list) == 1
+
+
+def write_sheet(path: Path, rows: list[dict[str, str]]) -> Path:
+    with open(get_full_file_path("tests/data/csv/vein_items_subset.csv"), encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f))
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=header, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+async def read_with_to_item(path: Path) -> list[Item]:
+    with open(path, encoding="utf-8", newline="") as f:
+        return [to_item(row) for row in csv.DictReader(f)]
+
+
+async def test_csv_read_matches_to_item(tmp_path: Path):
+    rows = [
+        {
+            "FileName": f"BP_Item_{i}.json",
+            "Name": f"Item {i}",
+            "Description": f"Item   number {i}.  Useful. ",
+            "Category": "Tools",
+            "Weight": f"{i / 7:.6f}",
+            "Stackable": stackable,
+            "StackSize": stack_size,
+            "Capacity": capacity,
+            "RepairTools": "None" if i % 2 else "Hammer",
+            **{f"RepairIngredient{j}_Name": f"Part {j}" for j in range(1, i % 5)},
+            **{f"RepairIngredient{j}_Qty": str(j - 1) for j in range(1, i % 5)},
+            **{f"DismantleResult{j}_Name": f"Scrap {j}" for j in range(1, i % 37)},
+            **{f"DismantleResult{j}_MinQty": "1" for j in range(1, i % 37)},
+            **{f"DismantleResult{j}_MaxQty": str(j) for j in range(1, i % 37)},
+        }
+        for i, (stackable, stack_size, capacity) in enumerate(
+            [("TRUE", "10", "N/A"), ("FALSE", "0", ""), ("", "null", "5"), ("true", "NaN", r"N\/A"), ("False", "", "{}")] * 10
+        )
+    ]
+    # a gap in the groups, and a group without a quantity
+    rows[0] |= {"RepairIngredient3_Name": "Glue", "RepairIngredient3_Qty": "2", "DismantleResult5_Name": "Bolt"}
+    path = write_sheet(tmp_path / "items.csv", rows)
+
+    items = await csv_read(path)
+
+    assert items == await read_with_to_item(path)
+    assert [(r.name, r.quantity) for r in items[0].repair_ingredients] == [("Glue", 2)]
+    assert len(items[36].dismantle_results) == 35
+    assert items[0].description == "Item<br><br>number 0.<br><br>Useful."
+    assert (items[0].capacity, items[1].stackable, items[3].stackable) == (None, False, True)
+
+
+async def test_csv_iter_matches_csv_read():
+    test_file_path = get_full_file_path("tests/data/csv/vein_items_subset.csv")
+
+    items = [item async for item in csv_iter(test_file_path, batch_size=1)]
+
+    assert items == await csv_read(test_file_path) == await read_with_to_item(test_file_path)
+
+
+async def test_csv_iter_in_batches(tmp_path: Path):
+    path = write_sheet(
+        tmp_path / "items.csv",
+        [{"FileName": f"BP_{i}.json", "Name": f"Item {i}", "Description": "Ammo.", "Category": "Ammo", "Weight": "1"} for i in range(5)],
+    )
+
+    assert [item.name async for item in csv_iter(path, batch_size=2)] == [f"Item {i}" for i in range(5)]
+
+
+@pytest.mark.parametrize("value", ["", "0", "null", "undefined", "None", "NaN", "[]", "{}", "()", "''", '""', "N/A", r"N\/A"])
+async def test_strings_equal_to_none(value: str):
+    assert strings_equal_to_none(value) is None
+
+
+@pytest.mark.parametrize("value", ["none", " ", "0.0", 0, None, "Hammer"])
+async def test_strings_not_equal_to_none(value):
+    assert strings_equal_to_none(value) == value
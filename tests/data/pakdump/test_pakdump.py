@@ -1,3 +1,5 @@
+from vein_wiki_tools.clients.pakdump import cache
+from vein_wiki_tools.clients.pakdump.cache import ModelCache
 from vein_wiki_tools.clients.pakdump.consumables import UEFluidDefinition
 from vein_wiki_tools.clients.pakdump.firearms import UEBulletType
 from vein_wiki_tools.clients.pakdump.models import UEBlueprintGeneratedClass, UEItemType, UEModel
@@ -6,15 +8,18 @@ from vein_wiki_tools.clients.pakdump.tools import UETool
 from vein_wiki_tools.data.models import Graph
 from vein_wiki_tools.data.pakdump.pakdump import (
     PakdumpData,
+    get_folder_files,
     import_all,
     import_ammo,
     import_bullet_types,
+    import_files,
     import_firearms,
     import_fluids,
     import_itemtypes,
     import_magazines,
     import_tool_groups,
     pakdump_graph,
+    resolve_links,
 )
 from vein_wiki_tools.models.common import LinkType
 
@@ -192,3 +197,91 @@ async def test_import_all():
     data = create_pakdump_data()
     await import_all(data)
     assert len(data.graph.nodes) >= 255
+
+
+def graph_signature(graph: Graph) -> list:
+    return [
+        (
+            key,
+            type(node.ue_model),
+            node.ue_model.model_dump(),
+            node.ue_model.model_info.console_name,
+            [(linktype, n.id) for linktype, n in node.edges],
+            [(linktype, n.id) for linktype, n in node.neighbours],
+        )
+        for key, node in graph.nodes.items()
+    ]
+
+
+async def test_import_files_parallel_matches_serial(testfiles):
+    root = testfiles / "Vein"
+    files = [
+        *get_folder_files(root / "Fluids"),
+        *get_folder_files(root / "Items" / "Tools"),
+        *get_folder_files(root / "Items" / "Weapons" / "Melee" / "Crafted"),
+        *get_folder_files(root / "Tools"),
+    ]
+    serial = create_pakdump_data()
+    await import_files(data=serial, files=files)
+    parallel = create_pakdump_data()
+    parallel.workers = 2
+    parallel.chunk_size = 1
+    await import_files(data=parallel, files=files)
+
+    assert len(parallel.graph.nodes) == len(files) + 1
+    assert graph_signature(parallel.graph) == graph_signature(serial.graph)
+
+
+async def test_import_files_parallel_uses_model_cache(testfiles, tmp_path, mocker):
+    model_cache = ModelCache(tmp_path / "models.sqlite")
+    mocker.patch.object(cache, "_model_cache", model_cache)
+    files = [*get_folder_files(testfiles / "Vein" / "Items" / "Tools"), *get_folder_files(testfiles / "Vein" / "Tools")]
+
+    for _ in range(2):
+        data = create_pakdump_data()
+        data.workers = 2
+        data.chunk_size = 1
+        await import_files(data=data, files=files)
+
+    # the workers write the cache on the first import and read it on the second
+    assert model_cache.stats.writes >= len(files)
+    assert model_cache.stats.hits >= len(files)
+    assert (tmp_path / "models.sqlite").is_file()
+
+
+async def test_get_folder_files_skips_thumbnails(testfiles):
+    files = get_folder_files(testfiles / "pakdump")
+    assert [f.name for f in files] == ["BP_Ammo_9mm.json", "BP_Magazine_MP5.json"]
+
+
+def create_item_type(name: str) -> UEItemType:
+    return UEItemType(
+        type="ItemType",
+        name=name,
+        Properties={"Icon": {"ObjectName": "", "ObjectPath": ""}, "Color": {"R": 0, "G": 0, "B": 0, "A": 0, "Hex": "000000"}},
+    )
+
+
+async def test_import_files_resolves_links_after_loading(testfiles):
+    data = create_pakdump_data()
+    await import_files(data=data, files=get_folder_files(testfiles / "pakdump"), resolve=False)
+    assert len(data.pending_links) == 2
+    assert all(not node.edges for node in data.graph.nodes.values())
+
+    # the item type is loaded after the items referencing it
+    itemtype_node = data.graph.upsert(create_item_type("IT_Ammo"))
+    assert resolve_links(data) == []
+
+    assert data.pending_links == []
+    assert sorted(n.ue_model.name for n in itemtype_node.get_neighbours(LinkType.HAS_ITEM_TYPE)) == [
+        "BP_Ammo_9mm_C",
+        "BP_Magazine_MP5_C",
+    ]
+
+
+async def test_resolve_links_reports_unresolved(testfiles):
+    data = create_pakdump_data()
+    await import_files(data=data, files=get_folder_files(testfiles / "pakdump"))
+
+    assert data.pending_links == []
+    assert [(link.link_type, link.key) for link in data.unresolved_links] == [(LinkType.HAS_ITEM_TYPE, "ItemType'IT_Ammo'")] * 2
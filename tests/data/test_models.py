@@ -0,0 +1,206 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from vein_wiki_tools.clients.pakdump.models import UEModel, UEReference
+from vein_wiki_tools.data.models import Graph, Node, TraversalOrder
+from vein_wiki_tools.errors import VeinError
+from vein_wiki_tools.models.common import LinkType
+
+
+def create_graph() -> tuple[Graph, dict[str, Node]]:
+    """
+    root -> a -> c
+    root -> b -> c -> d
+    """
+    graph = Graph()
+    nodes = {name: graph.upsert(UEModel(type="Test", name=name)) for name in ["root", "a", "b", "c", "d"]}
+    graph.root_node = nodes["root"]
+    nodes["root"].add_edge(LinkType.HAS_ITEM_TYPE, nodes["a"])
+    nodes["root"].add_edge(LinkType.HAS_ITEM_TYPE, nodes["b"])
+    nodes["a"].add_edge(LinkType.HAS_AMMO, nodes["c"])
+    nodes["b"].add_edge(LinkType.HAS_MAGAZINE, nodes["c"])
+    nodes["c"].add_edge(LinkType.HAS_FLUID, nodes["d"])
+    return graph, nodes
+
+
+def names(result) -> list[str]:
+    return [node.ue_model.name for _, _, node in result]
+
+
+async def test_walk_visits_each_node_once():
+    graph, _ = create_graph()
+    assert [node.ue_model.name for node in graph.walk()] == ["root", "a", "b", "c", "d"]
+
+
+async def test_traverse_bfs_depth_and_link_type():
+    graph, _ = create_graph()
+    result = [(depth, link_type, node.ue_model.name) for depth, link_type, node in graph.traverse()]
+    assert result == [
+        (0, None, "root"),
+        (1, LinkType.HAS_ITEM_TYPE, "a"),
+        (1, LinkType.HAS_ITEM_TYPE, "b"),
+        (2, LinkType.HAS_AMMO, "c"),
+        (3, LinkType.HAS_FLUID, "d"),
+    ]
+
+
+async def test_traverse_allowed_link_types_and_max_depth():
+    graph, _ = create_graph()
+    assert names(graph.traverse(allowed_link_types={LinkType.HAS_ITEM_TYPE, LinkType.HAS_MAGAZINE})) == ["root", "a", "b", "c"]
+    assert names(graph.traverse(max_depth=1)) == ["root", "a", "b"]
+
+
+async def test_traverse_dfs():
+    graph, _ = create_graph()
+    assert names(graph.traverse(order=TraversalOrder.DFS)) == ["root", "a", "c", "d", "b"]
+
+
+async def test_traverse_reverse():
+    graph, nodes = create_graph()
+    result = graph.traverse(start_node=nodes["d"], reverse=True)
+    assert names(result) == ["d", "c", "a", "b", "root"]
+
+
+async def test_traverse_topological():
+    graph, nodes = create_graph()
+    order = names(graph.traverse(order=TraversalOrder.TOPOLOGICAL))
+    assert order.index("a") < order.index("c")
+    assert order.index("b") < order.index("c")
+    assert order == ["root", "a", "b", "c", "d"]
+    reverse_order = names(graph.traverse(start_node=nodes["d"], order=TraversalOrder.TOPOLOGICAL, reverse=True))
+    assert reverse_order == ["d", "c", "a", "b", "root"]
+
+
+async def test_traverse_topological_cycle():
+    graph, nodes = create_graph()
+    nodes["d"].add_edge(LinkType.HAS_AMMO, nodes["a"])
+    with pytest.raises(VeinError):
+        list(graph.traverse(order=TraversalOrder.TOPOLOGICAL))
+
+
+async def test_add_edge_is_idempotent():
+    _, nodes = create_graph()
+    nodes["root"].add_edge(LinkType.HAS_ITEM_TYPE, nodes["a"])
+    assert [(link_type, n.ue_model.name) for link_type, n in nodes["root"].edges] == [
+        (LinkType.HAS_ITEM_TYPE, "a"),
+        (LinkType.HAS_ITEM_TYPE, "b"),
+    ]
+    assert [(link_type, n.ue_model.name) for link_type, n in nodes["a"].neighbours] == [(LinkType.HAS_ITEM_TYPE, "root")]
+
+
+async def test_get_edges_and_neighbours_by_link_type():
+    _, nodes = create_graph()
+    assert [n.ue_model.name for n in nodes["c"].get_neighbours(LinkType.HAS_AMMO)] == ["a"]
+    assert [n.ue_model.name for n in nodes["c"].get_neighbours(LinkType.HAS_MAGAZINE)] == ["b"]
+    assert [n.ue_model.name for n in nodes["c"].get_edges(LinkType.HAS_FLUID)] == ["d"]
+    assert nodes["c"].get_edges(LinkType.HAS_AMMO) == []
+    assert nodes["a"].has_edge(LinkType.HAS_AMMO, nodes["c"])
+    assert not nodes["a"].has_edge(LinkType.HAS_MAGAZINE, nodes["c"])
+
+
+async def test_remove_edge():
+    _, nodes = create_graph()
+    nodes["a"].remove_edge(LinkType.HAS_AMMO, nodes["c"])
+    assert nodes["a"].edges == []
+    assert nodes["c"].get_neighbours(LinkType.HAS_AMMO) == []
+    assert [n.ue_model.name for _, n in nodes["c"].neighbours] == ["b"]
+    with pytest.raises(ValueError):
+        nodes["a"].remove_edge(LinkType.HAS_AMMO, nodes["c"])
+
+
+async def test_delete_node_unlinks_both_directions():
+    graph, nodes = create_graph()
+    graph.delete_node(nodes["c"])
+    assert nodes["c"].id not in graph.nodes
+    assert graph.deleted_nodes[nodes["c"].id] is nodes["c"]
+    assert nodes["a"].edges == []
+    assert nodes["b"].edges == []
+    assert nodes["d"].neighbours == []
+    assert names(graph.traverse()) == ["root", "a", "b"]
+
+
+def create_item_model(name: str, item_class: str) -> UEModel:
+    return UEModel(
+        type="BlueprintGeneratedClass",
+        name=name,
+        super_struct=UEReference(object_name=f"Class'{item_class}'", object_path="/Script/Vein"),
+    )
+
+
+async def test_indexes_follow_upsert():
+    graph, _ = create_graph()
+    rifle = graph.upsert(create_item_model("Rifle", "FirearmItem"))
+    pistol = graph.upsert(create_item_model("Pistol", "FirearmItem"))
+    water = graph.upsert(create_item_model("Water", "FluidItem"))
+
+    assert list(graph.index.by_sub_type["firearm"].values()) == [rifle, pistol]
+    assert list(graph.index.by_sub_type["fluid"].values()) == [water]
+    assert list(graph.index.by_super_type["item"].values()) == [rifle, pistol, water]
+    assert "melee" not in graph.index.by_sub_type
+    assert graph.index.by_class[UEModel].keys() >= {rifle.id, pistol.id, water.id}
+
+
+async def test_templated_nodes_in_graph_order():
+    graph, _ = create_graph()
+    rifle = graph.upsert(create_item_model("Rifle", "FirearmItem"))
+    water = graph.upsert(create_item_model("Water", "FluidItem"))
+    pistol = graph.upsert(create_item_model("Pistol", "FirearmItem"))
+    # an update keeps the place of the node
+    graph.upsert(create_item_model("Rifle", "FluidItem"), update=True)
+
+    assert graph.get_templated_nodes() == [rifle, water, pistol]
+
+
+async def test_indexes_follow_update_and_delete():
+    graph, _ = create_graph()
+    rifle = graph.upsert(create_item_model("Rifle", "FirearmItem"))
+    graph.upsert(create_item_model("Rifle", "FluidItem"), update=True)
+    assert "firearm" not in graph.index.by_sub_type
+    assert list(graph.index.by_sub_type["fluid"].values()) == [rifle]
+
+    graph.delete_node(rifle)
+    assert "item" not in graph.index.by_super_type
+    assert graph.index.by_sub_type == {}
+    assert graph.get_templated_nodes() == []
+
+
+async def test_graph_dump_and_load(tmp_path):
+    graph, nodes = create_graph()
+    rifle = graph.upsert(create_item_model("Rifle", "FirearmItem"))
+    rifle.add_edge(LinkType.HAS_ITEM_TYPE, nodes["a"])
+    # neighbours of "a" are added in a different order than the nodes
+    nodes["d"].add_edge(LinkType.HAS_FLUID, nodes["a"])
+    graph.aliases["alias"] = rifle.id
+    nodes["b"].modified = False
+
+    graph.dump(tmp_path / "graph.snapshot")
+    loaded = Graph.load(tmp_path / "graph.snapshot")
+
+    assert list(loaded.nodes) == list(graph.nodes)
+    assert loaded.root_node is loaded.nodes[graph.root_node.id]
+    assert loaded.aliases == graph.aliases
+    for node_id, node in graph.nodes.items():
+        loaded_node = loaded.nodes[node_id]
+        assert loaded_node.ue_model == node.ue_model
+        assert loaded_node.modified == node.modified
+        assert [(link_type, n.id) for link_type, n in loaded_node.edges] == [(link_type, n.id) for link_type, n in node.edges]
+        assert [(link_type, n.id) for link_type, n in loaded_node.neighbours] == [(link_type, n.id) for link_type, n in node.neighbours]
+    assert list(loaded.index.by_sub_type["firearm"].values()) == [loaded.nodes[rifle.id]]
+    assert names(loaded.traverse()) == names(graph.traverse())
+
+
+async def test_graph_load_rejects_other_files(tmp_path):
+    path = tmp_path / "graph.snapshot"
+    path.write_bytes(b"not a graph")
+    with pytest.raises(VeinError):
+        Graph.load(path)
+
+
+async def test_graph_load_rejects_other_schemas(tmp_path, mocker: MockerFixture):
+    graph, _ = create_graph()
+    graph.dump(tmp_path / "graph.snapshot")
+
+    mocker.patch("vein_wiki_tools.data.models.get_schema_fingerprint", return_value="0" * 32)
+
+    with pytest.raises(VeinError, match="other model schemas"):
+        Graph.load(tmp_path / "graph.snapshot")
@@ -0,0 +1,707 @@
+"""
+In-process stand-in for the MediaWiki action API of vein.wiki.gg.
+
+Implements just enough of ``api.php`` for pywikibot to set up a site, log in, read and edit pages,
+and follow the recent changes and the log, so the wiki clients can be exercised offline,
+including how they deal with a wiki under load.
+"""
+
+import itertools
+import json
+import secrets
+import threading
+from http.cookies import SimpleCookie
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from pywikibot import family
+
+MEDIAWIKI_VERSION = "1.43.5"
+CSRF_TOKEN = "0123456789abcdef+\\"
+LOGIN_TOKEN = "fedcba9876543210+\\"
+ANONYMOUS_TOKEN = "+\\"
+SESSION_COOKIE = "fakevein_session"
+# the bot password of the user, in the password file as ``("VeinBot", BotPassword("sync", "bot-password"))``
+BOT_PASSWORD_NAME = "sync"
+PASSWORD = "bot-password"
+# numbers the servers of this process, a port can be reused by a later server
+_servers = itertools.count(1)
+
+NAMESPACES = {
+    -1: "Special",
+    0: "",
+    1: "Talk",
+    2: "User",
+    3: "User talk",
+    4: "Vein Wiki",
+    6: "File",
+    8: "MediaWiki",
+    10: "Template",
+    14: "Category",
+}
+
+QUERY_MODULES = {
+    "prop": ["info", "revisions", "categoryinfo", "templates"],
+    "list": ["allpages", "recentchanges", "logevents"],
+    "meta": ["siteinfo", "userinfo", "tokens"],
+}
+GENERATORS = ["allpages", "revisions", "templates"]
+ACTIONS = ["paraminfo", "query", "edit", "login", "clientlogin"]
+LOG_TYPES = ["delete", "move", "protect", "upload"]
+
+
+def _param(name: str, type: Any = "string", **kwargs) -> dict:
+    return {"name": name, "type": type, **kwargs}
+
+
+def _module(path: str, prefix: str = "", parameters: list[dict] | None = None, **kwargs) -> dict:
+    return {"name": path.rsplit("+", 1)[-1], "path": path, "prefix": prefix, "parameters": parameters or [], **kwargs}
+
+
+def get_paraminfo() -> dict[str, dict]:
+    """Parameter info of every module the stand-in serves, by module path"""
+    modules = [
+        _module(
+            "main",
+            parameters=[
+                _param("action", ACTIONS, submodules={action: action for action in ACTIONS}),
+                _param("format", ["json"], submodules={"json": "json"}),
+                _param("maxlag", "integer"),
+                _param("assert", ["anon", "user", "bot"]),
+                _param("formatversion", ["1", "2", "latest"]),
+            ],
+        ),
+        _module("paraminfo", parameters=[_param("modules", multi=True, limit=50)]),
+        _module(
+            "query",
+            parameters=[
+                *(
+                    _param(kind, names, multi=True, limit=50, submodules={name: f"query+{name}" for name in names})
+                    for kind, names in QUERY_MODULES.items()
+                ),
+                _param("generator", GENERATORS, submodules={name: f"query+{name}" for name in GENERATORS}),
+                _param("titles", multi=True, limit=50, highlimit=500),
+                _param("pageids", "integer", multi=True, limit=50, highlimit=500),
+                _param("revids", "integer", multi=True, limit=50, highlimit=500),
+                _param("redirects", "boolean"),
+                _param("continue"),
+            ],
+        ),
+        _module("query+info", "in", [_param("prop", ["protection", "url"], multi=True, limit=50)]),
+        _module(
+            "query+revisions",
+            "rv",
+            [
+                _param("prop", ["ids", "timestamp", "user", "comment", "size", "sha1", "content", "contentmodel"], multi=True, limit=50),
+                _param("slots", ["main"], multi=True, limit=50),
+                _param("limit", "limit", max=50, highmax=500, min=1),
+                _param("continue"),
+            ],
+        ),
+        _module("query+categoryinfo", "ci", [_param("continue")]),
+        _module(
+            "query+templates",
+            "tl",
+            [
+                _param("namespace", "namespace", multi=True, limit=50),
+                _param("limit", "limit", max=500, highmax=5000, min=1),
+                _param("continue"),
+            ],
+        ),
+        _module(
+            "query+allpages",
+            "ap",
+            [_param("from"), _param("namespace", "namespace"), _param("limit", "limit", max=500, highmax=5000, min=1), _param("continue")],
+        ),
+        _module(
+            "query+recentchanges",
+            "rc",
+            [
+                _param("start", "timestamp"),
+                _param("end", "timestamp"),
+                _param("dir", ["newer", "older"]),
+                _param("type", ["edit", "new", "log", "external", "categorize"], multi=True, limit=50),
+                _param(
+                    "prop",
+                    ["user", "comment", "flags", "timestamp", "title", "ids", "sizes", "redirect", "loginfo", "tags"],
+                    multi=True,
+                    limit=50,
+                ),
+                _param("show", ["minor", "!minor", "bot", "!bot", "anon", "!anon", "redirect", "!redirect"], multi=True, limit=50),
+                _param("namespace", "namespace", multi=True, limit=50),
+                _param("user", "user"),
+                _param("excludeuser", "user"),
+                _param("tag"),
+                _param("toponly", "boolean"),
+                _param("title"),
+                _param("limit", "limit", max=500, highmax=5000, min=1),
+                _param("continue"),
+            ],
+        ),
+        _module(
+            "query+logevents",
+            "le",
+            [
+                _param("type", ["", *LOG_TYPES]),
+                _param("action"),
+                _param("start", "timestamp"),
+                _param("end", "timestamp"),
+                _param("dir", ["newer", "older"]),
+                _param("prop", ["ids", "title", "type", "user", "timestamp", "comment", "details", "tags"], multi=True, limit=50),
+                _param("user", "user"),
+                _param("title"),
+                _param("namespace", "namespace"),
+                _param("tag"),
+                _param("limit", "limit", max=500, highmax=5000, min=1),
+                _param("continue"),
+            ],
+        ),
+        _module(
+            "query+siteinfo", "si", [_param("prop", ["general", "namespaces", "namespacealiases", "extensions"], multi=True, limit=50)]
+        ),
+        _module("query+userinfo", "ui", [_param("prop", ["blockinfo", "groups", "hasmsg", "ratelimits", "rights"], multi=True, limit=50)]),
+        _module("query+tokens", "", [_param("type", ["csrf", "login"], multi=True, limit=50)]),
+        _module(
+            "edit",
+            parameters=[
+                _param("title"),
+                _param("text"),
+                _param("summary"),
+                _param("token", tokentype="csrf", required=True),
+                *(_param(flag, "boolean") for flag in ("bot", "minor", "notminor", "recreate", "createonly", "nocreate")),
+                _param("basetimestamp", "timestamp"),
+                _param("watchlist", ["watch", "unwatch", "preferences", "nochange"]),
+            ],
+            mustbeposted=True,
+        ),
+        _module(
+            "login",
+            "lg",
+            [_param("name"), _param("password", "password"), _param("domain"), _param("token", tokentype="login", required=True)],
+            mustbeposted=True,
+        ),
+        _module(
+            "clientlogin",
+            "login",
+            [
+                _param("requests", multi=True),
+                _param("returnurl"),
+                _param("continue", "boolean"),
+                _param("token", tokentype="login", required=True),
+            ],
+            mustbeposted=True,
+        ),
+    ]
+    return {module["path"]: module for module in modules}
+
+
+def get_timestamp(time: datetime) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@dataclass
+class Fault:
+    """
+    A failure the stand-in answers the next request for ``action`` with, or for ``action`` on ``title``,
+    or every such request when ``persistent``
+    """
+
+    action: str
+    status: int = 200
+    code: str | None = None
+    lag: float = 0.0
+    retry_after: int = 0
+    title: str | None = None
+    persistent: bool = False
+
+    def response(self) -> tuple[int, dict, dict[str, str]]:
+        headers = {"Retry-After": str(self.retry_after)} if self.retry_after else {}
+        if self.status != 200:
+            return self.status, {}, headers
+        error: dict[str, Any] = {"code": self.code, "info": f"Fault injected: {self.code}"}
+        if self.code == "maxlag":
+            error |= {"info": f"Waiting for db1: {self.lag} seconds lagged", "host": "db1", "lag": self.lag}
+            headers["X-Database-Lag"] = str(self.lag)
+        return 200, {"error": error}, headers
+
+
+@dataclass
+class FakeRevision:
+    revid: int
+    text: str
+    timestamp: str
+    user: str = "VeinBot"
+    comment: str = ""
+
+
+@dataclass
+class FakePage:
+    pageid: int
+    title: str
+    revisions: list[FakeRevision] = field(default_factory=list)
+
+    @property
+    def latest(self) -> FakeRevision:
+        return self.revisions[-1]
+
+
+class FakeWiki:
+    """
+    A MediaWiki API stand-in running on a local port in a background thread.
+
+    Pages live in memory, keyed by title. Every API request is counted per action
+    in ``requests`` and the titles asked for in each query are kept in ``queries``.
+    Requests are anonymous until logged in as ``user``, with ``password`` either through
+    the bot password ``BOT_PASSWORD_NAME`` or through clientlogin, after which the session
+    is kept in a cookie. Queued ``faults`` are answered instead of the next requests of their action.
+
+    Every edit is listed in the recent changes, deletes and moves in the log as well,
+    each a second after the one before on the clock of the wiki, see ``replay``.
+    """
+
+    def __init__(self, user: str = "VeinBot", password: str = PASSWORD, ratelimits: dict | None = None) -> None:
+        self.user = user
+        self.password = password
+        self.sessions: set[str] = set()
+        self.number = next(_servers)
+        self.ratelimits = ratelimits or {}
+        self.pages: dict[str, FakePage] = {}
+        self.requests: dict[str, int] = {}
+        self.queries: list[list[str]] = []
+        self.faults: list[Fault] = []
+        self.recentchanges: list[dict] = []
+        self.log: list[dict] = []
+        self.paraminfo = get_paraminfo()
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self._next_pageid = 1
+        self._next_revid = 1
+        self._next_logid = 1
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def host(self) -> str:
+        assert self._server is not None, "FakeWiki is not started"
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self) -> "FakeWiki":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-wiki", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self._server = None
+
+    def __enter__(self) -> "FakeWiki":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def get_family(self) -> family.Family:
+        """A pywikibot family pointing at this server, named after it so sites and their logins are never shared between servers"""
+        return make_family(f"fakevein{self.number}", self.host)
+
+    def tick(self) -> str:
+        """Move the clock of the wiki on by a second, so every change has a timestamp of its own"""
+        self.now += timedelta(seconds=1)
+        return get_timestamp(self.now)
+
+    def add_page(self, title: str, text: str, user: str = "VeinBot", comment: str = "") -> FakeRevision:
+        with self._lock:
+            page = self.pages.get(title)
+            old_revid = page.latest.revid if page is not None else 0
+            revision = self._add_revision(title, text, user, comment)
+            self._add_change(
+                "edit" if old_revid else "new",
+                self.pages[title],
+                revision.timestamp,
+                user,
+                comment,
+                revid=revision.revid,
+                old_revid=old_revid,
+            )
+            return revision
+
+    def delete_page(self, title: str, user: str = "Someone", comment: str = "") -> None:
+        with self._lock:
+            page = self.pages.pop(title)
+            self._add_log_entry("delete", "delete", page, self.tick(), user, comment)
+
+    def move_page(self, title: str, new_title: str, redirect: bool = True, user: str = "Someone", comment: str = "") -> None:
+        """Rename a page, leaving a redirect behind, as Special:MovePage does"""
+        with self._lock:
+            page = self.pages.pop(title)
+            page.title = new_title
+            self.pages[new_title] = page
+            timestamp = self.tick()
+            # a move adds a null revision to the page, and is listed only as a log entry
+            page.revisions.append(FakeRevision(self._next_revid, page.latest.text, timestamp, user, comment))
+            self._next_revid += 1
+            params = {"target_ns": 0, "target_title": new_title, **({} if redirect else {"suppressredirect": True})}
+            self._add_log_entry("move", "move", FakePage(pageid=page.pageid, title=title), timestamp, user, comment, params)
+            if redirect:
+                self._add_revision(title, f"#REDIRECT [[{new_title}]]", user, comment, timestamp=timestamp)
+
+    def replay(self, changes: Iterable[tuple[str, ...]]) -> None:
+        """
+        Apply a scripted change log, of ``("edit", title, text)``, ``("delete", title)``
+        and ``("move", title, new title)`` changes, as made by other users of the wiki
+        """
+        for action, title, *args in changes:
+            if action == "edit":
+                self.add_page(title, *args, user="Someone")
+            elif action == "delete":
+                self.delete_page(title)
+            elif action == "move":
+                self.move_page(title, *args)
+            else:
+                raise ValueError(f"Unknown change: {action}")
+
+    def _add_revision(self, title: str, text: str, user: str, comment: str, timestamp: str | None = None) -> FakeRevision:
+        page = self.pages.get(title)
+        if page is None:
+            page = self.pages[title] = FakePage(pageid=self._next_pageid, title=title)
+            self._next_pageid += 1
+        revision = FakeRevision(revid=self._next_revid, text=text, timestamp=timestamp or self.tick(), user=user, comment=comment)
+        self._next_revid += 1
+        page.revisions.append(revision)
+        return revision
+
+    def _add_change(self, type: str, page: FakePage, timestamp: str, user: str, comment: str, **kwargs: Any) -> None:
+        self.recentchanges.append(
+            {
+                "type": type,
+                "ns": 0,
+                "title": page.title,
+                "pageid": page.pageid,
+                "rcid": len(self.recentchanges) + 1,
+                "timestamp": timestamp,
+                "user": user,
+                "comment": comment,
+                **kwargs,
+            }
+        )
+
+    def _add_log_entry(
+        self, type: str, action: str, page: FakePage, timestamp: str, user: str, comment: str, params: dict | None = None
+    ) -> None:
+        entry = {
+            "logid": self._next_logid,
+            "ns": 0,
+            "title": page.title,
+            "pageid": page.pageid,
+            "logpage": page.pageid,
+            "type": type,
+            "action": action,
+            "params": params or {},
+            "timestamp": timestamp,
+            "user": user,
+            "comment": comment,
+        }
+        self._next_logid += 1
+        self.log.append(entry)
+        self._add_change(
+            "log", page, timestamp, user, comment, logid=entry["logid"], logtype=type, logaction=action, logparams=entry["params"]
+        )
+
+    def inject(self, *faults: Fault) -> None:
+        with self._lock:
+            self.faults.extend(faults)
+
+    def pop_fault(self, action: str, title: str | None = None) -> Fault | None:
+        with self._lock:
+            for i, fault in enumerate(self.faults):
+                if fault.action == action and fault.title in (None, title):
+                    return fault if fault.persistent else self.faults.pop(i)
+        return None
+
+    def respond(self, params: dict[str, str], session: str | None = None) -> tuple[int, dict, dict[str, str]]:
+        action = params.get("action", "")
+        with self._lock:
+            self.requests[action] = self.requests.get(action, 0) + 1
+        if (fault := self.pop_fault(action, params.get("title"))) is not None:
+            return fault.response()
+        if action in ("login", "clientlogin"):
+            return self.handle_login(params)
+        user = self.user if session in self.sessions else None
+        if (required := params.get("assert")) in ("user", "bot") and user is None:
+            return 200, {"error": {"code": f"assert{required}failed", "info": f"You are no longer logged in as a {required}."}}, {}
+        return 200, self.handle(params, user), {}
+
+    def handle(self, params: dict[str, str], user: str | None = None) -> dict:
+        action = params.get("action", "")
+        if action == "paraminfo":
+            return self.handle_paraminfo(params)
+        if action == "query":
+            return self.handle_query(params, user)
+        if action == "edit":
+            return self.handle_edit(params, user)
+        return {"error": {"code": "badvalue", "info": f'Unrecognized value for parameter "action": {action}.'}}
+
+    def handle_login(self, params: dict[str, str]) -> tuple[int, dict, dict[str, str]]:
+        """Log in with the bot password, ``action=login``, or the main password, ``action=clientlogin``"""
+        action = params["action"]
+        if action == "login":
+            name, password, token = params.get("lgname", ""), params.get("lgpassword"), params.get("lgtoken")
+            names = {f"{self.user}@{BOT_PASSWORD_NAME}"}
+        else:
+            name, password, token = params.get("username", ""), params.get("password"), params.get("logintoken")
+            names = {self.user}
+        if token != LOGIN_TOKEN:
+            result = {"result": "WrongToken"} if action == "login" else {"status": "FAIL", "messagecode": "sessionfailure"}
+            return 200, {action: result}, {}
+        if name not in names or password != self.password:
+            reason = "Incorrect username or password entered. Please try again."
+            result = (
+                {"result": "Failed", "reason": reason}
+                if action == "login"
+                else {"status": "FAIL", "message": reason, "messagecode": "wrongpassword"}
+            )
+            return 200, {action: result}, {}
+        session = secrets.token_hex(16)
+        with self._lock:
+            self.sessions.add(session)
+        result = (
+            {"result": "Success", "lguserid": 1, "lgusername": self.user}
+            if action == "login"
+            else {"status": "PASS", "username": self.user}
+        )
+        return 200, {action: result}, {"Set-Cookie": f"{SESSION_COOKIE}={session}; Path=/; HttpOnly"}
+
+    def handle_paraminfo(self, params: dict[str, str]) -> dict:
+        modules = [self.paraminfo.get(path, {"path": path, "missing": True}) for path in params.get("modules", "").split("|")]
+        return {"paraminfo": {"modules": modules}}
+
+    def handle_query(self, params: dict[str, str], user: str | None = None) -> dict:
+        query: dict[str, Any] = {}
+        meta = set(filter(None, params.get("meta", "").split("|")))
+        if "siteinfo" in meta:
+            query |= self.get_siteinfo(params)
+        if "userinfo" in meta:
+            if user is not None:
+                query["userinfo"] = {
+                    "id": 1,
+                    "name": user,
+                    "groups": ["*", "user", "bot"],
+                    "rights": ["read", "edit", "createpage", "bot", "writeapi"],
+                    "ratelimits": self.ratelimits,
+                }
+            else:
+                query["userinfo"] = {"id": 0, "name": "127.0.0.1", "anon": True, "groups": ["*"], "rights": ["read"], "ratelimits": {}}
+        if "tokens" in meta:
+            types = params.get("type", "csrf").split("|")
+            query["tokens"] = {
+                **({"csrftoken": CSRF_TOKEN if user is not None else ANONYMOUS_TOKEN} if "csrf" in types else {}),
+                **({"logintoken": LOGIN_TOKEN} if "login" in types else {}),
+            }
+        if params.get("generator") == "templates":
+            # pages don't transclude templates here
+            return {"batchcomplete": True}
+        if titles := params.get("titles"):
+            query["pages"] = self.get_pages(titles.split("|"), params)
+        result: dict[str, Any] = {"batchcomplete": True, "query": query}
+        lists = params.get("list", "").split("|")
+        if "recentchanges" in lists:
+            types = params.get("rctype", "edit|new|log").split("|")
+            changes = [change for change in self.recentchanges if change["type"] in types]
+            query["recentchanges"] = self.get_list(changes, "rc", params, result)
+        if "logevents" in lists:
+            entries = [entry for entry in self.log if params.get("letype") in (None, entry["type"])]
+            query["logevents"] = self.get_list(entries, "le", params, result)
+        return result
+
+    @staticmethod
+    def get_list(items: list[dict], prefix: str, params: dict[str, str], result: dict) -> list[dict]:
+        """One batch of a list of timestamped items, adding the continuation to ``result`` when there is more"""
+        start, end = params.get(f"{prefix}start"), params.get(f"{prefix}end")
+        if params.get(f"{prefix}dir", "older") == "newer":
+            items = [item for item in items if (not start or item["timestamp"] >= start) and (not end or item["timestamp"] <= end)]
+        else:
+            items = [
+                item for item in reversed(items) if (not start or item["timestamp"] <= start) and (not end or item["timestamp"] >= end)
+            ]
+        limit = params.get(f"{prefix}limit", "10")
+        limit = 500 if limit == "max" else int(limit)
+        offset = int(params.get(f"{prefix}continue", 0))
+        if offset + limit < len(items):
+            result["continue"] = {f"{prefix}continue": str(offset + limit), "continue": "-||"}
+        return items[offset : offset + limit]
+
+    def get_siteinfo(self, params: dict[str, str]) -> dict:
+        host = f"http://{self.host}"
+        siteinfo: dict[str, Any] = {}
+        props = params.get("siprop", "general").split("|")
+        if "general" in props:
+            siteinfo["general"] = {
+                "mainpage": "Main Page",
+                "base": f"{host}/wiki/Main_Page",
+                "sitename": "Vein Wiki",
+                "generator": f"MediaWiki {MEDIAWIKI_VERSION}",
+                "case": "first-letter",
+                "lang": "en",
+                "fallback": [],
+                "rtl": False,
+                "fallback8bitEncoding": "windows-1252",
+                "readonly": False,
+                "articlepath": "/wiki/$1",
+                "scriptpath": "",
+                "script": "/index.php",
+                "server": host,
+                "servername": self.host,
+                "wikiid": "vein",
+                "time": get_timestamp(self.now),
+                "timezone": "UTC",
+                "timeoffset": 0,
+                "maxuploadsize": 104857600,
+                "legaltitlechars": " %!\"$&'()*,\\-.\\/0-9:;=?@A-Z\\\\^_`a-z~\\x80-\\xFF+",
+                "invalidusernamechars": "@:>=",
+                "thumblimits": {"0": 120, "1": 150},
+                "imagelimits": {"0": {"width": 320, "height": 240}},
+                "magiclinks": {"ISBN": False, "PMID": False, "RFC": False},
+            }
+        if "namespaces" in props:
+            siteinfo["namespaces"] = {
+                str(id): {
+                    "id": id,
+                    "case": "first-letter",
+                    "name": name,
+                    "subpages": id not in (-1, 0, 6, 14),
+                    "content": id == 0,
+                    "nonincludable": False,
+                    **({"canonical": name} if name else {}),
+                }
+                for id, name in NAMESPACES.items()
+            }
+        for prop in ("namespacealiases", "extensions"):
+            if prop in props:
+                siteinfo[prop] = []
+        return siteinfo
+
+    def get_pages(self, titles: list[str], params: dict[str, str]) -> list[dict]:
+        with self._lock:
+            self.queries.append(titles)
+        props = params.get("prop", "").split("|")
+        rvprops = params.get("rvprop", "ids|timestamp|user|comment").split("|")
+        pages = []
+        for title in titles:
+            page = self.pages.get(title)
+            if page is None:
+                pages.append({"ns": 0, "title": title, "missing": True})
+                continue
+            data: dict[str, Any] = {"pageid": page.pageid, "ns": 0, "title": page.title}
+            if "info" in props:
+                data |= {
+                    "contentmodel": "wikitext",
+                    "pagelanguage": "en",
+                    "touched": page.latest.timestamp,
+                    "lastrevid": page.latest.revid,
+                    "length": len(page.latest.text.encode()),
+                }
+            if "revisions" in props:
+                data["revisions"] = [self.get_revision(page, page.latest, rvprops, params.get("formatversion", "1"))]
+            pages.append(data)
+        return pages
+
+    def handle_edit(self, params: dict[str, str], user: str | None = None) -> dict:
+        if params.get("token") != (CSRF_TOKEN if user is not None else ANONYMOUS_TOKEN):
+            return {"error": {"code": "badtoken", "info": "Invalid CSRF token."}}
+        if user is None:
+            # the wiki doesn't take edits from logged out users
+            return {"error": {"code": "permissiondenied", "info": "The action you have requested is limited to users in the group: Users."}}
+        title, text = params["title"], params.get("text", "")
+        page = self.pages.get(title)
+        if page is not None and page.latest.text == text:
+            return {"edit": {"result": "Success", "pageid": page.pageid, "title": title, "nochange": True}}
+        old_revid = page.latest.revid if page is not None else 0
+        revision = self.add_page(title, text, user=user, comment=params.get("summary", ""))
+        return {
+            "edit": {
+                "result": "Success",
+                "pageid": self.pages[title].pageid,
+                "title": title,
+                "contentmodel": "wikitext",
+                "oldrevid": old_revid,
+                "newrevid": revision.revid,
+                "newtimestamp": revision.timestamp,
+                **({} if old_revid else {"new": True}),
+            }
+        }
+
+    @staticmethod
+    def get_revision(page: FakePage, revision: FakeRevision, rvprops: list[str], formatversion: str = "1") -> dict:
+        data: dict[str, Any] = {"revid": revision.revid, "parentid": 0}
+        if len(page.revisions) > 1 and revision is not page.revisions[0]:
+            data["parentid"] = page.revisions[page.revisions.index(revision) - 1].revid
+        if "timestamp" in rvprops:
+            data["timestamp"] = revision.timestamp
+        if "user" in rvprops:
+            data["user"] = revision.user
+        if "comment" in rvprops:
+            data["comment"] = revision.comment
+        if "content" in rvprops:
+            # pywikibot reads content in the formatversion 1 layout
+            content_key = "content" if formatversion == "2" else "*"
+            data["slots"] = {"main": {"contentmodel": "wikitext", "contentformat": "text/x-wiki", content_key: revision.text}}
+        return data
+
+
+def _make_handler(wiki: FakeWiki) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body are written separately, which would wait on delayed ACKs of the client
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            self.respond(parse_qs(urlparse(self.path).query))
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+            params = parse_qs(urlparse(self.path).query)
+            params.update(parse_qs(body))
+            self.respond(params)
+
+        def respond(self, params: dict[str, list[str]]) -> None:
+            cookie = SimpleCookie(self.headers.get("Cookie", "")).get(SESSION_COOKIE)
+            status, content, headers = wiki.respond({key: values[-1] for key, values in params.items()}, cookie.value if cookie else None)
+            payload = json.dumps(content).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def make_family(name: str, host: str) -> family.Family:
+    class FakeVeinFamily(family.Family):
+        langs = {"en": host}
+
+        def version(self, code):
+            return MEDIAWIKI_VERSION
+
+        def scriptpath(self, code):
+            return ""
+
+        def protocol(self, code):
+            return "http"
+
+    FakeVeinFamily.name = name
+    return FakeVeinFamily()
@@ -0,0 +1,61 @@
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+
+from vein_wiki_tools.models.items import Item
+from vein_wiki_tools.scripts.write_items import write_pages
+from vein_wiki_tools.utils.file_helper import get_full_file_path
+
+# as mirrored, with the newline at the end of the file
+CONTENT = Path(get_full_file_path("tests/testfiles/BP_Melee_Shovel")).read_text()
+
+
+def get_item(i: int, category: str = "Ammo") -> Item:
+    return Item(filename=f"BP_Item_{i}.json", name=f"Item {i}", description="", category=category, weight_lbs=1.0, weight_kg=0.45)
+
+
+def render(item: Item) -> str:
+    # every other page is already up to date in the mirror
+    number = int(item.name.removeprefix("Item "))
+    return CONTENT if number % 2 else CONTENT.replace("Shovel", item.name, 1)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+async def test_write_pages(tmp_path: Path, workers: int):
+    (tmp_path / "mirror").mkdir()
+    for i in range(20):
+        if i not in (3, 8):
+            (tmp_path / "mirror" / f"BP_Item_{i}").write_text(CONTENT)
+
+    async def items() -> AsyncIterator[Item]:
+        for i in range(20):
+            yield get_item(i)
+        yield get_item(20, category="Food")
+        yield Item(filename="BP_Nameless.json", name="", description="", category="Ammo", weight_lbs=1.0, weight_kg=0.45)
+
+    stats = await write_pages(items(), render, mirror=tmp_path / "mirror", output=tmp_path / "out", workers=workers, queue_size=1)
+
+    # a missing page does not end the run
+    assert (stats.items, stats.skipped, stats.missing, stats.merged, stats.changed) == (22, 2, 2, 18, 9)
+    assert sorted(path.name for path in (tmp_path / "out").iterdir()) == sorted(f"BP_Item_{i}" for i in range(20) if i % 2 == 0 and i != 8)
+    assert "Item 4" in (tmp_path / "out" / "BP_Item_4").read_text()
+
+
+async def test_write_pages_streams(tmp_path: Path):
+    (tmp_path / "mirror").mkdir()
+    for i in range(0, 200, 2):
+        (tmp_path / "mirror" / f"BP_Item_{i}").write_text(CONTENT)
+    written_while_reading: list[int] = []
+
+    async def items() -> AsyncIterator[Item]:
+        for i in range(0, 200, 2):
+            if i == 150:
+                written_while_reading.append(len(list((tmp_path / "out").iterdir())))
+            yield get_item(i)
+
+    stats = await write_pages(items(), render, mirror=tmp_path / "mirror", output=tmp_path / "out", workers=1, queue_size=2)
+
+    # pages are written while items are still coming in, at most a queue of pages per stage and one per worker in flight
+    assert stats.changed == 100
+    assert written_while_reading[0] >= 75 - 4 * 2 - 6
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from tests.data.test_models import create_graph
+from vein_wiki_tools.data.models import Graph
+from vein_wiki_tools.scripts import write_ue_models
+
+
+async def test_load_graph_imports_again_for_other_schemas(tmp_path: Path, mocker: MockerFixture):
+    snapshot = tmp_path / "graph.snapshot"
+    # a snapshot taken before a model class changed
+    fingerprint = mocker.patch("vein_wiki_tools.data.models.get_schema_fingerprint", return_value="0" * 32)
+    create_graph()[0].dump(snapshot)
+    mocker.stop(fingerprint)
+    graph, _ = create_graph()
+    mocker.patch.object(write_ue_models, "get_model_cache")
+    pakdump_graph = mocker.patch.object(write_ue_models, "pakdump_graph", return_value=graph)
+
+    assert await write_ue_models.load_graph(snapshot=snapshot) is graph
+    pakdump_graph.assert_called_once()
+    # rewritten with the current schemas
+    assert set(Graph.load(snapshot).nodes) == set(graph.nodes)
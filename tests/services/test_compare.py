@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from vein_wiki_tools.services.compare import FieldChange, ModelChange, compare_outputs, diff_models
+
+
+def create_export(melee_time: float, **properties) -> list[dict]:
+    return [
+        {"Type": "BlueprintGeneratedClass", "Name": "BP_Melee_Bat_C"},
+        {"Type": "BP_Melee_Bat_C", "Name": "Default__BP_Melee_Bat_C", "Properties": {"MeleeTime": melee_time, **properties}},
+    ]
+
+
+async def test_diff_models_field_changes():
+    changes = diff_models("Items/BP_Melee_Bat.json", create_export(0.8, Weight=2.0), create_export(0.9, Damage=[10]))
+    assert changes == [
+        ModelChange(
+            file="Items/BP_Melee_Bat.json",
+            model="BP_Melee_Bat_C'Default__BP_Melee_Bat_C'",
+            status="changed",
+            fields=[
+                FieldChange(field="Properties.MeleeTime", old=0.8, new=0.9),
+                FieldChange(field="Properties.Damage[0]", old="<missing>", new=10),
+                FieldChange(field="Properties.Weight", old=2.0, new="<missing>"),
+            ],
+        )
+    ]
+
+
+async def test_diff_models_added_and_removed():
+    old = create_export(0.8)[:1]
+    new = create_export(0.8)[1:]
+    assert [(c.model, c.status) for c in diff_models("f.json", old, new)] == [
+        ("BP_Melee_Bat_C'Default__BP_Melee_Bat_C'", "added"),
+        ("BlueprintGeneratedClass'BP_Melee_Bat_C'", "removed"),
+    ]
+
+
+async def test_compare_outputs_patch_progression(tmp_path: Path):
+    contents = {
+        "v1": {"BP_Melee_Bat.json": create_export(0.8), "BP_Axe.json": create_export(1.0), "Bat.wiki": "old"},
+        "v2": {"BP_Melee_Bat.json": create_export(0.9), "BP_Axe.json": create_export(1.0), "Bat.wiki": "new", "Stats.json": {"Count": 1}},
+        "v3": {"BP_Melee_Bat.json": create_export(0.9)},
+    }
+    for version, files in contents.items():
+        (tmp_path / version).mkdir()
+        for name, content in files.items():
+            (tmp_path / version / name).write_text(content if isinstance(content, str) else json.dumps(content))
+
+    diffs = compare_outputs(["v1", "v2", "v3"], get_root=lambda v: tmp_path / v, workers=1, manifest_dir=tmp_path / "manifests")
+
+    first, second = diffs
+    assert first.files.updated == ["BP_Melee_Bat.json", "Bat.wiki"]
+    assert [(c.model, c.status, [(f.field, f.old, f.new) for f in c.fields]) for c in first.models] == [
+        ("BP_Melee_Bat_C'Default__BP_Melee_Bat_C'", "changed", [("Properties.MeleeTime", 0.8, 0.9)]),
+        ("Stats.json", "added", []),
+    ]
+    assert second.files.missing == ["BP_Axe.json", "Bat.wiki", "Stats.json"]
+    # the models of a missing file are all removed
+    assert [(c.file, c.model, c.status) for c in second.models] == [
+        ("BP_Axe.json", "BlueprintGeneratedClass'BP_Melee_Bat_C'", "removed"),
+        ("BP_Axe.json", "BP_Melee_Bat_C'Default__BP_Melee_Bat_C'", "removed"),
+        ("Stats.json", "Stats.json", "removed"),
+    ]
+    assert json.dumps(first.to_dict())
+    # manifests were kept out of the compared directories
+    assert sorted(p.name for p in (tmp_path / "v1").iterdir()) == ["BP_Axe.json", "BP_Melee_Bat.json", "Bat.wiki"]
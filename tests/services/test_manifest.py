@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from vein_wiki_tools.services import manifest
+from vein_wiki_tools.services.manifest import MANIFEST_FILENAME, Manifest, compare_output_dirs, update_manifest
+
+
+def write_files(root: Path, files: dict[str, str]) -> None:
+    for relative, text in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+async def test_compare_output_dirs(tmp_path: Path):
+    old, new = tmp_path / "old", tmp_path / "new"
+    write_files(old, {"item/A.wiki": "a", "item/B.wiki": "b", "fluid/C.wiki": "c"})
+    write_files(new, {"item/A.wiki": "a", "item/B.wiki": "b2", "fluid/D.wiki": "d"})
+
+    diff = compare_output_dirs(old, new)
+
+    assert diff.new == ["fluid/D.wiki"]
+    assert diff.updated == ["item/B.wiki"]
+    assert diff.missing == ["fluid/C.wiki"]
+    assert diff.unchanged == ["item/A.wiki"]
+    assert json.loads(json.dumps(diff.to_dict()))["counts"] == {"new": 1, "updated": 1, "missing": 1, "unchanged": 1}
+    assert (old / MANIFEST_FILENAME).is_file()
+    assert (new / MANIFEST_FILENAME).is_file()
+
+
+async def test_update_manifest_only_hashes_changed_files(tmp_path: Path, mocker: MockerFixture):
+    write_files(tmp_path, {"A.wiki": "a", "B.wiki": "b"})
+    first = update_manifest(tmp_path)
+
+    hash_file = mocker.spy(manifest, "hash_file")
+    write_files(tmp_path, {"B.wiki": "changed"})
+    second = update_manifest(tmp_path)
+
+    assert [call.args[0].name for call in hash_file.call_args_list] == ["B.wiki"]
+    assert second.entries["A.wiki"] == first.entries["A.wiki"]
+    assert second.entries["B.wiki"].hash != first.entries["B.wiki"].hash
+    assert Manifest.load(tmp_path) == second
+    assert MANIFEST_FILENAME not in second.entries
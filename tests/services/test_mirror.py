@@ -0,0 +1,128 @@
+from pathlib import Path
+
+import pytest
+
+from tests.fake_wiki import FakeWiki
+from vein_wiki_tools.clients.wiki import WikiSession
+from vein_wiki_tools.errors import VeinError
+from vein_wiki_tools.services.mirror import get_mirror_filename, mirror_pages, refresh_mirror
+from vein_wiki_tools.services.sync_state import SEEN, SyncRecord, SyncState, get_content_hash
+
+
+async def test_mirror_pages_in_batches(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    for i in range(120):
+        fake_wiki.add_page(f"Page {i}", f"Text of page {i}")
+    titles = [f"Page {i}" for i in range(125)]
+
+    stats = mirror_pages(iter(titles), root=tmp_path / "wiki", session=wiki_session)
+
+    assert (stats.fetched, stats.written, stats.missing) == (125, 120, 5)
+    assert [len(titles) for titles in fake_wiki.queries] == [50, 50, 25]
+    assert (tmp_path / "wiki" / "Page 7").read_text() == "Text of page 7"
+    assert not (tmp_path / "wiki" / "Page 120").exists()
+    assert wiki_session.stats["preload"].calls == 125
+
+
+async def test_mirror_pages_skips_unchanged(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    fake_wiki.add_page("Shovel", "'''Shovel''' is a tool.")
+    fake_wiki.add_page("Items/Tools", "* [[Shovel]]")
+    pages = {"Shovel": "BP_Melee_Shovel", "Items/Tools": get_mirror_filename("Items/Tools")}
+
+    mirror_pages(pages, root=tmp_path, session=wiki_session)
+    fake_wiki.add_page("Items/Tools", "* [[Shovel]]\n* [[Axe]]")
+    stats = mirror_pages(pages, root=tmp_path, session=wiki_session)
+
+    assert (stats.written, stats.unchanged) == (1, 1)
+    assert (tmp_path / "BP_Melee_Shovel").read_text() == "'''Shovel''' is a tool."
+    assert (tmp_path / "Items%2FTools").read_text() == "* [[Shovel]]\n* [[Axe]]"
+
+
+async def test_mirror_pages_records_sync_state(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    for i in range(60):
+        fake_wiki.add_page(f"Page {i}", f"Text of page {i}")
+    state = SyncState(tmp_path / "sync_state.sqlite")
+
+    mirror_pages([f"Page {i}" for i in range(60)], root=tmp_path / "wiki", session=wiki_session, state=state)
+    fake_wiki.add_page("Page 3", "Edited")
+    queries = len(fake_wiki.queries)
+    revids = wiki_session.get_revids(f"Page {i}" for i in range(61))
+
+    assert state.get("Page 3") == SyncRecord(revid=4, hash=get_content_hash("Text of page 3"), source=SEEN)
+    assert revids["Page 3"] == 61
+    assert revids["Page 4"] == state.get("Page 4").revid
+    assert revids["Page 60"] is None
+    assert [len(titles) for titles in fake_wiki.queries[queries:]] == [50, 11]
+
+
+async def test_refresh_mirror_replays_changes(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    for title in ("Shovel", "Axe", "Rope", "Hatchet", "Items/Tools", "Main Page"):
+        fake_wiki.add_page(title, f"{title} v1")
+    state = SyncState(tmp_path / "sync_state.sqlite")
+    pages = {"Shovel": "BP_Melee_Shovel", **{title: get_mirror_filename(title) for title in ("Axe", "Rope", "Hatchet", "Items/Tools")}}
+    mirror_pages(pages, root=tmp_path / "wiki", session=wiki_session, state=state)
+    since = state.get_last_sync()
+    fake_wiki.replay(
+        [
+            ("edit", "Axe", "Axe v2"),
+            ("edit", "Main Page", "Main Page v2"),
+            ("delete", "Rope"),
+            ("move", "Items/Tools", "Tools"),
+            ("move", "Shovel", "Shovel (tool)"),
+            ("edit", "Shovel (tool)", "Shovel v2"),
+        ]
+    )
+
+    changes = wiki_session.get_changes(since, batch_size=2)
+    stats = refresh_mirror(state, root=tmp_path / "wiki", session=wiki_session)
+
+    # the start is inclusive, the last change before the sync is listed again
+    assert [(change.kind, change.title, change.new_title) for change in changes] == [
+        ("new", "Main Page", None),
+        ("edit", "Axe", None),
+        ("edit", "Main Page", None),
+        ("delete", "Rope", None),
+        ("move", "Items/Tools", "Tools"),
+        ("move", "Shovel", "Shovel (tool)"),
+        ("edit", "Shovel (tool)", None),
+    ]
+    assert sorted(fake_wiki.queries[-1]) == ["Axe", "Rope", "Shovel (tool)", "Tools"]
+    assert (stats.written, stats.removed, stats.moved) == (3, 1, 2)
+    assert sorted(path.name for path in (tmp_path / "wiki").iterdir()) == [
+        "Axe",
+        "BP_Melee_Shovel",
+        "Hatchet",
+        "Tools",
+    ]
+    assert (tmp_path / "wiki" / "BP_Melee_Shovel").read_text() == "Shovel v2"
+    assert (tmp_path / "wiki" / "Axe").read_text() == "Axe v2"
+    assert state.get_mirror_files()["Shovel (tool)"] == "BP_Melee_Shovel"
+    assert state.get("Rope") is None
+    assert "Rope" not in state.get_mirror_files()
+    assert state.get_last_sync() > since
+
+    stats = refresh_mirror(state, root=tmp_path / "wiki", session=wiki_session)
+    assert (stats.fetched, stats.written, stats.removed, stats.moved) == (1, 0, 0, 0)
+
+
+async def test_refresh_mirror_older_than_recent_changes(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    for title in ("Shovel", "Axe", "Rope"):
+        fake_wiki.add_page(title, f"{title} v1")
+    state = SyncState(tmp_path / "sync_state.sqlite")
+    mirror_pages({"Shovel": "BP_Melee_Shovel", "Axe": "Axe", "Rope": "Rope"}, root=tmp_path / "wiki", session=wiki_session, state=state)
+    fake_wiki.replay([("edit", "Shovel", "Shovel v2"), ("delete", "Rope")])
+    # the changes since have expired from the recent changes of the wiki
+    state.set_last_sync("2020-01-01T00:00:00Z")
+
+    stats = refresh_mirror(state, root=tmp_path / "wiki", session=wiki_session)
+
+    assert wiki_session.stats["changes"].calls == 0
+    assert (stats.fetched, stats.written, stats.unchanged, stats.removed) == (3, 1, 1, 1)
+    assert sorted(path.name for path in (tmp_path / "wiki").iterdir()) == ["Axe", "BP_Melee_Shovel"]
+    assert (tmp_path / "wiki" / "BP_Melee_Shovel").read_text() == "Shovel v2"
+    assert state.get_mirror_files() == {"Shovel": "BP_Melee_Shovel", "Axe": "Axe"}
+    assert state.get_last_sync() > "2020-01-01T00:00:00Z"
+
+
+async def test_refresh_mirror_needs_a_sync(wiki_session: WikiSession, tmp_path: Path):
+    with pytest.raises(VeinError, match="never synced"):
+        refresh_mirror(SyncState(tmp_path / "sync_state.sqlite"), root=tmp_path / "wiki", session=wiki_session)
@@ -0,0 +1,53 @@
+import os
+from pathlib import Path
+
+from vein_wiki_tools.clients.pakdump.models import UEModel
+from vein_wiki_tools.models.common import WikiReference
+from vein_wiki_tools.services.render_cache import RenderCache, get_render_key
+from vein_wiki_tools.services.template import get_template_sources
+
+
+def create_context(name: str = "BP_Shovel") -> dict:
+    return {
+        "model": UEModel(type="Test", name=name),
+        "usage": {"requirements": {"batteries": [WikiReference(text="Battery")]}},
+        "categories": {"Tools", "Scented"},
+    }
+
+
+async def test_get_render_key_is_stable():
+    key = get_render_key("requirements.jinja", create_context())
+    assert key is not None
+    assert get_render_key("requirements.jinja", create_context()) == key
+    assert get_render_key("requirements.jinja", create_context("BP_Axe")) != key
+    assert get_render_key("repair.jinja", create_context()) != key
+
+
+async def test_get_render_key_uncacheable_context():
+    assert get_render_key("requirements.jinja", {"model": object()}) is None
+
+
+async def test_get_template_sources_follows_includes():
+    assert get_template_sources("conditions.jinja") == ["conditions.jinja", "food_condition_set.jinja"]
+    # item.jinja includes the infobox template by name from the context, so every template counts
+    assert "infoboxes/infobox_item.jinja" in get_template_sources("item.jinja")
+
+
+async def test_render_cache(tmp_path: Path):
+    output = tmp_path / "page.wiki"
+    render_cache = RenderCache(tmp_path / "renders.sqlite")
+
+    assert not render_cache.is_fresh(output, "key")
+    output.write_text("page")
+    render_cache.put(output, "key")
+    assert render_cache.is_fresh(output, "key")
+    assert not render_cache.is_fresh(output, "other")
+
+    stat = output.stat()
+    os.utime(output, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not render_cache.is_fresh(output, "key")
+    assert not render_cache.is_fresh(output, None)
+
+    assert render_cache.stats.hits == 1
+    assert render_cache.stats.misses == 3
+    assert render_cache.stats.uncacheable == 1
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from vein_wiki_tools.services.sync_state import SEEN, WRITTEN, SyncRecord, SyncState, get_content_hash, normalize_content
+
+
+async def test_normalize_content():
+    assert normalize_content("{{Item\r\n| name = Axe   \r\n}}\r\n\r\n") == "{{Item\n| name = Axe\n}}"
+    assert get_content_hash("text\n") == get_content_hash("text")
+    assert get_content_hash("text") != get_content_hash("Text")
+
+
+async def test_sync_state_persists(tmp_path: Path):
+    state = SyncState(tmp_path / "sync_state.sqlite")
+    state.record("Axe", "a", 1, SEEN)
+    state.record("Axe", "b", 2, WRITTEN)
+    state.record("Rope", "c", None, SEEN, commit=False)
+    state.close()
+
+    state = SyncState(tmp_path / "sync_state.sqlite")
+    assert state.get("Axe") == SyncRecord(2, "b", WRITTEN)
+    assert state.get("Rope") == SyncRecord(None, "c", SEEN)
+    state.forget("Axe")
+    assert state.get("Axe") is None
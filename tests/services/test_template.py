@@ -1,4 +1,5 @@
-from vein_wiki_tools.services.template import trim_bad_newlines
+from vein_wiki_tools.clients.pakdump.models import UEModel
+from vein_wiki_tools.services.template import render, render_all, trim_bad_newlines
 
 
 async def test_trim_bad_newlines():
@@ -33,3 +34,18 @@ async def test_trim_bad_newlines2():
 }}"""
     result = trim_bad_newlines(input_text)
     assert result == expected_output
+
+
+def create_requirements_page(name: str, batteries: list[str]) -> tuple[str, dict]:
+    return "requirements.jinja", {"model": UEModel(type="Test", name=f"BP_{name}"), "usage": {"requirements": {"batteries": batteries}}}
+
+
+async def test_render_all_parallel_matches_serial():
+    pages = [create_requirements_page(f"Tool{i}", [f"Battery{j}" for j in range(i % 3 + 1)]) for i in range(6)]
+
+    serial = list(render_all(pages))
+    parallel = list(render_all(pages, workers=2, chunk_size=1))
+
+    assert parallel == serial
+    assert serial[0] == await render(*pages[0])
+    assert "* Battery2" in serial[2]
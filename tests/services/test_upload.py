@@ -0,0 +1,141 @@
+from pathlib import Path
+
+import pytest
+
+from tests.fake_wiki import FakeWiki, Fault
+from vein_wiki_tools.clients.wiki import WikiSession
+from vein_wiki_tools.services.mirror import mirror_pages
+from vein_wiki_tools.services.sync_state import SyncState, get_content_hash
+from vein_wiki_tools.services.upload import TokenBucket, UploadScheduler, get_edit_bucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+async def test_token_bucket_paces_and_adapts():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+
+    bucket.backoff(pause=10.0)
+    assert bucket.rate == 1.0
+    assert bucket.acquire() == pytest.approx(11.0)
+
+    bucket.recover()
+    assert bucket.rate == pytest.approx(1.2)
+    for _ in range(10):
+        bucket.recover()
+    assert bucket.rate == 2.0
+
+
+async def test_edit_bucket_follows_wiki_ratelimit(pywikibot_config, mocker):
+    with FakeWiki(ratelimits={"edit": {"user": {"hits": 90, "seconds": 60}}}) as fake_wiki:
+        fam = fake_wiki.get_family()
+        mocker.patch.dict(pywikibot_config.usernames, {fam.name: {"en": fake_wiki.user}})
+        site = WikiSession(fam=fam).login()
+
+        assert get_edit_bucket(site, max_rate=10.0).rate == 1.5
+        assert get_edit_bucket(site, max_rate=1.0).rate == 1.0
+
+
+async def test_upload_scheduler_backs_off_under_load(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    fake_wiki.add_page("Shovel", "old")
+    state = SyncState(tmp_path / "sync_state.sqlite")
+    mirror_pages(["Shovel"], root=tmp_path / "wiki", session=wiki_session, state=state)
+    fake_wiki.inject(
+        Fault("edit", code="maxlag", lag=0.01),
+        # one more server error than pywikibot retries (max_retries = 2)
+        *(Fault("edit", status=503) for _ in range(3)),
+    )
+    bucket = TokenBucket(rate=100.0)
+    scheduler = UploadScheduler(state, session=wiki_session, bucket=bucket, backoff=0.01)
+
+    stats = scheduler.upload([("Shovel", "new", "update"), ("Axe", "axe", "create")])
+
+    assert (stats.saved, stats.failed, stats.retries, stats.lagged) == (2, 0, 1, 1)
+    assert bucket.rate < 100.0
+    assert fake_wiki.pages["Shovel"].latest.text == "new"
+    assert fake_wiki.pages["Axe"].latest.text == "axe"
+    assert state.get("Shovel").hash == get_content_hash("new")
+    assert state.get("Shovel").revid == fake_wiki.pages["Shovel"].latest.revid
+    # the throttle of the site is shared, it is left as it was
+    assert "lag" not in vars(wiki_session.login().throttle)
+
+
+async def test_upload_scheduler_resumes_from_sync_state(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    pages = [(f"Page {i}", f"text {i}", "sync") for i in range(4)]
+    # a page that stays protected fails on every run, without stopping the pages after it
+    fake_wiki.inject(Fault("edit", code="protectedpage", title="Page 2", persistent=True))
+    state_path = tmp_path / "sync_state.sqlite"
+
+    stats = UploadScheduler(SyncState(state_path), session=wiki_session, bucket=TokenBucket(rate=100.0)).upload(pages)
+    assert (stats.saved, stats.failed) == (3, 1)
+
+    stats = UploadScheduler(SyncState(state_path), session=wiki_session, bucket=TokenBucket(rate=100.0)).upload(pages)
+
+    assert (stats.saved, stats.skipped, stats.failed, stats.conflicts) == (0, 3, 1, 0)
+    assert {title: page.latest.text for title, page in fake_wiki.pages.items()} == {
+        "Page 0": "text 0",
+        "Page 1": "text 1",
+        "Page 3": "text 3",
+    }
+
+
+async def test_upload_scheduler_skips_unchanged_pages(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    fake_wiki.add_page("Shovel", "shovel")
+    fake_wiki.add_page("Axe", "axe")
+    state = SyncState(tmp_path / "sync_state.sqlite")
+    mirror_pages(["Shovel", "Axe"], root=tmp_path / "wiki", session=wiki_session, state=state)
+    requests = dict(fake_wiki.requests)
+
+    # trailing whitespace is dropped by the wiki when saving, so it isn't a change
+    stats = UploadScheduler(state, session=wiki_session, bucket=TokenBucket(rate=100.0)).upload(
+        [("Shovel", "shovel  \n", "sync"), ("Axe", "axe\r\n", "sync")]
+    )
+
+    assert (stats.saved, stats.skipped) == (0, 2)
+    assert fake_wiki.requests == requests
+
+
+async def test_upload_scheduler_leaves_conflicts(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    for title in ("Shovel", "Axe", "Rope"):
+        fake_wiki.add_page(title, title.lower())
+    state = SyncState(tmp_path / "sync_state.sqlite")
+    mirror_pages(["Shovel", "Axe", "Rope"], root=tmp_path / "wiki", session=wiki_session, state=state)
+    fake_wiki.add_page("Axe", "axe, edited", user="Someone")
+    queries = len(fake_wiki.queries)
+
+    stats = UploadScheduler(state, session=wiki_session, bucket=TokenBucket(rate=100.0)).upload(
+        [("Shovel", "shovel", "sync"), ("Axe", "axe v2", "sync"), ("Rope", "rope v2", "sync")]
+    )
+
+    assert (stats.saved, stats.skipped, stats.conflicts) == (1, 1, 1)
+    # one revision check for both changed pages
+    assert fake_wiki.queries[queries] == ["Axe", "Rope"]
+    assert fake_wiki.pages["Axe"].latest.text == "axe, edited"
+    assert fake_wiki.pages["Rope"].latest.text == "rope v2"
+    assert state.get("Rope").revid == fake_wiki.pages["Rope"].latest.revid
+
+
+async def test_upload_scheduler_leaves_pages_never_mirrored(fake_wiki: FakeWiki, wiki_session: WikiSession, tmp_path: Path):
+    fake_wiki.add_page("Shovel", "shovel, written by hand", user="Someone")
+    state = SyncState(tmp_path / "sync_state.sqlite")
+
+    stats = UploadScheduler(state, session=wiki_session, bucket=TokenBucket(rate=100.0)).upload(
+        [("Shovel", "shovel", "sync"), ("Axe", "axe", "sync")]
+    )
+
+    assert (stats.saved, stats.conflicts) == (1, 1)
+    assert fake_wiki.pages["Shovel"].latest.text == "shovel, written by hand"
+    assert state.get("Shovel") is None
+    assert fake_wiki.pages["Axe"].latest.text == "axe"
@@ -1,3 +1,4 @@
+import io
 from collections import deque
 from pathlib import Path
 
@@ -5,7 +6,7 @@ import pytest
 
 from vein_wiki_tools.data.csv.load import csv_read
 from vein_wiki_tools.services.template import get_template
-from vein_wiki_tools.services.wiki_pages import ParserFlag, find_section_header_size, get_page, is_control_line, parse_categories, parse_infobox, parse_page, parse_sections
+from vein_wiki_tools.services.wiki_pages import ParserFlag, find_section_header_size, get_page, is_control_line, merge_all, merge_page_text, parse_categories, parse_infobox, parse_page, parse_page_sync, parse_sections, render_page, render_page_sync, serialize_page, tokenize
 from vein_wiki_tools.utils.file_helper import get_full_file_path
 
 
@@ -159,3 +160,130 @@ async def test_render_and_parse_file():
     rendered = template.render(subject=test_item)
     parsed = await parse_page(rendered)
     assert parsed.infobox is not None
+
+
+async def test_tokenize_counts_braces():
+    tokens = tokenize("{{Infobox\n|a={{nested\n|b}}\n}}\n== Section ==\n[[Category:Tools]]")
+    assert [(t.flag, t.name, t.depth) for t in tokens] == [
+        (ParserFlag.TEMPLATE_START, "infobox", 0),
+        (ParserFlag.NONE, None, 1),
+        (ParserFlag.NONE, None, 2),
+        (ParserFlag.TEMPLATE_END, "", 1),
+        (ParserFlag.SECTION, "section", 0),
+        (ParserFlag.CATEGORIES, "tools", 0),
+    ]
+
+
+async def test_parse_page_unclosed_template():
+    content = "{{Infobox\n| title = Shovel\n}}\n\n== Use ==\nDigging.\n{{Broken|a={{Icon}}\n== Trivia ==\nSharp.\n[[Category:Tools]]"
+
+    tokens = tokenize(content)
+    parsed_page = parse_page_sync(content)
+
+    assert [(t.flag, t.name) for t in tokens[6:]] == [
+        (ParserFlag.NONE, None),
+        (ParserFlag.SECTION, "trivia"),
+        (ParserFlag.NONE, None),
+        (ParserFlag.CATEGORIES, "tools"),
+    ]
+    assert list(parsed_page.sections) == ["use", "trivia"]
+    assert parsed_page.sections["use"].lines[-1] == "{{Broken|a={{Icon}}"
+    assert parsed_page.categories == ["[[Category:Tools]]"]
+    assert render_page_sync(parsed_page) == content
+
+
+async def test_parse_page_many_unclosed_templates():
+    content = "\n".join(["{{Infobox"] * 5000 + ["== Use ==", "Digging.", "[[Category:Tools]]"])
+
+    tokens = tokenize(content)
+    parsed_page = parse_page_sync(content)
+
+    assert {t.flag for t in tokens[:5000]} == {ParserFlag.NONE}
+    assert list(parsed_page.sections) == ["use"]
+    assert parsed_page.categories == ["[[Category:Tools]]"]
+    assert render_page_sync(parsed_page) == content
+
+
+async def test_parse_page_nested_templates():
+    content = """{{Infobox
+| image = {{Icon|Shovel}}
+}}
+'''Shovel''' is a tool.
+== Use ==
+{{Quote
+== Not a section ==
+[[Category:Not a category]]
+}}
+=== Building ===
+* Wells
+[[Category:Tools]]"""
+    parsed_page = await parse_page(content)
+
+    assert parsed_page.infobox is not None
+    assert len(parsed_page.infobox.lines) == 3
+    assert parsed_page.pre_section is not None
+    assert parsed_page.pre_section.lines == ["'''Shovel''' is a tool."]
+    assert list(parsed_page.sections) == ["use"]
+    assert len(parsed_page.sections["use"].lines) == 5
+    assert list(parsed_page.sections["use"].children) == ["building"]
+    assert parsed_page.categories == ["[[Category:Tools]]"]
+
+
+async def test_parse_page_infobox_start_end():
+    content = """{{Infobox start}}
+| title = Shovel
+{{Infobox end}}
+== Use =="""
+    parsed_page = parse_page_sync(content)
+
+    assert parsed_page.infobox is not None
+    assert len(parsed_page.infobox.lines) == 3
+    assert parsed_page.pre_section is None
+    assert list(parsed_page.sections) == ["use"]
+
+
+async def test_render_page_round_trip():
+    content = Path(get_full_file_path("tests/testfiles/BP_Melee_Shovel")).read_text()
+    parsed_page = await parse_page(content)
+
+    assert parsed_page.sections["use"].children
+    assert await render_page(parsed_page) == content.strip()
+
+
+async def test_serialize_page_to_stream():
+    parsed_page = parse_page_sync("{{Infobox\n}}\n\n== Use ==\n=== Building ===\n* Wells  \n\n\n")
+    out = io.StringIO()
+    serialize_page(parsed_page, out)
+    assert out.getvalue() == "{{Infobox\n}}\n\n== Use ==\n=== Building ===\n* Wells"
+
+
+async def test_merge_page_text():
+    existing = "{{Infobox\n| title = Shovel\n}}\n\n== Use ==\nDigging.\n\n== Trivia ==\nSharp."
+    new = "{{Infobox\n| title = Shovel\n| weight = 2\n}}\n\n== Use ==\nDigging."
+
+    merged = merge_page_text(existing, new)
+
+    assert "| weight = 2" in merged
+    assert "== Trivia ==" in merged
+    assert merge_page_text(merged, new) == merged
+
+
+async def test_merge_all_ignores_trailing_whitespace():
+    content = Path(get_full_file_path("tests/testfiles/BP_Melee_Shovel")).read_text().strip()
+
+    (merge,) = merge_all([("page", content + "\n", content)])
+
+    assert not merge.changed
+
+
+async def test_merge_all_parallel():
+    content = Path(get_full_file_path("tests/testfiles/BP_Melee_Shovel")).read_text().strip()
+    pages = [(f"page{i}", content, content if i % 2 else content.replace("Shovel", "Spade", 1)) for i in range(4)]
+
+    serial = list(merge_all(pages))
+    parallel = list(merge_all(pages, workers=2, chunk_size=1))
+
+    assert [m.name for m in parallel] == ["page0", "page1", "page2", "page3"]
+    assert [m.text for m in parallel] == [m.text for m in serial]
+    assert [m.changed for m in serial] == [m.text != content for m in serial]
+    assert not serial[1].changed